@@ -1,18 +1,63 @@
+import asyncio
+import hashlib
+import json
 import logging
+import shutil
+import threading
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
+import numpy as np
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain.tools import tool
-from langchain_community.document_loaders import (
-    DirectoryLoader,
-    UnstructuredMarkdownLoader,
-)
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+
+from utils.ann_index import (
+    BUILD_PARAMS,
+    DEFAULT_INDEX_PARAMS,
+    INDEX_TYPES,
+    build_index,
+    set_search_params,
+)
+from utils.context_packer import DEFAULT_CONTEXT_BUDGET, pack_context
+from utils.document_loader import iter_file_chunks, load_file, make_text_splitter
+from utils.embedding_pipeline import EmbeddingPipeline
+from utils.embedding_store import CachedEmbeddings, EmbeddingStore
+from utils.lexical_index import keyword_terms, reciprocal_rank_fusion
+from utils.metrics import StageTimingCallback, TimedEmbeddings, increment, timed
+from utils.models import create_chat_model, create_embeddings
+from utils.query_cache import with_query_cache
+from utils.rerank import DEFAULT_FETCH_K, DEFAULT_MMR_LAMBDA, rerank
+from utils.shared_index import SharedIndex
+from utils.single_flight import SingleFlight
+from utils.vector_store_io import (
+    lexical_search,
+    load_store,
+    save_store,
+    stored_vectors,
+)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+# Approximate-nearest-neighbour search index saved next to the flat index
+ANN_INDEX_NAME = "ann"
+ANN_SETTINGS_FILENAME = "ann.json"
+# Bumped when saved approximate indexes must be rebuilt (2: IVF direct map)
+ANN_FORMAT_VERSION = 2
+
+# "agent": ReAct agent decides when to retrieve and writes the answer
+# "direct": always retrieve, then one grounded generation
+# "retrieval": always retrieve and return the raw chunks for the caller to synthesize
+AGENT_MODES = ("agent", "direct", "retrieval")
+
+# "vector": embedding similarity search
+# "hybrid": vector and BM25 results fused, keyword queries answered lexically
+SEARCH_TYPES = ("vector", "hybrid")
 
 
 class BaseRAGAgent(ABC):
@@ -27,6 +72,19 @@ class BaseRAGAgent(ABC):
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
         retrieval_k: int = 4,
+        embedding_cache_path: Optional[Path] = None,
+        embedding_batch_size: int = 64,
+        embedding_concurrency: int = 4,
+        loader: str = "unstructured",
+        loader_workers: Optional[int] = None,
+        mode: str = "agent",
+        index_type: str = "flat",
+        index_params: Optional[dict] = None,
+        search_type: str = "vector",
+        fetch_k: int = DEFAULT_FETCH_K,
+        mmr_lambda: float = DEFAULT_MMR_LAMBDA,
+        context_token_budget: Optional[int] = DEFAULT_CONTEXT_BUDGET,
+        coalesce_queries: bool = True,
     ):
         """
         Initialize the RAG agent.
@@ -39,7 +97,37 @@ class BaseRAGAgent(ABC):
             chunk_size: Size of text chunks for splitting
             chunk_overlap: Overlap between chunks
             retrieval_k: Number of documents to retrieve
+            embedding_cache_path: SQLite file caching chunk embeddings across index
+                builds (defaults to embedding_cache.sqlite next to the vector store)
+            embedding_batch_size: Number of chunks per embeddings request
+            embedding_concurrency: Maximum embeddings requests in flight during builds
+            loader: "unstructured" to parse markdown with unstructured, or "markdown"
+                for the lightweight raw-text loader
+            loader_workers: Processes used to load and split large corpora
+                (defaults to the CPU count; 1 disables the process pool)
+            mode: Answering mode, one of AGENT_MODES: "agent" for the ReAct agent,
+                "direct" for retrieval plus one grounded generation, or
+                "retrieval" to return the retrieved chunks as the answer
+            index_type: Search index, one of INDEX_TYPES: "flat" for exact search,
+                or "ivf_flat", "hnsw", "ivf_pq" or "sq8" for an approximate index
+                built from the flat one (see use_ann_index())
+            index_params: Overrides of DEFAULT_INDEX_PARAMS for approximate indexes
+            search_type: Retrieval, one of SEARCH_TYPES: "vector" for embedding
+                search, or "hybrid" to fuse it with BM25 keyword search
+            fetch_k: Candidates fetched per query before overlapping chunks are
+                merged and retrieval_k are picked by MMR (retrieval_k or less
+                skips MMR)
+            mmr_lambda: MMR weight of query relevance against novelty, between
+                0 and 1 (1 ranks by relevance alone)
+            context_token_budget: Maximum tokens of retrieved context put in a
+                prompt or tool result, filled in relevance order (None for no
+                limit)
+            coalesce_queries: Share one run among concurrent identical
+                questions (see use_query_coalescing())
         """
+        if mode not in AGENT_MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {AGENT_MODES}")
+
         self.docs_path = docs_path
         self.vector_store_path = vector_store_path
         self.embedding_model = embedding_model
@@ -47,11 +135,54 @@ class BaseRAGAgent(ABC):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.retrieval_k = retrieval_k
+        self.fetch_k = fetch_k
+        self.mmr_lambda = mmr_lambda
+        self.context_token_budget = context_token_budget
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_concurrency = embedding_concurrency
+        self.loader = loader
+        self.loader_workers = loader_workers
+        self.mode = mode
 
-        self.embeddings = OpenAIEmbeddings(model=self.embedding_model)
+        self.embedding_cache_path = embedding_cache_path or (
+            Path(vector_store_path).parent / "embedding_cache.sqlite"
+        )
+
+        # Lowercase domain name labelling this agent's stage metrics
+        self.metrics_label = self.get_agent_name().lower()
+        # Query embeddings are shared with every agent using the same model
+        self.embeddings = CachedEmbeddings(
+            with_query_cache(
+                TimedEmbeddings(
+                    create_embeddings(self.embedding_model), agent=self.metrics_label
+                ),
+                self.embedding_model,
+            ),
+            model=self.embedding_model,
+            store=EmbeddingStore(self.embedding_cache_path),
+        )
         self.vector_store: Optional[FAISS] = None
+        # Whether vector_store searches an approximate index instead of the flat one
+        self._ann_active = False
+        # Whether vector_store is the flat index in process memory, safe to modify
+        # (loaded stores are memory-mapped read-only)
+        self._store_writable = False
+        self.use_ann_index(index_type, index_params)
+        self.use_search_type(search_type)
+        self.use_query_coalescing(coalesce_queries)
+        # Set by use_shared_index() to search a multi-domain index instead
+        self.shared_index: Optional[SharedIndex] = None
+        self.domain: Optional[str] = None
         self.agent = None
         self.retriever = None
+        self._store_lock = threading.RLock()
+        self._init_lock = threading.Lock()
+        # Queries running on the agent, which unload() waits out
+        self._active_queries = 0
+        self._usage_lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # Seconds spent in each initialize() phase, for startup reporting
+        self.startup_timings: dict[str, float] = {}
         self.logger = logging.getLogger(f"agents.{self.get_agent_name().lower()}")
 
     @abstractmethod
@@ -62,133 +193,976 @@ class BaseRAGAgent(ABC):
         """
         pass
 
-    def load_documents(self):
-        """Load all markdown files from the documents directory."""
-        loader = DirectoryLoader(
-            str(self.docs_path),
-            glob="**/*.md",
-            loader_cls=UnstructuredMarkdownLoader,
-        )
-        documents = loader.load()
-        return documents
+    def load_documents(self, paths: Optional[list[Path]] = None):
+        """
+        Load markdown files from the documents directory.
+
+        Args:
+            paths: Specific files to load (defaults to every markdown file)
+
+        Returns:
+            List of loaded documents
+        """
+        if paths is None:
+            paths = sorted(Path(self.docs_path).glob("**/*.md"))
+
+        return [doc for path in paths for doc in load_file(path, self.loader)]
 
     def split_documents(self, documents):
         """Split documents into chunks for better retrieval."""
-        text_splitter = RecursiveCharacterTextSplitter(
+        text_splitter = make_text_splitter(self.chunk_size, self.chunk_overlap)
+        chunks = text_splitter.split_documents(documents)
+        return chunks
+
+    def iter_chunks(
+        self, paths: Optional[list[Path]] = None
+    ) -> Iterator[tuple[Path, list[Document]]]:
+        """
+        Load and split files in parallel, yielding each file's chunks as ready.
+
+        Args:
+            paths: Specific files to load (defaults to every markdown file)
+
+        Yields:
+            Tuples of (file path, chunks of that file)
+        """
+        if paths is None:
+            paths = sorted(Path(self.docs_path).glob("**/*.md"))
+
+        yield from iter_file_chunks(
+            paths,
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
-            separators=["\n\n", "\n", " ", ""],
-            add_start_index=True,  # Track chunk position in original document
+            loader=self.loader,
+            max_workers=self.loader_workers,
         )
-        chunks = text_splitter.split_documents(documents)
-        return chunks
 
-    def create_vector_store(self, chunks):
-        """Create FAISS vector store from document chunks."""
-        vector_store = FAISS.from_documents(chunks, self.embeddings)
+    def create_vector_store(self, chunks, ids: Optional[list[str]] = None):
+        """
+        Create FAISS vector store from document chunks.
+
+        Args:
+            chunks: Document chunks
+            ids: Chunk IDs (generated if None)
+        """
+        chunks = list(chunks)
+        if ids is None:
+            ids = [str(i) for i in range(len(chunks))]
+        return self._index_chunks(zip(chunks, ids))
+
+    def _index_chunks(
+        self,
+        pairs: Iterable[tuple[Document, str]],
+        vector_store: Optional[FAISS] = None,
+        build_settings: Optional[dict] = None,
+    ) -> Optional[FAISS]:
+        """
+        Embed (chunk, id) pairs into a new vector store, or add them to an existing one.
+
+        Chunks are embedded in batches with bounded concurrency and written to the
+        index as batches complete. Full builds are checkpointed next to the vector
+        store and resume from there if interrupted. Chunk embeddings are read from
+        the persistent embedding cache first, so only new or edited chunks are sent
+        to the embeddings API.
+
+        Args:
+            pairs: Iterable of (chunk, chunk ID) pairs, consumed lazily
+            vector_store: Existing store to add the chunks to
+            build_settings: Settings a checkpoint must match to be resumed
+
+        Returns:
+            The vector store
+        """
+        checkpoint = vector_store is None and build_settings is not None
+        pipeline = EmbeddingPipeline(
+            self.embeddings,
+            batch_size=self.embedding_batch_size,
+            max_concurrency=self.embedding_concurrency,
+            checkpoint_path=self._checkpoint_path() if checkpoint else None,
+            build_settings=build_settings,
+            logger=self.logger,
+        )
+
+        hits, misses = self.embeddings.hits, self.embeddings.misses
+        vector_store = pipeline.build(pairs, vector_store=vector_store)
+        self.logger.debug(
+            f"Embedding cache: {self.embeddings.hits - hits} chunks reused, "
+            f"{self.embeddings.misses - misses} embedded"
+        )
         return vector_store
 
+    def _checkpoint_path(self) -> Path:
+        """Return the directory holding the partial index of an interrupted build."""
+        path = Path(self.vector_store_path)
+        return path.with_name(f"{path.name}.partial")
+
+    def _clear_checkpoint(self):
+        """Remove the partial index once the full build has been saved."""
+        checkpoint_path = self._checkpoint_path()
+        if checkpoint_path.exists():
+            shutil.rmtree(checkpoint_path)
+
     def save_vector_store(self):
         """Save FAISS vector store to disk."""
         if self.vector_store is None:
             raise ValueError("No vector store to save")
 
-        Path(self.vector_store_path).parent.mkdir(parents=True, exist_ok=True)
-        self.vector_store.save_local(str(self.vector_store_path))
+        save_store(self.vector_store, self.vector_store_path)
         self.logger.debug(f"Vector store saved to {self.vector_store_path}")
 
-    def load_vector_store(self) -> bool:
+    def load_vector_store(self, writable: bool = False) -> bool:
         """
         Load FAISS vector store from disk.
 
+        By default the index and docstore are memory-mapped read-only: loading
+        takes milliseconds whatever the index size, and processes serving the
+        same store share its pages.
+
+        Args:
+            writable: Read the store into process memory so it can be modified
+
         Returns:
             True if loaded successfully, False otherwise
         """
-        if Path(self.vector_store_path).exists():
-            self.vector_store = FAISS.load_local(
-                str(self.vector_store_path),
+        vector_store = self._read_vector_store(writable=writable)
+        if vector_store is None:
+            return False
+        self.vector_store = vector_store
+        self._ann_active = False
+        self._store_writable = writable
+        self.logger.debug(f"Vector store loaded from {self.vector_store_path}")
+        return True
+
+    def _read_vector_store(self, writable: bool = False) -> Optional[FAISS]:
+        """Read the FAISS vector store from disk without attaching it to the agent."""
+        return load_store(self.vector_store_path, self.embeddings, mmap=not writable)
+
+    def use_shared_index(self, shared_index: SharedIndex, domain: str):
+        """
+        Search a multi-domain shared index instead of loading this agent's own.
+
+        The agent still maintains its own index on disk; initialize() copies it
+        into the shared index when its sources change and then releases it.
+
+        Args:
+            shared_index: Shared index holding every domain's chunks
+            domain: Domain name tagging this agent's chunks
+        """
+        if shared_index.embedding_model != self.embedding_model:
+            raise ValueError(
+                f"Shared index uses {shared_index.embedding_model}, "
+                f"but {self.get_agent_name()} uses {self.embedding_model}"
+            )
+        self.shared_index = shared_index
+        self.domain = domain
+
+    def use_ann_index(self, index_type: str, index_params: Optional[dict] = None):
+        """
+        Search an approximate-nearest-neighbour index instead of the flat one.
+
+        The flat index stays the source of truth that builds and incremental
+        syncs update; initialize() derives the approximate index from it (trained
+        on a sample of its vectors), saves it next to it and rebuilds it only when
+        the indexed sources or build parameters change. Indexes smaller than the
+        'min_vectors' parameter stay flat. Ignored with a shared index.
+
+        Args:
+            index_type: One of INDEX_TYPES ("flat" for exact search)
+            index_params: Overrides of DEFAULT_INDEX_PARAMS
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}"
+            )
+        self.index_type = index_type
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+
+    def use_search_type(self, search_type: str):
+        """
+        Select how the retriever finds chunks.
+
+        Hybrid search reads the BM25 index saved in the store's docstore, so
+        it needs no extra loading; it applies to agents built afterwards.
+
+        Args:
+            search_type: One of SEARCH_TYPES
+        """
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(
+                f"Unknown search type '{search_type}', expected one of {SEARCH_TYPES}"
+            )
+        self.search_type = search_type
+
+    def use_query_coalescing(self, enabled: bool = True):
+        """
+        Share one run among concurrent queries for the same question.
+
+        Questions match after collapsing whitespace and case. Callers joining
+        a run receive its result, so their own config (e.g. tracing
+        callbacks) is not used; finished runs are not cached.
+
+        Args:
+            enabled: Whether to coalesce concurrent identical queries
+        """
+        self.single_flight = SingleFlight(self.metrics_label) if enabled else None
+
+    def set_search_params(
+        self, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+    ):
+        """
+        Tune the recall/latency trade-off of the approximate index at run time.
+
+        Args:
+            nprobe: IVF lists searched per query
+            ef_search: HNSW candidate list size per query
+        """
+        if nprobe is not None:
+            self.index_params["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_params["ef_search"] = ef_search
+        vector_store = self.vector_store
+        if self._ann_active and vector_store is not None:
+            set_search_params(vector_store.index, nprobe=nprobe, ef_search=ef_search)
+
+    def _load_search_index(self):
+        """
+        Attach the approximate index selected by index_type to the vector store.
+
+        A saved approximate index is used when it was built from the current
+        flat index with the current build parameters; the flat index is then
+        not read at all. Otherwise the approximate index is built and saved.
+        """
+        path = Path(self.vector_store_path)
+        settings = {
+            "index_type": self.index_type,
+            "build_params": {key: self.index_params[key] for key in BUILD_PARAMS},
+            "fingerprint": self.index_fingerprint(),
+            "version": ANN_FORMAT_VERSION,
+        }
+        settings_path = path / ANN_SETTINGS_FILENAME
+        saved = json.loads(settings_path.read_text()) if settings_path.exists() else {}
+        # Indexes built before min_vectors was raised are not reused
+        if (
+            saved.pop("vectors", 0) >= self.index_params["min_vectors"]
+            and saved == settings
+        ):
+            vector_store = load_store(
+                path, self.embeddings, index_name=ANN_INDEX_NAME, mmap=True
+            )
+        else:
+            if self.vector_store is None or self._ann_active:
+                self.load_vector_store()
+            flat = self.vector_store.index
+            if flat.ntotal < self.index_params["min_vectors"]:
+                self.logger.debug(
+                    f"{flat.ntotal} vectors, below min_vectors: keeping exact search"
+                )
+                settings_path.unlink(missing_ok=True)
+                if self._store_writable:
+                    self.load_vector_store()
+                return
+
+            start = time.perf_counter()
+            built = FAISS(
                 self.embeddings,
-                allow_dangerous_deserialization=True,
+                build_index(
+                    flat.reconstruct_n(0, flat.ntotal),
+                    self.index_type,
+                    self.index_params,
+                    metric=flat.metric_type,
+                ),
+                self.vector_store.docstore,
+                self.vector_store.index_to_docstore_id,
+            )
+            save_store(built, path, index_name=ANN_INDEX_NAME, include_docstore=False)
+            settings_path.write_text(
+                json.dumps({**settings, "vectors": flat.ntotal}, sort_keys=True)
+            )
+            self.logger.info(
+                f"Built {self.index_type} index over {flat.ntotal} vectors in "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+            # Serve it memory-mapped, with the saved docstore and its lexical index
+            vector_store = load_store(
+                path, self.embeddings, index_name=ANN_INDEX_NAME, mmap=True
             )
-            self.logger.debug(f"Vector store loaded from {self.vector_store_path}")
-            return True
-        return False
+
+        set_search_params(
+            vector_store.index,
+            nprobe=self.index_params["nprobe"],
+            ef_search=self.index_params["ef_search"],
+        )
+        self.vector_store = vector_store
+        self._ann_active = True
+        self._store_writable = False
+
+    def index_fingerprint(self) -> Optional[str]:
+        """
+        Return a hash of the indexed sources and settings, from the manifest.
+
+        Returns:
+            Hex digest that changes whenever the index content changes, or None
+            if there is no manifest
+        """
+        manifest = self.load_manifest()
+        if manifest is None:
+            return None
+        content = {
+            "settings": manifest.get("settings"),
+            "files": {key: entry["sha256"] for key, entry in manifest["files"].items()},
+        }
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def source_centroids(self) -> np.ndarray:
+        """
+        Return the mean chunk vector of every source document in the index.
+
+        Uses the shared index or the loaded vector store, or reads the vector
+        store from disk temporarily so a lazily loaded agent stays unloaded.
+
+        Returns:
+            Array of shape (number of sources, embedding dimension)
+        """
+        if self.shared_index is not None:
+            self.shared_index.ensure_loaded()
+            if self.domain not in self.shared_index.domains:
+                self.ensure_initialized()
+            vectors, docs = self.shared_index.domain_chunks(self.domain)
+        else:
+            # Approximate indexes may not reconstruct (exact) vectors
+            vector_store = None if self._ann_active else self.vector_store
+            vector_store = vector_store or self._read_vector_store()
+            if vector_store is None:
+                self.ensure_initialized()
+                vector_store = self._read_vector_store()
+
+            vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+            docs = [
+                vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+                for i in range(vector_store.index.ntotal)
+            ]
+
+        sources: dict[str, list[int]] = {}
+        for position, doc in enumerate(docs):
+            sources.setdefault(doc.metadata.get("source", ""), []).append(position)
+
+        return np.vstack(
+            [vectors[positions].mean(axis=0) for positions in sources.values()]
+        )
+
+    def _source_key(self, path: Path) -> str:
+        """Return the manifest key of a source file, e.g. 'hr_docs/benefits.md'."""
+        return Path(path).relative_to(Path(self.docs_path).parent).as_posix()
+
+    def _index_settings(self) -> dict:
+        """Return the settings that invalidate the whole index when changed."""
+        return {
+            "embedding_model": self.embedding_model,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+
+    @staticmethod
+    def _file_hash(path: Path) -> str:
+        """Return the SHA-256 hex digest of a file's contents."""
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+    def _file_entry(self, path: Path) -> dict:
+        """Return a manifest entry for a source file, without chunk IDs yet."""
+        stat = Path(path).stat()
+        return {
+            "sha256": self._file_hash(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "ids": [],
+        }
+
+    def _chunk_pairs(
+        self, paths: list[Path], entries: dict
+    ) -> Iterator[tuple[Document, str]]:
+        """
+        Stream chunks of the given files with stable per-file chunk IDs.
+
+        Args:
+            paths: Source files to load
+            entries: Manifest entries keyed by source; their 'ids' are filled in
+
+        Yields:
+            Tuples of (chunk, chunk ID)
+        """
+        for path, file_chunks in self.iter_chunks(paths):
+            key = self._source_key(path)
+            file_ids = [f"{key}#{i}" for i in range(len(file_chunks))]
+            entries[key]["ids"] = file_ids
+            yield from zip(file_chunks, file_ids)
+
+    def load_manifest(self) -> Optional[dict]:
+        """
+        Load the source manifest stored next to the vector store.
+
+        Returns:
+            Manifest dictionary, or None if missing or unreadable
+        """
+        manifest_path = Path(self.vector_store_path) / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return None
+        try:
+            return json.loads(manifest_path.read_text())
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return None
+
+    def save_manifest(self, files: dict):
+        """
+        Save the source manifest next to the vector store.
+
+        Args:
+            files: Manifest entries keyed by source
+        """
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "settings": self._index_settings(),
+            "files": files,
+        }
+        manifest_path = Path(self.vector_store_path) / MANIFEST_FILENAME
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    def rebuild_vector_store(self) -> dict:
+        """
+        Build the vector store and manifest from scratch and save both.
+
+        Returns:
+            Summary dictionary of the build
+        """
+        with self._store_lock:
+            self.logger.info("Creating new vector store...")
+            paths = sorted(Path(self.docs_path).glob("**/*.md"))
+            self.logger.debug(f"Loading {len(paths)} documents")
+
+            entries = {self._source_key(path): self._file_entry(path) for path in paths}
+            build_settings = {
+                **self._index_settings(),
+                "sources": {key: entry["sha256"] for key, entry in entries.items()},
+            }
+            self.vector_store = self._index_chunks(
+                self._chunk_pairs(paths, entries), build_settings=build_settings
+            )
+            self._ann_active = False
+            self._store_writable = True
+            chunk_count = sum(len(entry["ids"]) for entry in entries.values())
+            self.logger.debug(f"Split into {chunk_count} chunks")
+
+            self.save_vector_store()
+            self.save_manifest(entries)
+            self._clear_checkpoint()
+
+            return {"rebuilt": True, "files": len(entries), "chunks": chunk_count}
+
+    def sync_vector_store(self) -> dict:
+        """
+        Bring the vector store in line with the documents on disk.
+
+        Files are compared with the manifest by size and mtime, then by content
+        hash. Vectors of changed or deleted files are removed and only the chunks
+        of new or changed files are embedded and added. A missing manifest or a
+        change of embedding model or chunking settings triggers a full rebuild.
+
+        The vector store is only loaded (if not already) when it has to change.
+
+        Returns:
+            Summary dictionary with counts of added, updated, removed and unchanged files
+        """
+        with self._store_lock:
+            if self.vector_store is None and not Path(self.vector_store_path).exists():
+                return self.rebuild_vector_store()
+
+            manifest = self.load_manifest()
+            if (
+                manifest is None
+                or manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("settings") != self._index_settings()
+            ):
+                self.logger.info("Index manifest missing or outdated, rebuilding")
+                return self.rebuild_vector_store()
+
+            files = manifest["files"]
+            current = {
+                self._source_key(path): path
+                for path in sorted(Path(self.docs_path).glob("**/*.md"))
+            }
+
+            added, changed, unchanged = [], [], 0
+            touched = False
+            for key, path in current.items():
+                entry = files.get(key)
+                if entry is None:
+                    added.append(path)
+                    continue
+
+                stat = path.stat()
+                if (
+                    stat.st_size == entry["size"]
+                    and stat.st_mtime_ns == entry["mtime_ns"]
+                ):
+                    unchanged += 1
+                elif self._file_hash(path) == entry["sha256"]:
+                    # Touched but not edited: record the new mtime, keep the vectors
+                    entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+                    unchanged += 1
+                    touched = True
+                else:
+                    changed.append(path)
+
+            removed = [key for key in files if key not in current]
+
+            stale_ids = [
+                chunk_id
+                for key in removed + [self._source_key(path) for path in changed]
+                for chunk_id in files[key]["ids"]
+            ]
+            if (stale_ids or added or changed) and not self._store_writable:
+                self.load_vector_store(writable=True)
+            if stale_ids:
+                self.vector_store.delete(stale_ids)
+            for key in removed:
+                del files[key]
+
+            entries = {
+                self._source_key(path): self._file_entry(path)
+                for path in added + changed
+            }
+            if entries:
+                self._index_chunks(
+                    self._chunk_pairs(added + changed, entries),
+                    vector_store=self.vector_store,
+                )
+            files.update(entries)
+            chunks_added = sum(len(entry["ids"]) for entry in entries.values())
+
+            summary = {
+                "rebuilt": False,
+                "added": len(added),
+                "updated": len(changed),
+                "removed": len(removed),
+                "unchanged": unchanged,
+                "chunks_added": chunks_added,
+                "chunks_removed": len(stale_ids),
+            }
+
+            if stale_ids or entries:
+                self.save_vector_store()
+            if stale_ids or entries or touched or removed:
+                self.save_manifest(files)
+                self.logger.info(f"Vector store synced: {summary}")
+
+            return summary
 
     def build_agent(self) -> None:
         """
-        Build a RAG agent with a retrieval tool.
+        Build the agent for the configured mode.
+
+        In "agent" mode this is a ReAct agent with a retrieval tool; in
+        "direct" and "retrieval" modes it is a fixed retrieve-then-answer
+        runnable taking the question and returning the query result.
         """
-        if self.vector_store is None:
+        if self.vector_store is None and self.shared_index is None:
             raise ValueError("Vector store not initialized")
 
-        model = init_chat_model(self.llm_model, model_provider="openai", temperature=0)
+        self.retriever = self._build_retriever()
+        # Bound locally so an unload() during a running query can't pull it away
+        retriever = self.retriever
+
+        if self.mode == "retrieval":
+            self.agent = self._build_direct_agent(retriever, model=None)
+            return
 
-        self.retriever = self.vector_store.as_retriever(
-            search_type="similarity", search_kwargs={"k": self.retrieval_k}
+        model = create_chat_model(
+            self.llm_model,
+            temperature=0,
+            callbacks=[StageTimingCallback(self.metrics_label)],
         )
 
+        if self.mode == "direct":
+            self.agent = self._build_direct_agent(retriever, model)
+            return
+
         agent_name = self.get_agent_name()
 
-        @tool(response_format="content_and_artifact")
         def retrieve_context(query: str):
             """Retrieve information from the knowledge base to help answer questions."""
-            retrieved_docs = self.retriever.invoke(query)
-            serialized = "\n\n".join(
-                f"Source: {doc.metadata}\nContent: {doc.page_content}"
-                for doc in retrieved_docs
-            )
-            return serialized, retrieved_docs
+            return self._pack_context(retriever.invoke(query))
+
+        async def aretrieve_context(query: str):
+            """Retrieve information from the knowledge base to help answer questions."""
+            # FAISS search itself runs in a worker thread inside ainvoke
+            return self._pack_context(await retriever.ainvoke(query))
+
+        retrieve_tool = StructuredTool.from_function(
+            func=retrieve_context,
+            coroutine=aretrieve_context,
+            response_format="content_and_artifact",
+        )
 
         system_prompt = (
             f"You are a helpful {agent_name} assistant. "
             f"Use the retrieve_context tool to search the {agent_name} knowledge base "
             "when you need information to answer questions. "
-            "Always cite your sources when providing information from the knowledge base."
+            "Always cite your sources when providing information from the knowledge base, "
+            "using the bracketed source IDs shown before each excerpt."
         )
 
         self.agent = create_agent(
-            model, tools=[retrieve_context], system_prompt=system_prompt
+            model, tools=[retrieve_tool], system_prompt=system_prompt
         )
 
-    def initialize(self):
-        """Initialize the RAG agent by loading or creating vector store."""
+    def _build_retriever(self) -> RunnableLambda:
+        """
+        Build the retriever returning the top retrieval_k chunks for a query.
+
+        It searches the shared index restricted to this agent's domain when one
+        is set, otherwise the agent's own vector store. The query embedding and
+        the FAISS search are timed as separate "embedding" and "search" stages.
+
+        With search_type "hybrid", BM25 results from the lexical index are
+        merged with the vector results by reciprocal-rank fusion. Keyword
+        queries ("VPN", "W-2") whose terms the best lexical match all contains
+        are answered from the lexical index alone, with no query embedding.
+
+        Either way fetch_k candidates are fetched, then re-ranked (the
+        "rerank" stage): overlapping chunks of a file are merged into one, and
+        retrieval_k are picked by maximal marginal relevance over the vectors
+        stored in the index, so near-duplicate chunks do not fill the context.
+
+        Returns:
+            Runnable mapping a query to a list of documents
+        """
+        shared_index, domain = self.shared_index, self.domain
+        vector_store = self.vector_store
+        k = self.retrieval_k
+        fetch_k = max(self.fetch_k, k)
+        hybrid = self.search_type == "hybrid"
+
+        def search_by_vector(vector: list[float]) -> list[Document]:
+            with timed("search", self.metrics_label):
+                if shared_index is not None:
+                    return [
+                        doc
+                        for doc, _ in shared_index.search(
+                            vector, k=fetch_k, domain=domain
+                        )
+                    ]
+                return vector_store.similarity_search_by_vector(vector, k=fetch_k)
+
+        def search_lexical(query: str) -> list[tuple[Document, float, float]]:
+            with timed("lexical", self.metrics_label):
+                if shared_index is not None:
+                    return shared_index.lexical_search(query, k=fetch_k, domain=domain)
+                return lexical_search(vector_store, query, k=fetch_k)
+
+        def fast_path(query: str, hits: list) -> Optional[list[Document]]:
+            if not hits or keyword_terms(query) is None or hits[0][2] < 1.0:
+                return None
+            increment("lexical_fast_path", agent=self.metrics_label)
+            # No query vector to diversify against; overlaps are still merged
+            with timed("rerank", self.metrics_label):
+                return rerank([doc for doc, _, _ in hits], k)
+
+        def fuse(hits: list, vector_docs: list[Document]) -> list[Document]:
+            lexical_docs = [doc for doc, _, _ in hits]
+            docs = {doc.id: doc for doc in vector_docs + lexical_docs}
+            fused = reciprocal_rank_fusion(
+                [[doc.id for doc in vector_docs], [doc.id for doc in lexical_docs]]
+            )
+            return [docs[doc_id] for doc_id, _ in fused[:fetch_k]]
+
+        def diversify(vector: list[float], docs: list[Document]) -> list[Document]:
+            with timed("rerank", self.metrics_label):
+                if fetch_k <= k:
+                    return rerank(docs, k)
+                ids = [doc.id for doc in docs]
+                if shared_index is not None:
+                    vectors = shared_index.vectors(ids)
+                else:
+                    vectors = stored_vectors(vector_store, ids)
+                return rerank(docs, k, vector, vectors, self.mmr_lambda)
+
+        def retrieve(
+            vector: list[float], hits: Optional[list] = None
+        ) -> list[Document]:
+            docs = search_by_vector(vector)
+            if hits is not None:
+                docs = fuse(hits, docs)
+            return diversify(vector, docs)
+
+        def search(query: str) -> list[Document]:
+            if not hybrid:
+                return retrieve(self.embeddings.embed_query(query))
+            hits = search_lexical(query)
+            docs = fast_path(query, hits)
+            if docs is not None:
+                return docs
+            return retrieve(self.embeddings.embed_query(query), hits)
+
+        async def asearch(query: str) -> list[Document]:
+            if not hybrid:
+                vector = await self.embeddings.aembed_query(query)
+                return await asyncio.to_thread(retrieve, vector)
+            hits = await asyncio.to_thread(search_lexical, query)
+            docs = fast_path(query, hits)
+            if docs is not None:
+                return docs
+            vector = await self.embeddings.aembed_query(query)
+            return await asyncio.to_thread(retrieve, vector, hits)
+
+        return RunnableLambda(
+            search, afunc=asearch, name=f"{self.get_agent_name()} retriever"
+        )
+
+    def _build_direct_agent(self, retriever, model) -> RunnableLambda:
+        """
+        Build a runnable that always retrieves, then answers in at most one LLM call.
+
+        Args:
+            retriever: Retriever over the agent's vector store
+            model: Chat model for the grounded generation, or None to return the
+                formatted chunks as the answer
+
+        Returns:
+            Runnable mapping a question to a dict with 'answer' and 'source_documents'
+        """
         agent_name = self.get_agent_name()
 
-        self.logger.info(f"Initializing {agent_name} agent...")
+        def grounded_messages(question: str, context: str) -> list[dict]:
+            system_prompt = (
+                f"You are a helpful {agent_name} assistant. "
+                f"Answer the question using only the {agent_name} knowledge base "
+                "excerpts below. If they do not contain the answer, say so. "
+                "Always cite your sources by their bracketed source IDs.\n\n"
+                f"{context}"
+            )
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": question},
+            ]
 
-        loaded = self.load_vector_store()
+        def answer(question: str, config) -> dict:
+            context, docs = self._pack_context(
+                retriever.invoke(question, config=config)
+            )
+            if model is None:
+                content = context
+            else:
+                message = model.invoke(
+                    grounded_messages(question, context), config=config
+                )
+                content = message.content
+            return {"answer": content, "source_documents": docs}
 
-        if not loaded:
-            self.logger.info("Creating new vector store...")
-            documents = self.load_documents()
-            self.logger.debug(f"Loaded {len(documents)} documents")
+        async def aanswer(question: str, config) -> dict:
+            context, docs = self._pack_context(
+                await retriever.ainvoke(question, config=config)
+            )
+            if model is None:
+                content = context
+            else:
+                message = await model.ainvoke(
+                    grounded_messages(question, context), config=config
+                )
+                content = message.content
+            return {"answer": content, "source_documents": docs}
 
-            chunks = self.split_documents(documents)
-            self.logger.debug(f"Split into {len(chunks)} chunks")
+        return RunnableLambda(answer, afunc=aanswer, name=f"{agent_name} {self.mode}")
 
-            self.vector_store = self.create_vector_store(chunks)
-            self.save_vector_store()
+    def _pack_context(self, retrieved_docs) -> tuple[str, list[Document]]:
+        """
+        Serialize retrieved documents for a prompt within the context token budget.
+
+        Context tokens and the tokens saved over the unbudgeted serialization
+        with full metadata are counted in the "context_tokens" and
+        "context_tokens_saved" metrics.
+
+        Args:
+            retrieved_docs: Retrieved documents, most relevant first
+
+        Returns:
+            Tuple of (context text, documents included in it)
+        """
+        context, report = pack_context(
+            retrieved_docs, self.llm_model, budget=self.context_token_budget
+        )
+        increment("context_tokens", report["tokens"], agent=self.metrics_label)
+        increment(
+            "context_tokens_saved", report["tokens_saved"], agent=self.metrics_label
+        )
+        self.logger.debug(
+            f"Packed {report['packed_chunks']}/{report['chunks']} chunks into "
+            f"{report['tokens']} tokens ({report['tokens_saved']} saved)"
+        )
+        return context, retrieved_docs[: report["packed_chunks"]]
+
+    def initialize(self):
+        """Initialize the RAG agent by loading, syncing or creating its vector store."""
+        agent_name = self.get_agent_name()
+
+        self.logger.info(f"Initializing {agent_name} agent...")
 
+        start = time.perf_counter()
+        if self.shared_index is not None:
+            self.shared_index.ensure_loaded()
+        elif self.index_type == "flat":
+            self.load_vector_store()
+        # An approximate index is loaded after the sync; the flat one only if needed
+        self.startup_timings["load_index"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.sync_vector_store()
+        if self.shared_index is not None:
+            # Own store is only read when it changed; search the shared copy
+            self.shared_index.sync_domain(self.domain, self)
+            self.vector_store = None
+            self._store_writable = False
+        elif self.index_type != "flat":
+            self._load_search_index()
+        elif self._store_writable:
+            # Serve the saved store memory-mapped, not the private copy just synced
+            self.load_vector_store()
+        self.startup_timings["build_index"] = time.perf_counter() - start
+
+        start = time.perf_counter()
         self.build_agent()
+        self.startup_timings["build_agent"] = time.perf_counter() - start
+        self.last_used = time.monotonic()
+
         self.logger.info(f"{agent_name} agent ready")
 
-    def query(self, question: str) -> dict:
+    @property
+    def is_initialized(self) -> bool:
+        """Whether the vector store is loaded and the agent is built."""
+        return self.agent is not None
+
+    def ensure_initialized(self):
+        """Initialize the agent on first use; safe to call from several threads."""
+        if self.is_initialized:
+            return
+        with self._init_lock:
+            if not self.is_initialized:
+                self.initialize()
+
+    def unload(self) -> bool:
+        """
+        Release the vector store and agent to reclaim memory.
+
+        The agent is reinitialized by the next ensure_initialized() call.
+
+        An agent that is being initialized or has queries in flight is left
+        loaded; this never waits for either.
+
+        Returns:
+            True if the agent was loaded and has been unloaded
+        """
+        if not self._init_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._usage_lock:
+                if not self.is_initialized or self._active_queries:
+                    return False
+                self.agent = None
+                self.retriever = None
+                self.vector_store = None
+                self._ann_active = False
+                self._store_writable = False
+        finally:
+            self._init_lock.release()
+        self.logger.info(f"{self.get_agent_name()} agent unloaded")
+        return True
+
+    @contextmanager
+    def in_use(self):
+        """Keep the agent from being unloaded while the block runs."""
+        with self._usage_lock:
+            self._active_queries += 1
+        try:
+            yield
+        finally:
+            with self._usage_lock:
+                self._active_queries -= 1
+                self.last_used = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        """Return seconds since the agent was last queried or initialized (0 while busy)."""
+        if self._active_queries:
+            return 0.0
+        return time.monotonic() - self.last_used
+
+    def query(self, question: str, config: Optional[dict] = None) -> dict:
         """
         Query the agent with a question.
 
         Args:
             question: The question to ask
+            config: Optional runnable config (e.g. tracing callbacks)
 
         Returns:
             Dictionary with 'answer' and 'source_documents'
         """
-        if self.agent is None:
-            raise ValueError("Agent not initialized. Call initialize() first.")
+        with self.in_use():
+            agent = self.agent
+            if agent is None:
+                raise ValueError("Agent not initialized. Call initialize() first.")
+
+            self.last_used = time.monotonic()
+            if self.single_flight is not None:
+                return self.single_flight.run(
+                    question, lambda: self._invoke(agent, question, config)
+                )
+            return self._invoke(agent, question, config)
+
+    async def aquery(self, question: str, config: Optional[dict] = None) -> dict:
+        """
+        Asynchronously query the agent with a question.
+
+        Args:
+            question: The question to ask
+            config: Optional runnable config (e.g. tracing callbacks)
+
+        Returns:
+            Dictionary with 'answer' and 'source_documents'
+        """
+        with self.in_use():
+            agent = self.agent
+            if agent is None:
+                raise ValueError("Agent not initialized. Call initialize() first.")
+
+            self.last_used = time.monotonic()
+            if self.single_flight is not None:
+                return await self.single_flight.arun(
+                    question, lambda: self._ainvoke(agent, question, config)
+                )
+            return await self._ainvoke(agent, question, config)
+
+    def _invoke(self, agent, question: str, config: Optional[dict]) -> dict:
+        """Run the answering runnable on a question."""
+        if self.mode != "agent":
+            return agent.invoke(question, config=config)
+        result = agent.invoke(
+            {"messages": [{"role": "user", "content": question}]}, config=config
+        )
+        return self._parse_result(result)
 
-        result = self.agent.invoke(
-            {"messages": [{"role": "user", "content": question}]}
+    async def _ainvoke(self, agent, question: str, config: Optional[dict]) -> dict:
+        """Asynchronously run the answering runnable on a question."""
+        if self.mode != "agent":
+            return await agent.ainvoke(question, config=config)
+        result = await agent.ainvoke(
+            {"messages": [{"role": "user", "content": question}]}, config=config
         )
+        return self._parse_result(result)
 
+    @staticmethod
+    def _parse_result(result: dict) -> dict:
+        """Extract the final answer and retrieved source documents from agent output."""
         final_message = result["messages"][-1]
 
         source_documents = []
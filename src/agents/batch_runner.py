@@ -0,0 +1,204 @@
+"""Offline batch runner pushing many queries through the orchestrator."""
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from agents.orchestrator import Orchestrator
+
+
+def load_queries(path: Path) -> list[dict]:
+    """
+    Load batch queries from a JSON or JSONL file.
+
+    JSONL files hold one query per line, either a string or an object with a
+    'query' field. JSON files hold a list of the same, or an object with a
+    'test_queries' list (the test_queries.json format). Queries without an
+    'id' are numbered by position, so a rerun over the same file resumes.
+
+    Args:
+        path: Input file
+
+    Returns:
+        Query dictionaries, each with 'id' and 'query' plus any extra fields
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = json.load(f)
+            if isinstance(items, dict):
+                items = items["test_queries"]
+
+    queries = []
+    for i, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"query": item}
+        queries.append({**item, "id": str(item.get("id", i))})
+    return queries
+
+
+class BatchRunner:
+    """
+    Runs queries through the orchestrator concurrently and records results as JSONL.
+
+    Each finished query is appended to the output file immediately, so an
+    interrupted run can be resumed: queries already answered successfully are
+    skipped and failed ones are retried.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, concurrency: int = 4):
+        """
+        Initialize the batch runner.
+
+        Args:
+            orchestrator: Initialized orchestrator to run the queries through
+            concurrency: Maximum number of queries in flight
+        """
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.logger = logging.getLogger("agents.orchestrator")
+
+    def run(self, queries: list[dict], output_path: Path) -> dict:
+        """
+        Run queries and write one JSON result per line to output_path.
+
+        Args:
+            queries: Query dictionaries with 'id' and 'query' (see load_queries)
+            output_path: JSONL results file, resumed if it already exists
+
+        Returns:
+            Summary with total, skipped, completed, failed, elapsed and throughput
+        """
+        return asyncio.run(self.arun(queries, output_path))
+
+    async def arun(self, queries: list[dict], output_path: Path) -> dict:
+        """
+        Asynchronously run queries and write one JSON result per line to output_path.
+
+        Args:
+            queries: Query dictionaries with 'id' and 'query' (see load_queries)
+            output_path: JSONL results file, resumed if it already exists
+
+        Returns:
+            Summary with total, skipped, completed, failed, elapsed and throughput
+        """
+        output_path = Path(output_path)
+        done = self._resume(output_path)
+        pending = [q for q in queries if q["id"] not in done]
+        if done:
+            self.logger.info(
+                f"Resuming batch: {len(queries) - len(pending)} of {len(queries)} already done"
+            )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = {"completed": 0, "failed": 0}
+        start = time.perf_counter()
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as output:
+
+            async def run_one(query: dict):
+                async with semaphore:
+                    record = await self._run_query(query)
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+                counts["failed" if "error" in record else "completed"] += 1
+                finished = counts["completed"] + counts["failed"]
+                if finished % 10 == 0 or finished == len(pending):
+                    self.logger.info(f"Batch progress: {finished}/{len(pending)}")
+
+            await asyncio.gather(*(run_one(query) for query in pending))
+
+        elapsed = time.perf_counter() - start
+        return {
+            "total": len(queries),
+            "skipped": len(queries) - len(pending),
+            **counts,
+            "elapsed": elapsed,
+            "throughput": len(pending) / elapsed if elapsed else 0.0,
+        }
+
+    async def _run_query(self, query: dict) -> dict:
+        """Run one query and build its result record."""
+        start = time.perf_counter()
+        record = {**query}
+        try:
+            response = await self.orchestrator.aquery(query["query"])
+        except Exception as e:
+            self.logger.exception(f"Batch query {query['id']} failed: {e}")
+            record["error"] = str(e)
+        else:
+            calls = response["specialist_calls"]
+            record.update(
+                {
+                    "answer": response["answer"],
+                    "routed_by": response["routed_by"],
+                    "cached": response["cached"],
+                    "agents": [call["agent"] for call in calls],
+                    "sources": sorted(
+                        {source for call in calls for source in call["sources"]}
+                    ),
+                    "specialist_calls": calls,
+                }
+            )
+        record["elapsed"] = time.perf_counter() - start
+        return record
+
+    def _resume(self, output_path: Path) -> set[str]:
+        """
+        Read the IDs answered successfully in a previous run.
+
+        The output file is rewritten with just those records, dropping failed
+        results (to be retried) and any line truncated by an interruption.
+
+        Args:
+            output_path: JSONL results file
+
+        Returns:
+            IDs of the queries that don't need to run again
+        """
+        if not output_path.exists():
+            return set()
+
+        records = []
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" not in record:
+                    records.append(record)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        return {record["id"] for record in records}
+
+
+def run_batch(
+    orchestrator: Orchestrator,
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = 4,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    Run every query in a JSON/JSONL file and write results to a JSONL file.
+
+    Args:
+        orchestrator: Initialized orchestrator
+        input_path: Queries file (see load_queries)
+        output_path: JSONL results file, resumed if it already exists
+        concurrency: Maximum number of queries in flight
+        limit: Only run the first N queries
+
+    Returns:
+        Run summary (see BatchRunner.run)
+    """
+    queries = load_queries(input_path)[:limit]
+    return BatchRunner(orchestrator, concurrency=concurrency).run(queries, output_path)
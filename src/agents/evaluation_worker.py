@@ -0,0 +1,248 @@
+"""Long-lived background worker that batches response evaluations."""
+
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Optional
+
+from agents.evaluator import ResponseEvaluator
+from utils.metrics import timed
+
+OVERFLOW_POLICIES = ("drop", "block")
+
+# Queue marker telling the worker thread to stop
+_STOP = object()
+
+
+class EvaluationWorker:
+    """
+    Evaluates sampled responses on one background thread with a bounded queue.
+
+    Queued responses are judged in batches with a single judge call, and their
+    scores are sent to Langfuse and flushed together. The evaluator (judge
+    client and Langfuse client) is created once and reused.
+    """
+
+    def __init__(
+        self,
+        judge_model: str = "gpt-4o-mini",
+        sample_rate: float = 1.0,
+        max_queue_size: int = 100,
+        overflow: str = "drop",
+        block_timeout: float = 5.0,
+        batch_size: int = 8,
+        batch_wait: float = 2.0,
+    ):
+        """
+        Initialize and start the evaluation worker.
+
+        Args:
+            judge_model: OpenAI model to use as judge
+            sample_rate: Fraction of responses that are evaluated (0.0-1.0)
+            max_queue_size: Maximum number of responses waiting for evaluation
+            overflow: "drop" to discard new responses when the queue is full, or
+                "block" to make the caller wait up to block_timeout for space
+            block_timeout: Seconds a caller waits for queue space in "block" mode
+            batch_size: Maximum number of responses judged in one call
+            batch_wait: Seconds to wait for more responses to fill a batch
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}"
+            )
+
+        self.judge_model = judge_model
+        self.sample_rate = sample_rate
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.logger = logging.getLogger("agents.evaluator")
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._evaluator: Optional[ResponseEvaluator] = None
+        self._closed = False
+        # Held from the closed check until a response is queued, so close()
+        # cannot queue the stop marker ahead of it
+        self._enqueue_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="evaluation-worker", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self, trace_id: str, question: str, answer: str, block: Optional[bool] = None
+    ) -> bool:
+        """
+        Queue a response for evaluation, subject to sampling and the overflow policy.
+
+        Args:
+            trace_id: Langfuse trace ID to attach the score to
+            question: User's question
+            answer: System's answer
+            block: Override the overflow policy's blocking (async callers pass
+                False so the event loop is never blocked)
+
+        Returns:
+            True if the response was queued
+        """
+        if block is None:
+            block = self.overflow == "block"
+        with self._enqueue_lock:
+            if self._closed:
+                with self._lock:
+                    self.dropped += 1
+                return False
+            if random.random() >= self.sample_rate:
+                with self._lock:
+                    self.skipped += 1
+                return False
+            try:
+                self._queue.put(
+                    (trace_id, question, answer),
+                    block=block,
+                    timeout=self.block_timeout if block else None,
+                )
+                queued = True
+            except queue.Full:
+                queued = False
+            with self._lock:
+                if queued:
+                    self.submitted += 1
+                else:
+                    self.dropped += 1
+
+        if not queued:
+            self.logger.warning("Evaluation queue full, dropping response evaluation")
+        return queued
+
+    def close(self, drain: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting responses and shut the worker down.
+
+        Waits for a submit() blocked on a full queue to finish first.
+
+        Args:
+            drain: Evaluate everything still queued before stopping; otherwise
+                queued responses are discarded
+            timeout: Maximum seconds to wait for the stop marker to be queued
+                and the worker to finish
+
+        Returns:
+            True if the worker finished within the timeout
+        """
+        with self._enqueue_lock:
+            if self._closed:
+                return not self._thread.is_alive()
+            self._closed = True
+
+        if not drain:
+            discarded = self._discard_queued()
+            if discarded:
+                self.logger.info(f"Discarded {discarded} queued evaluations")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            # May wait for room in a full queue; the worker keeps consuming until the marker
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self.logger.warning(
+                "Evaluation queue stayed full, could not stop the worker"
+            )
+            return False
+        self._thread.join(
+            None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        )
+        finished = not self._thread.is_alive()
+        if not finished:
+            self.logger.warning("Evaluation worker did not finish draining in time")
+        return finished
+
+    def stats(self) -> dict:
+        """
+        Return evaluation counters.
+
+        Returns:
+            Dictionary with submitted, skipped, dropped, evaluated, failed and queued counts
+        """
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "skipped": self.skipped,
+                "dropped": self.dropped,
+                "evaluated": self.evaluated,
+                "failed": self.failed,
+                "queued": self._queue.qsize(),
+            }
+
+    def _run(self):
+        """Collect batches from the queue and evaluate them until stopped."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0.0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._evaluate_batch(batch)
+
+    def _evaluate_batch(self, batch: list[tuple[str, str, str]]):
+        """Judge a batch of responses and save their scores to Langfuse."""
+        try:
+            if self._evaluator is None:
+                self._evaluator = ResponseEvaluator(self.judge_model)
+            with timed("evaluation", "evaluator"):
+                evaluations = self._evaluator.evaluate_batch(
+                    [(question, answer) for _, question, answer in batch]
+                )
+                self._evaluator.save_scores_to_langfuse(
+                    [
+                        (trace_id, evaluation["score"], evaluation["reasoning"])
+                        for (trace_id, _, _), evaluation in zip(batch, evaluations)
+                    ]
+                )
+            with self._lock:
+                self.evaluated += len(batch)
+            self.logger.info(
+                f"Evaluated {len(batch)} responses: "
+                f"scores={[evaluation['score'] for evaluation in evaluations]}"
+            )
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            self.logger.exception(f"Evaluation of {len(batch)} responses failed: {e}")
+
+    def _discard_queued(self) -> int:
+        """Remove every queued response without evaluating it."""
+        discarded = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            discarded += 1
+        with self._lock:
+            self.dropped += discarded
+        return discarded
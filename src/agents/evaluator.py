@@ -4,13 +4,29 @@ import json
 import logging
 
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 from langfuse import get_client
 
+from utils.metrics import StageTimingCallback
+from utils.models import create_chat_model
+
 load_dotenv()
 
 NEUTRAL_ERROR_SCORE = 5
 
+EVALUATION_CRITERIA = (
+    "Accuracy (is the information correct and factual?), "
+    "Relevance (does it directly address the question?), "
+    "Completeness (does it fully answer the question?), "
+    "and Clarity (is it easy to understand and well-structured?). "
+)
+
+SCOPE_GUIDANCE = (
+    "IMPORTANT: If the answer correctly declines to answer because the question is outside the system's scope "
+    "(not related to HR, Finance, or Tech support), this should be scored HIGH (8-10) because the system is "
+    "working correctly by refusing out-of-scope questions. Only score low if the answer is wrong, unclear, or "
+    "incorrectly refuses to answer an in-scope question. "
+)
+
 
 class ResponseEvaluator:
     """Evaluates RAG response quality using GPT-4o-mini as judge."""
@@ -26,11 +42,11 @@ class ResponseEvaluator:
         self.logger = logging.getLogger("agents.evaluator")
         self.langfuse = get_client()
 
-        self.llm = init_chat_model(
+        self.llm = create_chat_model(
             self.judge_model,
-            model_provider="openai",
             temperature=0,
             model_kwargs={"response_format": {"type": "json_object"}},
+            callbacks=[StageTimingCallback("evaluator")],
         )
 
         self.logger.info(f"Response evaluator initialized with {judge_model}")
@@ -49,20 +65,40 @@ class ResponseEvaluator:
         return (
             "You are evaluating a RAG (Retrieval-Augmented Generation) system's response quality. "
             "Your task is to rate the answer on a scale of 1-10 based on these criteria: "
-            "Accuracy (is the information correct and factual?), "
-            "Relevance (does it directly address the question?), "
-            "Completeness (does it fully answer the question?), "
-            "and Clarity (is it easy to understand and well-structured?). "
+            f"{EVALUATION_CRITERIA}"
             f"Question: {question} "
             f"Answer: {answer} "
-            "IMPORTANT: If the answer correctly declines to answer because the question is outside the system's scope "
-            "(not related to HR, Finance, or Tech support), this should be scored HIGH (8-10) because the system is "
-            "working correctly by refusing out-of-scope questions. Only score low if the answer is wrong, unclear, or "
-            "incorrectly refuses to answer an in-scope question. "
+            f"{SCOPE_GUIDANCE}"
             "Provide your evaluation in JSON format with 'score' (number from 1-10) and 'reasoning' (brief explanation) fields. "
             "Be strict but fair. A score of 10 should be reserved for exceptional answers."
         )
 
+    def _create_batch_evaluation_prompt(self, items: list[tuple[str, str]]) -> str:
+        """
+        Create a prompt asking the judge LLM to rate several responses at once.
+
+        Args:
+            items: (question, answer) pairs
+
+        Returns:
+            Formatted batch evaluation prompt
+        """
+        responses = " ".join(
+            f"[{i}] Question: {question} Answer: {answer}"
+            for i, (question, answer) in enumerate(items)
+        )
+        return (
+            "You are evaluating a RAG (Retrieval-Augmented Generation) system's response quality. "
+            "Your task is to rate each numbered answer independently on a scale of 1-10 based on these criteria: "
+            f"{EVALUATION_CRITERIA}"
+            f"{responses} "
+            f"{SCOPE_GUIDANCE}"
+            "Provide your evaluation in JSON format with an 'evaluations' field: a list with one object per "
+            "numbered answer, each with 'id' (the answer's number), 'score' (number from 1-10) and "
+            "'reasoning' (brief explanation) fields. "
+            "Be strict but fair. A score of 10 should be reserved for exceptional answers."
+        )
+
     def evaluate(self, question: str, answer: str) -> dict:
         """
         Evaluate a RAG response and return score with reasoning.
@@ -76,24 +112,87 @@ class ResponseEvaluator:
         """
         try:
             prompt = self._create_evaluation_prompt(question, answer)
-
             response = self.llm.invoke(prompt)
-            content = response.content.strip()
+            return self._parse_evaluation(response.content)
 
-            result = json.loads(content)
+        except Exception as e:
+            return self._error_result(e)
 
-            self.logger.debug(
-                f"Evaluation: score={result['score']}, reasoning={result['reasoning']}"
-            )
+    async def aevaluate(self, question: str, answer: str) -> dict:
+        """
+        Asynchronously evaluate a RAG response and return score with reasoning.
+
+        Args:
+            question: Original user question
+            answer: RAG system's answer
 
-            return result
+        Returns:
+            Dictionary with 'score' (1-10) and 'reasoning'
+        """
+        try:
+            prompt = self._create_evaluation_prompt(question, answer)
+            response = await self.llm.ainvoke(prompt)
+            return self._parse_evaluation(response.content)
 
         except Exception as e:
-            self.logger.error(f"Evaluation failed: {e}")
-            return {
-                "score": NEUTRAL_ERROR_SCORE,
-                "reasoning": f"Evaluation error: {str(e)}",
-            }
+            return self._error_result(e)
+
+    def evaluate_batch(self, items: list[tuple[str, str]]) -> list[dict]:
+        """
+        Evaluate several RAG responses with a single judge call.
+
+        Args:
+            items: (question, answer) pairs
+
+        Returns:
+            One dictionary with 'score' (1-10) and 'reasoning' per item, in order
+        """
+        if len(items) == 1:
+            return [self.evaluate(*items[0])]
+
+        try:
+            prompt = self._create_batch_evaluation_prompt(items)
+            response = self.llm.invoke(prompt)
+            return self._parse_batch_evaluation(response.content, len(items))
+
+        except Exception as e:
+            return [self._error_result(e) for _ in items]
+
+    def _parse_batch_evaluation(self, content: str, expected: int) -> list[dict]:
+        """Parse the judge's batch JSON response into per-item results."""
+        evaluations = json.loads(content.strip())["evaluations"]
+        by_id = {int(evaluation["id"]): evaluation for evaluation in evaluations}
+        if set(by_id) != set(range(expected)):
+            raise ValueError(
+                f"Judge returned {len(by_id)} evaluations for {expected} answers"
+            )
+
+        self.logger.debug(
+            f"Batch evaluation: scores={[by_id[i]['score'] for i in range(expected)]}"
+        )
+
+        return [
+            {"score": by_id[i]["score"], "reasoning": by_id[i]["reasoning"]}
+            for i in range(expected)
+        ]
+
+    def _parse_evaluation(self, content: str) -> dict:
+        """Parse the judge's JSON response into a result dictionary."""
+        result = json.loads(content.strip())
+
+        self.logger.debug(
+            f"Evaluation: score={result['score']}, reasoning={result['reasoning']}"
+        )
+
+        return result
+
+    def _error_result(self, error: Exception) -> dict:
+        """Build a neutral result for a failed evaluation."""
+        self.logger.error(f"Evaluation failed: {error}")
+        return {
+            "score": NEUTRAL_ERROR_SCORE,
+            "reasoning": f"Evaluation error: {str(error)}",
+        }
 
     def save_to_langfuse(self, trace_id: str, score: int, reasoning: str):
         """
@@ -118,3 +217,18 @@ class ResponseEvaluator:
 
         except Exception as e:
             self.logger.error(f"Failed to save score to Langfuse: {e}")
+
+    def save_scores_to_langfuse(self, scores: list[tuple[str, int, str]]):
+        """
+        Save several evaluation scores to Langfuse and flush them in one go.
+
+        Args:
+            scores: (trace_id, score, reasoning) tuples
+        """
+        for trace_id, score, reasoning in scores:
+            self.save_to_langfuse(trace_id, score, reasoning)
+
+        try:
+            self.langfuse.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to flush scores to Langfuse: {e}")
@@ -12,8 +12,13 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 class HRAgent(BaseRAGAgent):
     """HR-specific RAG agent for handling HR-related queries."""
 
-    def __init__(self):
-        """Initialize the HR agent with HR-specific paths."""
+    def __init__(self, mode: str = "agent"):
+        """
+        Initialize the HR agent with HR-specific paths.
+
+        Args:
+            mode: Answering mode ("agent", "direct" or "retrieval")
+        """
         docs_path = PROJECT_ROOT / "data" / "hr_docs"
         vector_store_path = PROJECT_ROOT / "vector_stores" / "hr_faiss"
 
@@ -25,6 +30,7 @@ class HRAgent(BaseRAGAgent):
             chunk_size=1000,
             chunk_overlap=200,
             retrieval_k=4,
+            mode=mode,
         )
 
     def get_agent_name(self) -> str:
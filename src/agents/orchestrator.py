@@ -1,70 +1,238 @@
+import asyncio
 import logging
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
 from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional
 
 from dotenv import load_dotenv
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
 from langchain.tools import tool
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langfuse.langchain import CallbackHandler
 
-from agents.evaluator import ResponseEvaluator
+from agents.evaluation_worker import EvaluationWorker
 from agents.finance_agent import FinanceAgent
 from agents.hr_agent import HRAgent
+from agents.router import DomainRouter
 from agents.tech_agent import TechAgent
+from utils.metrics import StageTimingCallback, increment, observe
+from utils.models import create_chat_model
+from utils.semantic_cache import SemanticCache
+from utils.shared_index import SharedIndex
+from utils.single_flight import SingleFlight
 
 load_dotenv()
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+SPECIALIST_AGENTS = {"hr": HRAgent, "finance": FinanceAgent, "tech": TechAgent}
+
+# Orchestrator tool name -> specialist it calls
+SPECIALIST_TOOLS = {
+    "handle_hr_query": "hr",
+    "handle_finance_query": "finance",
+    "handle_tech_query": "tech",
+}
+
 
 class Orchestrator:
     """Supervisor agent that coordinates HR, Finance, and Tech specialist agents."""
 
-    def __init__(self, llm_model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        llm_model: str = "gpt-4o-mini",
+        max_parallel_specialists: int = 3,
+        specialist_timeout: float = 60.0,
+        semantic_cache: Optional[SemanticCache] = None,
+        lazy: bool = False,
+        warmup: Optional[list[str]] = None,
+        idle_unload_seconds: Optional[float] = None,
+        router: Optional[DomainRouter] = None,
+        specialist_modes: Optional[dict[str, str]] = None,
+        evaluation_worker: Optional[EvaluationWorker] = None,
+        specialists: Optional[dict[str, Callable]] = None,
+        shared_index: Optional[SharedIndex] = None,
+        index_type: str = "flat",
+        index_params: Optional[dict] = None,
+        search_type: str = "vector",
+        coalesce_queries: bool = True,
+    ):
         """
         Initialize the orchestrator with specialist agents.
 
         Args:
             llm_model: OpenAI LLM model name for the orchestrator
+            max_parallel_specialists: Maximum number of specialist calls run concurrently
+            specialist_timeout: Seconds to wait for a specialist before giving up on
+                it, counted from when the call starts running (a call also gives
+                up after waiting this long for a free worker)
+            semantic_cache: Optional cache answering near-duplicate questions
+            lazy: Load each specialist's vector store and agent on its first query
+            warmup: Specialists initialized at startup in lazy mode
+            idle_unload_seconds: Unload specialists idle for longer than this after
+                each query (they are reloaded on demand)
+            router: Optional fast-path router sending confident single-domain
+                questions straight to one specialist (fitted on the specialists'
+                indexes if it has no domains yet)
+            specialist_modes: Answering mode per specialist ("agent", "direct" or
+                "retrieval"; see BaseRAGAgent), defaulting to "agent"
+            evaluation_worker: Background worker judging response quality
+                (defaults to one evaluating every response)
+            specialists: Mapping of domain name to agent class or factory taking
+                a 'mode' keyword (defaults to SPECIALIST_AGENTS)
+            shared_index: Optional single index holding every domain's chunks,
+                searched by the specialists with a domain filter instead of
+                loading one index per domain
+            index_type: Search index of every specialist ("flat" for exact
+                search, or an approximate index type; see BaseRAGAgent)
+            index_params: Approximate index parameter overrides (see
+                DEFAULT_INDEX_PARAMS in utils.ann_index)
+            search_type: Retrieval of every specialist, "vector" or "hybrid"
+                (vector and BM25 keyword search fused; see BaseRAGAgent)
+            coalesce_queries: Share one run among concurrent identical questions
+                (after whitespace and case normalization), in the orchestrator
+                and in every specialist; only the shared run is evaluated
         """
         self.llm_model = llm_model
+        self.max_parallel_specialists = max_parallel_specialists
+        self.specialist_timeout = specialist_timeout
+        self.lazy = lazy
+        self.warmup = set(warmup or [])
+        self.idle_unload_seconds = idle_unload_seconds
+        self.specialist_modes = specialist_modes or {}
+        self.shared_index = shared_index
+        self.index_type = index_type
+        self.index_params = index_params
+        self.search_type = search_type
+        self.coalesce_queries = coalesce_queries
+        # Concurrent identical questions wait for one run instead of starting their own
+        self.single_flight = SingleFlight("orchestrator") if coalesce_queries else None
+        specialists = specialists or SPECIALIST_AGENTS
         self.orchestrator = None
         self.logger = logging.getLogger("agents.orchestrator")
-        self.executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="eval")
+        self.evaluation_worker = evaluation_worker or EvaluationWorker()
+        # Context-propagating pool so specialist runs stay nested in the Langfuse trace
+        self.specialist_executor = ContextThreadPoolExecutor(
+            max_workers=max_parallel_specialists, thread_name_prefix="specialist"
+        )
 
         self.logger.info("Initializing specialist agents...")
 
-        self.agents = {"hr": HRAgent(), "finance": FinanceAgent(), "tech": TechAgent()}
+        self.agents = {}
+        self.unavailable_agents: dict[str, str] = {}
+        self.startup_report: dict[str, dict] = {}
 
-        for name, agent in self.agents.items():
-            agent.initialize()
-            self.logger.info(f"{name.upper()} agent initialized")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=len(specialists), thread_name_prefix="init"
+        ) as init_executor:
+            futures = {
+                name: init_executor.submit(self._initialize_agent, name, cls)
+                for name, cls in specialists.items()
+            }
+            for name, future in futures.items():
+                self.startup_report[name] = future.result()
 
-        self.logger.info("All specialist agents initialized")
+        if self.lazy:
+            self.logger.info(
+                "Lazy mode: specialists not in the warm-up list load on first use"
+            )
+        if not self.agents:
+            raise RuntimeError("No specialist agents could be initialized")
 
-    def build_orchestrator(self):
-        """Build the orchestrator agent with wrapped specialist tools."""
+        if self.unavailable_agents:
+            self.logger.warning(
+                "Running in degraded mode without: "
+                + ", ".join(name.upper() for name in self.unavailable_agents)
+            )
+        else:
+            self.logger.info("All specialist agents initialized")
+        self.logger.info(f"Specialist startup took {time.perf_counter() - start:.2f}s")
 
-        def safe_query(agent_name: str, request: str) -> str:
-            """
-            Safely query a specialist agent with error handling.
+        self.semantic_cache = semantic_cache
+        if self.semantic_cache is not None:
+            self.semantic_cache.watch_corpora(
+                {name: agent.docs_path for name, agent in self.agents.items()}
+            )
 
-            Args:
-                agent_name: Name of the agent to query ("hr", "finance", "tech")
-                request: The query to send to the agent
+        self.router = router
+        if self.router is not None and not self.router.domains:
+            self.router.fit_from_agents(self.agents)
 
-            Returns:
-                The agent's answer or an error message
-            """
-            try:
-                result = self.agents[agent_name].query(request)
-                return result.get("answer", "No answer returned from agent.")
-            except Exception as e:
-                self.logger.exception(f"{agent_name.upper()} agent query failed: {e}")
-                return f"I encountered an error accessing the {agent_name.upper()} system. Please try again or contact support if the issue persists."
+    def _initialize_agent(self, name: str, agent_cls: Callable) -> dict:
+        """
+        Create and initialize one specialist agent, recording startup timing.
 
-        @tool
+        In lazy mode only agents in the warm-up list are initialized here; the
+        rest load on their first query. A failure is logged and recorded so the
+        remaining domains can still come up; queries routed to the failed domain
+        get an unavailable message.
+
+        Args:
+            name: Domain name ("hr", "finance", "tech")
+            agent_cls: Specialist agent class or factory
+
+        Returns:
+            Startup report with 'status', per-phase timings and 'total'
+        """
+        start = time.perf_counter()
+        agent = None
+        try:
+            agent = agent_cls(mode=self.specialist_modes.get(name, "agent"))
+            if self.shared_index is not None:
+                agent.use_shared_index(self.shared_index, name)
+            elif self.index_type != "flat":
+                agent.use_ann_index(self.index_type, self.index_params)
+            agent.use_search_type(self.search_type)
+            agent.use_query_coalescing(self.coalesce_queries)
+            if self.lazy and name not in self.warmup:
+                status = "lazy"
+            else:
+                agent.initialize()
+                status = "ok"
+        except Exception as e:
+            self.logger.exception(f"{name.upper()} agent failed to initialize: {e}")
+            self.unavailable_agents[name] = str(e)
+            status = "failed"
+        else:
+            self.agents[name] = agent
+
+        report = {
+            "status": status,
+            **(agent.startup_timings if agent is not None else {}),
+            "total": time.perf_counter() - start,
+        }
+        phases = ", ".join(
+            f"{phase}={seconds:.2f}s"
+            for phase, seconds in report.items()
+            if phase not in ("status", "total")
+        )
+        self.logger.info(
+            f"{name.upper()} agent startup {status} in {report['total']:.2f}s ({phases})"
+        )
+        return report
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Shut down background work, waiting for queued evaluations to finish.
+
+        Args:
+            timeout: Maximum seconds to wait for pending evaluations
+        """
+        self.evaluation_worker.close(drain=True, timeout=timeout)
+        self.specialist_executor.shutdown(wait=False)
+        self.logger.info(f"Evaluation stats: {self.evaluation_worker.stats()}")
+
+    def build_orchestrator(self):
+        """Build the orchestrator agent with wrapped specialist tools."""
+
+        @tool(response_format="content_and_artifact")
         def handle_hr_query(request: str) -> str:
             """Handle HR-related queries about policies, benefits, vacation, remote work, and performance reviews.
 
@@ -78,9 +246,9 @@ class Orchestrator:
 
             Input: Natural language HR question
             """
-            return safe_query("hr", request)
+            return self._safe_query("hr", request)
 
-        @tool
+        @tool(response_format="content_and_artifact")
         def handle_finance_query(request: str) -> str:
             """Handle Finance-related queries about expenses, reimbursements, purchasing, and payroll.
 
@@ -94,9 +262,9 @@ class Orchestrator:
 
             Input: Natural language finance question
             """
-            return safe_query("finance", request)
+            return self._safe_query("finance", request)
 
-        @tool
+        @tool(response_format="content_and_artifact")
         def handle_tech_query(request: str) -> str:
             """Handle Technical Support queries about IT issues, software, hardware, and access.
 
@@ -110,7 +278,7 @@ class Orchestrator:
 
             Input: Natural language technical support question
             """
-            return safe_query("tech", request)
+            return self._safe_query("tech", request)
 
         @tool
         def request_clarification(clarification_question: str) -> str:
@@ -131,6 +299,14 @@ class Orchestrator:
             """
             return clarification_question
 
+        # Native async implementations so aquery() never blocks the event loop
+        for specialist_tool, agent_name in (
+            (handle_hr_query, "hr"),
+            (handle_finance_query, "finance"),
+            (handle_tech_query, "tech"),
+        ):
+            specialist_tool.coroutine = partial(self._safe_aquery, agent_name)
+
         orchestrator_prompt = (
             "You are a helpful company assistant that coordinates specialist agents. "
             "You have access to three specialist teams:\n"
@@ -162,7 +338,11 @@ class Orchestrator:
             "by querying multiple specialists over asking for clarification."
         )
 
-        model = init_chat_model(self.llm_model, model_provider="openai", temperature=0)
+        model = create_chat_model(
+            self.llm_model,
+            temperature=0,
+            callbacks=[StageTimingCallback("orchestrator")],
+        )
 
         self.orchestrator = create_agent(
             model,
@@ -185,6 +365,49 @@ class Orchestrator:
 
         self.logger.info("System ready")
 
+    def search(self, question: str, k: int = 4) -> list[Document]:
+        """
+        Retrieve the chunks most relevant to a question across every domain.
+
+        With a shared index this is a single unfiltered search; otherwise each
+        specialist's index is searched and the results are merged by distance.
+        Every chunk's metadata carries its 'domain'. Domains that are
+        unavailable or fail to load are left out.
+
+        Args:
+            question: The question to search for
+            k: Number of chunks to return
+
+        Returns:
+            Chunks, most relevant first
+        """
+        if self.shared_index is not None:
+            return [doc for doc, _ in self.shared_index.search_text(question, k=k)]
+
+        scored = []
+        for name, agent in self.agents.items():
+            if name in self.unavailable_agents:
+                continue
+            # Held so an idle sweep cannot unload the store while it is searched
+            with agent.in_use():
+                try:
+                    agent.ensure_initialized()
+                except Exception as e:
+                    self.logger.warning(f"Skipping {name.upper()} in search: {e}")
+                    continue
+                vector_store = agent.vector_store
+                if vector_store is None:
+                    continue
+                vector = agent.embeddings.embed_query(question)
+                results = vector_store.similarity_search_with_score_by_vector(
+                    vector, k=k
+                )
+            for doc, distance in results:
+                metadata = {**doc.metadata, "domain": name}
+                scored.append((distance, Document(doc.page_content, metadata=metadata)))
+        scored.sort(key=lambda pair: pair[0])
+        return [doc for _, doc in scored[:k]]
+
     def query(self, question: str) -> dict:
         """
         Query the orchestrator with a question.
@@ -193,47 +416,619 @@ class Orchestrator:
             question: The question to ask
 
         Returns:
-            Dictionary with 'answer' and 'messages'
+            Dictionary with 'answer', 'messages', 'specialist_calls', 'elapsed',
+            'cached' and 'routed_by' ("router", "orchestrator" or "cache")
         """
         if self.orchestrator is None:
             raise ValueError("Orchestrator not initialized. Call initialize() first.")
+        if self.single_flight is not None:
+            return self.single_flight.run(question, partial(self._query, question))
+        return self._query(question)
+
+    async def aquery(self, question: str) -> dict:
+        """
+        Asynchronously query the orchestrator with a question.
+
+        Args:
+            question: The question to ask
+
+        Returns:
+            Dictionary with 'answer', 'messages', 'specialist_calls', 'elapsed',
+            'cached' and 'routed_by' ("router", "orchestrator" or "cache")
+        """
+        if self.orchestrator is None:
+            raise ValueError("Orchestrator not initialized. Call initialize() first.")
+        if self.single_flight is not None:
+            return await self.single_flight.arun(
+                question, partial(self._aquery, question)
+            )
+        return await self._aquery(question)
+
+    def _query(self, question: str) -> dict:
+        """Answer a question from the cache, the fast path or the orchestrator agent."""
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.lookup(question)
+            if cached is not None:
+                self._record_query(cached)
+                return cached
 
         langfuse_handler = CallbackHandler()
 
-        result = self.orchestrator.invoke(
-            {"messages": [{"role": "user", "content": question}]},
-            config={"callbacks": [langfuse_handler]},
-        )
+        response = None
+        if self.router is not None:
+            response = self._fast_path(question, langfuse_handler)
+        if response is None:
+            start = time.perf_counter()
+            result = self.orchestrator.invoke(
+                {"messages": [{"role": "user", "content": question}]},
+                config=self._build_config(langfuse_handler),
+            )
+            response = self._build_response(result, time.perf_counter() - start)
 
-        final_message = result["messages"][-1]
-        answer = final_message.content
+        self._finish_query(question, response, langfuse_handler)
+        return response
+
+    async def _aquery(self, question: str) -> dict:
+        """Async counterpart of _query."""
+        if self.semantic_cache is not None:
+            cached = await self.semantic_cache.alookup(question)
+            if cached is not None:
+                self._record_query(cached)
+                return cached
+
+        langfuse_handler = CallbackHandler()
+
+        response = None
+        if self.router is not None:
+            response = await self._afast_path(question, langfuse_handler)
+        if response is None:
+            start = time.perf_counter()
+            result = await self.orchestrator.ainvoke(
+                {"messages": [{"role": "user", "content": question}]},
+                config=self._build_config(langfuse_handler),
+            )
+            response = self._build_response(result, time.perf_counter() - start)
+
+        await self._afinish_query(question, response, langfuse_handler)
+        return response
+
+    def stream(self, question: str) -> Iterator[dict]:
+        """
+        Query the orchestrator, yielding progress events and answer tokens as they happen.
+
+        Every event is a dictionary with a 'type':
+        - "route": specialists chosen, with 'agents' and 'routed_by'
+        - "specialist_start": a specialist call started, with 'agent'
+        - "specialist_end": a specialist call finished, with 'agent', 'status',
+          'elapsed' and 'sources'
+        - "token": a piece of the final answer in 'content'
+        - "done": the complete response (as returned by query()) in 'response'
+
+        Args:
+            question: The question to ask
+
+        Yields:
+            Event dictionaries, ending with a "done" event
+        """
+        if self.orchestrator is None:
+            raise ValueError("Orchestrator not initialized. Call initialize() first.")
+
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.lookup(question)
+            if cached is not None:
+                self._record_query(cached)
+                yield from self._cached_events(cached)
+                return
+
+        langfuse_handler = CallbackHandler()
+
+        response = None
+        domain = self._route(question) if self.router is not None else None
+        if domain is not None:
+            start = time.perf_counter()
+            yield {"type": "route", "agents": [domain], "routed_by": "router"}
+            yield {"type": "specialist_start", "agent": domain}
+            answer, call = self._safe_query(
+                domain, question, config={"callbacks": [langfuse_handler]}
+            )
+            yield {"type": "specialist_end", **call}
+            response = self._fast_path_response(answer, call, start)
+            if response is not None:
+                yield {"type": "token", "content": answer}
+
+        if response is None:
+            start = time.perf_counter()
+            messages = [HumanMessage(content=question)]
+            for mode, chunk in self.orchestrator.stream(
+                {"messages": messages},
+                config=self._build_config(langfuse_handler, streaming=True),
+                stream_mode=["updates", "messages"],
+            ):
+                yield from self._stream_events(mode, chunk, messages)
+            response = self._build_response(
+                {"messages": messages}, time.perf_counter() - start
+            )
+
+        self._finish_query(question, response, langfuse_handler)
+        yield {"type": "done", "response": response}
+
+    async def astream(self, question: str) -> AsyncIterator[dict]:
+        """
+        Asynchronously query the orchestrator, yielding events as they happen.
+
+        See stream() for the event types.
+
+        Args:
+            question: The question to ask
+
+        Yields:
+            Event dictionaries, ending with a "done" event
+        """
+        if self.orchestrator is None:
+            raise ValueError("Orchestrator not initialized. Call initialize() first.")
+
+        if self.semantic_cache is not None:
+            cached = await self.semantic_cache.alookup(question)
+            if cached is not None:
+                self._record_query(cached)
+                for event in self._cached_events(cached):
+                    yield event
+                return
+
+        langfuse_handler = CallbackHandler()
+
+        response = None
+        domain = await self._aroute(question) if self.router is not None else None
+        if domain is not None:
+            start = time.perf_counter()
+            yield {"type": "route", "agents": [domain], "routed_by": "router"}
+            yield {"type": "specialist_start", "agent": domain}
+            answer, call = await self._safe_aquery(
+                domain, question, config={"callbacks": [langfuse_handler]}
+            )
+            yield {"type": "specialist_end", **call}
+            response = self._fast_path_response(answer, call, start)
+            if response is not None:
+                yield {"type": "token", "content": answer}
+
+        if response is None:
+            start = time.perf_counter()
+            messages = [HumanMessage(content=question)]
+            async for mode, chunk in self.orchestrator.astream(
+                {"messages": messages},
+                config=self._build_config(langfuse_handler),
+                stream_mode=["updates", "messages"],
+            ):
+                for event in self._stream_events(mode, chunk, messages):
+                    yield event
+            response = self._build_response(
+                {"messages": messages}, time.perf_counter() - start
+            )
+
+        await self._afinish_query(question, response, langfuse_handler)
+        yield {"type": "done", "response": response}
+
+    def _finish_query(
+        self, question: str, response: dict, langfuse_handler: CallbackHandler
+    ):
+        """Record metrics, cache the response, unload idle agents and queue evaluation."""
+        self._record_query(response)
+        if self.semantic_cache is not None:
+            self.semantic_cache.store(question, response)
+        if self.idle_unload_seconds is not None:
+            self.unload_idle_agents(self.idle_unload_seconds)
 
         trace_id = langfuse_handler.last_trace_id
         if trace_id:
-            self.executor.submit(self._run_async_evaluation, trace_id, question, answer)
+            self.evaluation_worker.submit(trace_id, question, response["answer"])
         else:
             self.logger.warning("No trace_id available for evaluation")
 
+    async def _afinish_query(
+        self, question: str, response: dict, langfuse_handler: CallbackHandler
+    ):
+        """Like _finish_query, but never blocks the event loop on I/O or the queue."""
+        self._record_query(response)
+        if self.semantic_cache is not None:
+            await self.semantic_cache.astore(question, response)
+        if self.idle_unload_seconds is not None:
+            await asyncio.to_thread(self.unload_idle_agents, self.idle_unload_seconds)
+
+        trace_id = langfuse_handler.last_trace_id
+        if trace_id:
+            self.evaluation_worker.submit(
+                trace_id, question, response["answer"], block=False
+            )
+        else:
+            self.logger.warning("No trace_id available for evaluation")
+
+    @staticmethod
+    def _record_query(response: dict):
+        """Record a finished query's latency and route in the stage metrics."""
+        observe("query", response["routed_by"], response["elapsed"])
+        increment("queries", routed_by=response["routed_by"])
+
+    @staticmethod
+    def _stream_events(mode: str, chunk, messages: list) -> list[dict]:
+        """
+        Translate one orchestrator stream chunk into events.
+
+        Messages from "updates" chunks are appended to messages so the final
+        response can be built once the stream ends.
+
+        Args:
+            mode: Stream mode of the chunk ("updates" or "messages")
+            chunk: The streamed chunk
+            messages: Conversation messages collected so far
+
+        Returns:
+            Events for this chunk (possibly empty)
+        """
+        if mode == "messages":
+            message, metadata = chunk
+            is_answer = (
+                isinstance(message, AIMessage)
+                and metadata.get("langgraph_node") == "model"
+                # Nested namespaces belong to specialist agents, not the final answer
+                and "|" not in metadata.get("langgraph_checkpoint_ns", "")
+                and not message.tool_calls
+                and not getattr(message, "tool_call_chunks", None)
+            )
+            if is_answer and message.text:
+                return [{"type": "token", "content": message.text}]
+            return []
+
+        events = []
+        for update in chunk.values():
+            if not isinstance(update, dict):
+                continue
+            for message in update.get("messages", []):
+                messages.append(message)
+                if isinstance(message, AIMessage) and message.tool_calls:
+                    agents = [
+                        SPECIALIST_TOOLS[call["name"]]
+                        for call in message.tool_calls
+                        if call["name"] in SPECIALIST_TOOLS
+                    ]
+                    if agents:
+                        events.append(
+                            {
+                                "type": "route",
+                                "agents": agents,
+                                "routed_by": "orchestrator",
+                            }
+                        )
+                        events.extend(
+                            {"type": "specialist_start", "agent": agent}
+                            for agent in agents
+                        )
+                elif isinstance(message, ToolMessage) and isinstance(
+                    message.artifact, dict
+                ):
+                    if "agent" in message.artifact:
+                        events.append({"type": "specialist_end", **message.artifact})
+        return events
+
+    @staticmethod
+    def _cached_events(cached: dict) -> list[dict]:
+        """Return the stream events for a semantic cache hit."""
+        return [
+            {
+                "type": "route",
+                "agents": [call["agent"] for call in cached["specialist_calls"]],
+                "routed_by": "cache",
+            },
+            {"type": "token", "content": cached["answer"]},
+            {"type": "done", "response": cached},
+        ]
+
+    def _fast_path(
+        self, question: str, langfuse_handler: CallbackHandler
+    ) -> Optional[dict]:
+        """
+        Answer a question with a single specialist chosen by the router.
+
+        Args:
+            question: The user's question
+            langfuse_handler: Tracing handler for the specialist run
+
+        Returns:
+            Response dictionary, or None when the router abstains or the
+            specialist fails and the LLM orchestrator should handle the question
+        """
+        start = time.perf_counter()
+        domain = self._route(question)
+        if domain is None:
+            return None
+
+        answer, call = self._safe_query(
+            domain, question, config={"callbacks": [langfuse_handler]}
+        )
+        return self._fast_path_response(answer, call, start)
+
+    async def _afast_path(
+        self, question: str, langfuse_handler: CallbackHandler
+    ) -> Optional[dict]:
+        """Async counterpart of _fast_path used by aquery()."""
+        start = time.perf_counter()
+        domain = await self._aroute(question)
+        if domain is None:
+            return None
+
+        answer, call = await self._safe_aquery(
+            domain, question, config={"callbacks": [langfuse_handler]}
+        )
+        return self._fast_path_response(answer, call, start)
+
+    def _route(self, question: str) -> Optional[str]:
+        """Return the fast-path domain for a question, or None to use the orchestrator."""
+        try:
+            domain = self.router.route(question)
+        except Exception as e:
+            self.logger.warning(f"Router failed, using orchestrator: {e}")
+            return None
+        return domain if self._can_fast_path(domain) else None
+
+    async def _aroute(self, question: str) -> Optional[str]:
+        """Async counterpart of _route."""
+        try:
+            domain = await self.router.aroute(question)
+        except Exception as e:
+            self.logger.warning(f"Router failed, using orchestrator: {e}")
+            return None
+        return domain if self._can_fast_path(domain) else None
+
+    def _can_fast_path(self, domain: Optional[str]) -> bool:
+        """Whether a routed domain can answer on its own (not in retrieval mode)."""
+        return domain in self.agents and self.agents[domain].mode != "retrieval"
+
+    def _fast_path_response(
+        self, answer: str, call: dict, start: float
+    ) -> Optional[dict]:
+        """Build the response for a routed call, or None if the specialist failed."""
+        if call["status"] != "ok":
+            self.logger.warning(
+                f"Routed {call['agent'].upper()} call {call['status']}, using orchestrator"
+            )
+            return None
+        return {
+            "answer": answer,
+            "messages": [],
+            "specialist_calls": [call],
+            "elapsed": time.perf_counter() - start,
+            "cached": False,
+            "routed_by": "router",
+        }
+
+    def _build_config(
+        self, langfuse_handler: CallbackHandler, streaming: bool = False
+    ) -> dict:
+        """Build the runnable config for an orchestrator invocation."""
+        max_concurrency = self.max_parallel_specialists
+        if streaming:
+            # Sync message streaming occupies one of the graph's concurrency slots
+            max_concurrency += 1
+        return {"callbacks": [langfuse_handler], "max_concurrency": max_concurrency}
+
+    def _build_response(self, result: dict, elapsed: float) -> dict:
+        """
+        Build the query response from the orchestrator output.
+
+        Args:
+            result: Output of the orchestrator agent
+            elapsed: Wall-clock seconds spent in the orchestrator
+
+        Returns:
+            Dictionary with 'answer', 'messages', 'specialist_calls', 'elapsed',
+            'cached' and 'routed_by'
+        """
+        final_message = result["messages"][-1]
+        answer = final_message.content
+
+        specialist_calls = self._collect_specialist_calls(result["messages"])
+        if specialist_calls:
+            calls_summary = ", ".join(
+                f"{call['agent']}={call['elapsed']:.2f}s" for call in specialist_calls
+            )
+            self.logger.info(
+                f"Specialist calls: {calls_summary} (total {elapsed:.2f}s)"
+            )
+
         return {
             "answer": answer,
             "messages": result["messages"],
+            "specialist_calls": specialist_calls,
+            "elapsed": elapsed,
+            "cached": False,
+            "routed_by": "orchestrator",
         }
 
-    def _run_async_evaluation(self, trace_id: str, question: str, answer: str):
+    def _safe_query(
+        self, agent_name: str, request: str, config: Optional[dict] = None
+    ) -> tuple[str, dict]:
+        """
+        Safely query a specialist agent with error handling and a timeout.
+
+        Tool calls from a single orchestrator turn run concurrently, so each
+        specialist call is bounded by the specialist pool and timeout. Time
+        spent queued behind other calls for a worker does not count towards
+        the timeout.
+
+        Args:
+            agent_name: Name of the agent to query ("hr", "finance", "tech")
+            request: The query to send to the agent
+            config: Optional runnable config (callbacks) for the specialist run
+
+        Returns:
+            Tuple of the agent's answer (or an error message) and call timing info
+        """
+        start = time.perf_counter()
+        if agent_name not in self.agents:
+            answer = self._fallback_answer(agent_name, "unavailable")
+            return answer, self._record_call(agent_name, start, "unavailable")
+
+        sources = []
+
+        started = threading.Event()
+
+        def run() -> dict:
+            started.set()
+            return self._query_specialist(agent_name, request, config)
+
+        future = self.specialist_executor.submit(run)
+        try:
+            # A call still queued after a full timeout means the pool is stuck
+            if not started.wait(timeout=self.specialist_timeout) and future.cancel():
+                raise FutureTimeoutError()
+            result = future.result(timeout=self.specialist_timeout)
+            answer = result.get("answer", "No answer returned from agent.")
+            sources = self._source_names(result)
+            status = "ok"
+        except FutureTimeoutError:
+            answer, status = self._fallback_answer(agent_name, "timeout"), "timeout"
+        except Exception as e:
+            self.logger.exception(f"{agent_name.upper()} agent query failed: {e}")
+            answer, status = self._fallback_answer(agent_name, "error"), "error"
+
+        return answer, self._record_call(agent_name, start, status, sources)
+
+    async def _safe_aquery(
+        self, agent_name: str, request: str, config: Optional[dict] = None
+    ) -> tuple[str, dict]:
         """
-        Run evaluation in background thread.
+        Async counterpart of _safe_query used by aquery().
 
         Args:
-            trace_id: Langfuse trace ID
-            question: User's question
-            answer: System's answer
+            agent_name: Name of the agent to query ("hr", "finance", "tech")
+            request: The query to send to the agent
+            config: Optional runnable config (callbacks) for the specialist run
+
+        Returns:
+            Tuple of the agent's answer (or an error message) and call timing info
         """
+        start = time.perf_counter()
+        if agent_name not in self.agents:
+            answer = self._fallback_answer(agent_name, "unavailable")
+            return answer, self._record_call(agent_name, start, "unavailable")
+
+        sources = []
+
         try:
-            evaluator = ResponseEvaluator()
-            evaluation = evaluator.evaluate(question, answer)
-            evaluator.save_to_langfuse(
-                trace_id, evaluation["score"], evaluation["reasoning"]
+            result = await asyncio.wait_for(
+                self._aquery_specialist(agent_name, request, config),
+                timeout=self.specialist_timeout,
             )
-            self.logger.info(f"Response evaluated: score={evaluation['score']}")
+            answer = result.get("answer", "No answer returned from agent.")
+            sources = self._source_names(result)
+            status = "ok"
+        except asyncio.TimeoutError:
+            answer, status = self._fallback_answer(agent_name, "timeout"), "timeout"
         except Exception as e:
-            self.logger.exception(f"Evaluation failed for trace {trace_id}: {e}")
+            self.logger.exception(f"{agent_name.upper()} agent query failed: {e}")
+            answer, status = self._fallback_answer(agent_name, "error"), "error"
+
+        return answer, self._record_call(agent_name, start, status, sources)
+
+    def _query_specialist(
+        self, agent_name: str, request: str, config: Optional[dict] = None
+    ) -> dict:
+        """Query a specialist, loading it first if it is not initialized."""
+        agent = self.agents[agent_name]
+        # Held from before loading so an idle sweep cannot unload it in between
+        with agent.in_use():
+            agent.ensure_initialized()
+            return agent.query(request, config=config)
+
+    async def _aquery_specialist(
+        self, agent_name: str, request: str, config: Optional[dict] = None
+    ) -> dict:
+        """Asynchronously query a specialist, loading it first if needed."""
+        agent = self.agents[agent_name]
+        with agent.in_use():
+            if not agent.is_initialized:
+                await asyncio.to_thread(agent.ensure_initialized)
+            return await agent.aquery(request, config=config)
+
+    def unload_idle_agents(self, max_idle_seconds: float) -> list[str]:
+        """
+        Unload specialists that have not been queried recently to reclaim memory.
+
+        Unloaded specialists are reloaded on their next query. Specialists
+        that are loading or answering a query are skipped.
+
+        Args:
+            max_idle_seconds: Idle time after which a specialist is unloaded
+
+        Returns:
+            Names of the specialists that were unloaded
+        """
+        unloaded = [
+            name
+            for name, agent in self.agents.items()
+            if agent.idle_seconds() > max_idle_seconds and agent.unload()
+        ]
+        if unloaded:
+            self.logger.info(
+                f"Unloaded idle specialists: {', '.join(n.upper() for n in unloaded)}"
+            )
+        return unloaded
+
+    def _fallback_answer(self, agent_name: str, status: str) -> str:
+        """Return the message passed to the orchestrator when a specialist fails."""
+        if status == "timeout":
+            self.logger.warning(
+                f"{agent_name.upper()} agent timed out after {self.specialist_timeout:.1f}s"
+            )
+            return f"The {agent_name.upper()} system did not respond in time, so no answer is available from it."
+        if status == "unavailable":
+            return f"The {agent_name.upper()} system is currently unavailable, so no answer is available from it."
+        return f"I encountered an error accessing the {agent_name.upper()} system. Please try again or contact support if the issue persists."
+
+    def _record_call(
+        self,
+        agent_name: str,
+        start: float,
+        status: str,
+        sources: Optional[list[str]] = None,
+    ) -> dict:
+        """Log, record and return timing and sources of a finished specialist call."""
+        elapsed = time.perf_counter() - start
+        observe("specialist", agent_name, elapsed)
+        increment("specialist_calls", agent=agent_name, status=status)
+        self.logger.info(
+            f"{agent_name.upper()} agent call finished in {elapsed:.2f}s ({status})"
+        )
+        return {
+            "agent": agent_name,
+            "status": status,
+            "elapsed": elapsed,
+            "sources": sources or [],
+        }
+
+    @staticmethod
+    def _source_names(result: dict) -> list[str]:
+        """Return the distinct source files of a specialist's retrieved documents."""
+        sources = [
+            doc.metadata.get("source", "")
+            for doc in result.get("source_documents", [])
+            if hasattr(doc, "metadata")
+        ]
+        return list(dict.fromkeys(source for source in sources if source))
+
+    @staticmethod
+    def _collect_specialist_calls(messages) -> list[dict]:
+        """
+        Extract specialist call timing info from tool message artifacts.
+
+        Args:
+            messages: Messages returned by the orchestrator agent
+
+        Returns:
+            List of dictionaries with 'agent', 'status', 'elapsed' and 'sources'
+        """
+        return [
+            msg.artifact
+            for msg in messages
+            if isinstance(getattr(msg, "artifact", None), dict)
+            and "agent" in msg.artifact
+        ]
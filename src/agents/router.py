@@ -0,0 +1,229 @@
+"""Deterministic embedding-based pre-router for single-domain questions."""
+
+import logging
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.metrics import TimedEmbeddings
+from utils.models import create_embeddings
+from utils.query_cache import with_query_cache
+
+SINGLE_DOMAIN_CATEGORIES = ("hr", "finance", "tech")
+
+
+class DomainRouter:
+    """
+    Nearest-centroid classifier that routes obviously single-domain questions
+    straight to one specialist, skipping the orchestrator LLM turn.
+
+    Each domain is represented by one centroid per source document (the mean of
+    that document's chunk vectors) plus any labeled example questions. A question
+    is routed only when its best domain is both similar enough and clearly ahead
+    of the runner-up; otherwise the router abstains and the LLM orchestrator
+    decides.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        min_similarity: float = 0.3,
+        min_margin: float = 0.05,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            embeddings: Embedding model used for questions (must match the indexes)
+            min_similarity: Minimum cosine similarity to the best domain
+            min_margin: Minimum similarity lead of the best domain over the runner-up
+        """
+        if embeddings is None:
+            # Share query embeddings with the specialists' retrievers
+            model = "text-embedding-3-large"
+            embeddings = with_query_cache(
+                TimedEmbeddings(create_embeddings(model), agent="router"), model
+            )
+        else:
+            embeddings = TimedEmbeddings(embeddings, agent="router")
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.logger = logging.getLogger("agents.orchestrator")
+
+        self._labels: list[str] = []
+        self._centroids: Optional[np.ndarray] = None
+
+    @property
+    def domains(self) -> list[str]:
+        """Return the domains the router can route to."""
+        return sorted(set(self._labels))
+
+    def fit_from_agents(self, agents: dict) -> "DomainRouter":
+        """
+        Add per-document centroids computed from each specialist's vector store.
+
+        Args:
+            agents: Mapping of domain name to BaseRAGAgent
+
+        Returns:
+            The router, for chaining
+        """
+        for name, agent in agents.items():
+            centroids = agent.source_centroids()
+            self._add(name, centroids)
+            self.logger.debug(f"Router: {len(centroids)} centroids for {name.upper()}")
+        return self
+
+    def fit_from_examples(self, examples: list[dict]) -> "DomainRouter":
+        """
+        Add labeled example questions (test_queries.json format) as centroids.
+
+        Only examples labeled with a single domain are used.
+
+        Args:
+            examples: Dictionaries with 'query' and 'expected_category'
+
+        Returns:
+            The router, for chaining
+        """
+        labeled = [
+            (example["query"], example["expected_category"])
+            for example in examples
+            if example["expected_category"] in SINGLE_DOMAIN_CATEGORIES
+        ]
+        if labeled:
+            vectors = self.embeddings.embed_documents([query for query, _ in labeled])
+            for (_, label), vector in zip(labeled, vectors):
+                self._add(label, np.asarray([vector], dtype=np.float32))
+        return self
+
+    def scores(self, question: str) -> dict[str, float]:
+        """
+        Return the best cosine similarity of the question to each domain.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Mapping of domain name to similarity
+        """
+        return self._scores(self.embeddings.embed_query(question))
+
+    async def ascores(self, question: str) -> dict[str, float]:
+        """Asynchronously return the best cosine similarity to each domain."""
+        return self._scores(await self.embeddings.aembed_query(question))
+
+    def route(self, question: str) -> Optional[str]:
+        """
+        Return the domain to route a question to, or None when not confident.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Domain name, or None to fall back to the LLM orchestrator
+        """
+        return self._decide(self.scores(question))
+
+    async def aroute(self, question: str) -> Optional[str]:
+        """Asynchronously return the domain for a question, or None."""
+        return self._decide(await self.ascores(question))
+
+    def evaluate(self, test_queries: list[dict]) -> dict:
+        """
+        Measure routing accuracy against labeled queries.
+
+        Single-domain queries count as correct when routed to their expected
+        domain. Multi-domain, ambiguous and out-of-scope queries count as
+        correct when the router abstains.
+
+        Args:
+            test_queries: Dictionaries with 'query' and 'expected_category'
+
+        Returns:
+            Dictionary with accuracy, precision and coverage figures plus per-query results
+        """
+        results = []
+        for example in test_queries:
+            expected = example["expected_category"]
+            predicted = self.route(example["query"])
+            if expected in SINGLE_DOMAIN_CATEGORIES:
+                correct = predicted == expected
+            else:
+                correct = predicted is None
+            results.append(
+                {
+                    "query": example["query"],
+                    "expected_category": expected,
+                    "routed_to": predicted,
+                    "correct": correct,
+                }
+            )
+
+        routed = [r for r in results if r["routed_to"] is not None]
+        single_domain = [
+            r for r in results if r["expected_category"] in SINGLE_DOMAIN_CATEGORIES
+        ]
+        return {
+            "total": len(results),
+            "accuracy": _ratio(sum(r["correct"] for r in results), len(results)),
+            "routed": len(routed),
+            "precision": _ratio(
+                sum(r["routed_to"] == r["expected_category"] for r in routed),
+                len(routed),
+            ),
+            "single_domain_coverage": _ratio(
+                sum(r["routed_to"] is not None for r in single_domain),
+                len(single_domain),
+            ),
+            "results": results,
+        }
+
+    def _add(self, label: str, vectors: np.ndarray):
+        """Normalize and append centroids for a domain."""
+        if len(vectors) == 0:
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        normalized = vectors / np.where(norms == 0, 1, norms)
+        self._centroids = (
+            normalized
+            if self._centroids is None
+            else np.vstack([self._centroids, normalized])
+        )
+        self._labels.extend([label] * len(vectors))
+
+    def _scores(self, embedding: list[float]) -> dict[str, float]:
+        """Return the best similarity per domain for a question embedding."""
+        if self._centroids is None:
+            return {}
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        similarities = self._centroids @ vector
+
+        scores: dict[str, float] = {}
+        for label, similarity in zip(self._labels, similarities):
+            scores[label] = max(scores.get(label, -1.0), float(similarity))
+        return scores
+
+    def _decide(self, scores: dict[str, float]) -> Optional[str]:
+        """Apply the similarity and margin thresholds to domain scores."""
+        if len(scores) < 2:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+
+        if best_score < self.min_similarity or best_score - runner_up < self.min_margin:
+            self.logger.debug(f"Router abstained: {scores}")
+            return None
+        self.logger.info(
+            f"Router: {best.upper()} (similarity={best_score:.3f}, "
+            f"margin={best_score - runner_up:.3f})"
+        )
+        return best
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    """Return numerator / denominator, or 0.0 for an empty denominator."""
+    return numerator / denominator if denominator else 0.0
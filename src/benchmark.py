@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks with deterministic local fake models.
+
+Measures index build time, retrieval latency across corpus sizes, orchestrator
+overhead and query throughput under concurrency without calling OpenAI. The
+documents in data/ are copied (and scaled up synthetically) into a temporary
+directory, so the real vector stores and embedding cache are never touched.
+
+    uv run python src/benchmark.py --scales 1 10 --output benchmark_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from agents.base_rag_agent import SEARCH_TYPES, BaseRAGAgent
+from agents.evaluation_worker import EvaluationWorker
+from agents.orchestrator import PROJECT_ROOT, Orchestrator
+from utils.ann_index import recall_report
+from utils.logger import setup_logger
+from utils.metrics import reset_metrics, snapshot
+from utils.models import use_fake_models
+from utils.rerank import DEFAULT_FETCH_K
+
+DOMAINS = {"hr": "HR", "finance": "Finance", "tech": "Tech"}
+
+# Short keyword lookups, answered from the lexical index by hybrid search
+KEYWORD_QUERIES = ["VPN", "W-2", "401k", "PTO", "expense report", "laptop"]
+
+
+class BenchmarkAgent(BaseRAGAgent):
+    """Specialist agent over a benchmark copy of a domain's documents."""
+
+    def __init__(
+        self,
+        name: str,
+        work_dir: Path,
+        mode: str = "agent",
+        search_type: str = "vector",
+        fetch_k: int = DEFAULT_FETCH_K,
+    ):
+        """
+        Initialize the benchmark agent.
+
+        Args:
+            name: Domain name ("hr", "finance", "tech")
+            work_dir: Directory holding the benchmark corpora and vector stores
+            mode: Answering mode ("agent", "direct" or "retrieval")
+            search_type: Retrieval ("vector" or "hybrid")
+            fetch_k: Candidates re-ranked per query
+        """
+        self.name = name
+        super().__init__(
+            docs_path=work_dir / "data" / f"{name}_docs",
+            vector_store_path=work_dir / "vector_stores" / f"{name}_faiss",
+            loader="markdown",
+            mode=mode,
+            search_type=search_type,
+            fetch_k=fetch_k,
+        )
+
+    def get_agent_name(self) -> str:
+        """Return the name of this agent."""
+        return DOMAINS[self.name]
+
+
+def build_corpus(work_dir: Path, copies: int):
+    """
+    Write a corpus of the data/ documents scaled up by a number of copies.
+
+    Each copy gets a distinct trailer so its chunks are embedded separately.
+
+    Args:
+        work_dir: Directory to create data/<domain>_docs in
+        copies: Number of copies of every document
+    """
+    for name in DOMAINS:
+        source_dir = PROJECT_ROOT / "data" / f"{name}_docs"
+        target_dir = work_dir / "data" / f"{name}_docs"
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(source_dir.glob("*.md")):
+            text = path.read_text(encoding="utf-8")
+            for copy in range(copies):
+                suffix = f"_{copy}" if copies > 1 else ""
+                (target_dir / f"{path.stem}{suffix}.md").write_text(
+                    f"{text}\n\nRevision {copy}.\n" if copies > 1 else text,
+                    encoding="utf-8",
+                )
+
+
+def latency_stats(samples: list[float]) -> dict:
+    """Summarize latency samples in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "max_ms": float(values.max()),
+    }
+
+
+def bench_index_build(work_dir: Path, scale: int) -> list[dict]:
+    """
+    Measure cold (empty embedding cache) and warm index builds per domain.
+
+    Args:
+        work_dir: Directory holding the scaled corpus
+        scale: Corpus scale factor, recorded with the results
+
+    Returns:
+        One result per domain and cache state
+    """
+    results = []
+    for name in DOMAINS:
+        for cache in ("cold", "warm"):
+            agent = BenchmarkAgent(name, work_dir)
+            start = time.perf_counter()
+            agent.rebuild_vector_store()
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "benchmark": "index_build",
+                    "scale": scale,
+                    "domain": name,
+                    "cache": cache,
+                    "documents": len(list(agent.docs_path.glob("*.md"))),
+                    "chunks": agent.vector_store.index.ntotal,
+                    "seconds": elapsed,
+                }
+            )
+    return results
+
+
+def bench_retrieval(
+    work_dir: Path,
+    scale: int,
+    queries: list[str],
+    repeats: int,
+    search_type: str = "vector",
+    query_set: str = "questions",
+    fetch_k: int = DEFAULT_FETCH_K,
+) -> list[dict]:
+    """
+    Measure retriever.invoke latency per domain over an existing index.
+
+    Args:
+        work_dir: Directory holding the scaled corpus and its indexes
+        scale: Corpus scale factor, recorded with the results
+        queries: Questions to retrieve for
+        repeats: Number of passes over the questions
+        search_type: Retrieval ("vector" or "hybrid")
+        query_set: Name of the queries, recorded with the results
+        fetch_k: Candidates re-ranked per query
+
+    Returns:
+        One result per domain, with the mean characters of retrieved context
+    """
+    results = []
+    for name in DOMAINS:
+        agent = BenchmarkAgent(name, work_dir, search_type=search_type, fetch_k=fetch_k)
+        agent.initialize()
+        samples, context_chars = [], []
+        for _ in range(repeats):
+            for query in queries:
+                start = time.perf_counter()
+                docs = agent.retriever.invoke(query)
+                samples.append(time.perf_counter() - start)
+                context_chars.append(sum(len(doc.page_content) for doc in docs))
+        results.append(
+            {
+                "benchmark": "retrieval",
+                "scale": scale,
+                "domain": name,
+                "search_type": search_type,
+                "query_set": query_set,
+                "fetch_k": fetch_k,
+                "context_chars": float(np.mean(context_chars)),
+                "chunks": agent.vector_store.index.ntotal,
+                **latency_stats(samples),
+            }
+        )
+    return results
+
+
+def bench_ann(work_dir: Path, scale: int, queries: list[str]) -> list[dict]:
+    """
+    Measure approximate index recall and latency against exact search.
+
+    The vectors of every domain's index are pooled into one corpus, so the
+    comparison runs at the largest size the scale provides.
+
+    Args:
+        work_dir: Directory holding the scaled corpus and its indexes
+        scale: Corpus scale factor, recorded with the results
+        queries: Questions used as search queries
+
+    Returns:
+        One result per index type and search setting
+    """
+    agents = [BenchmarkAgent(name, work_dir) for name in DOMAINS]
+    stores = [agent._read_vector_store() for agent in agents]
+    vectors = np.vstack(
+        [store.index.reconstruct_n(0, store.index.ntotal) for store in stores]
+    )
+    query_vectors = np.asarray(agents[0].embeddings.embed_documents(queries))
+    rows = recall_report(vectors, query_vectors, k=agents[0].retrieval_k)
+    return [{"benchmark": "ann", "scale": scale, **row} for row in rows]
+
+
+def make_orchestrator(
+    work_dir: Path,
+    mode: str,
+    search_type: str = "vector",
+    fetch_k: int = DEFAULT_FETCH_K,
+) -> Orchestrator:
+    """Build an initialized orchestrator over the benchmark agents."""
+    orchestrator = Orchestrator(
+        specialists={
+            name: lambda mode, name=name: BenchmarkAgent(
+                name, work_dir, mode=mode, fetch_k=fetch_k
+            )
+            for name in DOMAINS
+        },
+        specialist_modes=dict.fromkeys(DOMAINS, mode),
+        evaluation_worker=EvaluationWorker(sample_rate=0.0),
+        search_type=search_type,
+    )
+    orchestrator.initialize()
+    return orchestrator
+
+
+def bench_end_to_end(
+    orchestrator: Orchestrator, queries: list[tuple[str, str]], mode: str
+) -> list[dict]:
+    """
+    Measure orchestrator latency against calling the right specialist directly.
+
+    Args:
+        orchestrator: Initialized benchmark orchestrator
+        queries: (question, expected domain) pairs of single-domain questions
+        mode: Specialist mode, recorded with the results
+
+    Returns:
+        Results for the direct specialist calls and the orchestrator
+    """
+    specialist_samples, orchestrator_samples = [], []
+    for question, domain in queries:
+        start = time.perf_counter()
+        orchestrator.agents[domain].query(question)
+        specialist_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        orchestrator.query(question)
+        orchestrator_samples.append(time.perf_counter() - start)
+
+    specialist = latency_stats(specialist_samples)
+    end_to_end = latency_stats(orchestrator_samples)
+    return [
+        {"benchmark": "specialist_query", "mode": mode, **specialist},
+        {
+            "benchmark": "orchestrator_query",
+            "mode": mode,
+            **end_to_end,
+            "overhead_p50_ms": end_to_end["p50_ms"] - specialist["p50_ms"],
+        },
+    ]
+
+
+def bench_throughput(
+    orchestrator: Orchestrator,
+    queries: list[str],
+    concurrency_levels: list[int],
+    total: int,
+    mode: str,
+) -> list[dict]:
+    """
+    Measure queries per second through aquery() at several concurrency levels.
+
+    Args:
+        orchestrator: Initialized benchmark orchestrator
+        queries: Questions, cycled to reach the total
+        concurrency_levels: Numbers of queries in flight to test
+        total: Queries per concurrency level
+        mode: Specialist mode, recorded with the results
+
+    Returns:
+        One result per concurrency level
+    """
+
+    async def run(concurrency: int) -> list[float]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(question: str) -> float:
+            async with semaphore:
+                start = time.perf_counter()
+                await orchestrator.aquery(question)
+                return time.perf_counter() - start
+
+        return await asyncio.gather(
+            *(one(queries[i % len(queries)]) for i in range(total))
+        )
+
+    results = []
+    for concurrency in concurrency_levels:
+        start = time.perf_counter()
+        samples = asyncio.run(run(concurrency))
+        elapsed = time.perf_counter() - start
+        results.append(
+            {
+                "benchmark": "throughput",
+                "mode": mode,
+                "concurrency": concurrency,
+                "seconds": elapsed,
+                "queries_per_second": total / elapsed,
+                **latency_stats(samples),
+            }
+        )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit, if available."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def main():
+    """Run the benchmarks and write the results as JSON."""
+    parser = argparse.ArgumentParser(description="Multi-Agent RAG benchmarks")
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1, 10],
+        help="Corpus sizes as copies of data/ (default: 1 10)",
+    )
+    parser.add_argument(
+        "--chat-latency",
+        type=float,
+        default=0.05,
+        help="Simulated seconds per chat model call (default: 0.05)",
+    )
+    parser.add_argument(
+        "--embedding-latency",
+        type=float,
+        default=0.01,
+        help="Simulated seconds per embeddings request (default: 0.01)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["agent", "direct", "retrieval"],
+        default="agent",
+        help="Specialist mode for the end-to-end benchmarks (default: agent)",
+    )
+    parser.add_argument(
+        "--search-type",
+        choices=SEARCH_TYPES,
+        default="vector",
+        help="Specialist retrieval for the retrieval and end-to-end benchmarks "
+        "(default: vector)",
+    )
+    parser.add_argument(
+        "--fetch-k",
+        type=int,
+        default=DEFAULT_FETCH_K,
+        help="Retrieval candidates merged and re-ranked by MMR per query "
+        f"(default: {DEFAULT_FETCH_K}; 4 disables re-ranking)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="Concurrency levels for the throughput benchmark (default: 1 4 16)",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=32,
+        help="Queries per throughput concurrency level (default: 32)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Passes over the test queries for retrieval latency (default: 5)",
+    )
+    parser.add_argument(
+        "--ann",
+        action="store_true",
+        help="Also compare approximate index recall and latency per scale",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        default=PROJECT_ROOT / "benchmark_results.json",
+        help="Results file (default: benchmark_results.json)",
+    )
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    for component in ["hr", "finance", "tech", "orchestrator", "evaluator"]:
+        setup_logger(f"agents.{component}", level=log_level)
+    # Tracing is disabled without Langfuse keys; keep its warnings out of the report
+    logging.getLogger("langfuse").setLevel(logging.ERROR)
+
+    use_fake_models(
+        chat_latency=args.chat_latency, embedding_latency=args.embedding_latency
+    )
+
+    with open(PROJECT_ROOT / "test_queries.json") as f:
+        test_queries = json.load(f)["test_queries"]
+    questions = [q["query"] for q in test_queries]
+    single_domain = [
+        (q["query"], q["expected_category"])
+        for q in test_queries
+        if q["expected_category"] in DOMAINS
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rag-benchmark-") as tmp:
+        for scale in args.scales:
+            work_dir = Path(tmp) / f"scale_{scale}"
+            build_corpus(work_dir, scale)
+            print(f"Scale {scale}: index build and retrieval...")
+            results += bench_index_build(work_dir, scale)
+            results += bench_retrieval(
+                work_dir,
+                scale,
+                questions,
+                args.repeats,
+                args.search_type,
+                fetch_k=args.fetch_k,
+            )
+            results += bench_retrieval(
+                work_dir,
+                scale,
+                KEYWORD_QUERIES,
+                args.repeats,
+                args.search_type,
+                query_set="keywords",
+                fetch_k=args.fetch_k,
+            )
+            if args.ann:
+                results += bench_ann(work_dir, scale, questions)
+
+        print("End-to-end latency and throughput...")
+        # Per-stage breakdown of the end-to-end runs only
+        reset_metrics()
+        orchestrator = make_orchestrator(
+            Path(tmp) / f"scale_{args.scales[0]}",
+            args.mode,
+            args.search_type,
+            args.fetch_k,
+        )
+        try:
+            results += bench_end_to_end(orchestrator, single_domain, args.mode)
+            results += bench_throughput(
+                orchestrator, questions, args.concurrency, args.queries, args.mode
+            )
+        finally:
+            orchestrator.close()
+
+    report = {
+        "metadata": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+        },
+        "results": results,
+        "stage_metrics": snapshot(),
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    for result in results:
+        summary = ", ".join(
+            f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in result.items()
+        )
+        print(f"  {summary}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Load test for the HTTP service (server.py).
+
+Sends the test queries at a fixed concurrency and reports status codes,
+latency percentiles and throughput. Either target a running server:
+
+    RAG_FAKE_MODELS=1 uv run --extra server python src/server.py --workers 4
+    uv run python src/load_test.py --url http://127.0.0.1:8000 --concurrency 64
+
+or run the service in-process over the benchmark corpus with fake models,
+with no HTTP server or OpenAI calls:
+
+    uv run python src/load_test.py --in-process --concurrency 64 --max-concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from agents.evaluation_worker import EvaluationWorker
+from agents.orchestrator import PROJECT_ROOT, Orchestrator
+from benchmark import DOMAINS, BenchmarkAgent, build_corpus, latency_stats
+from server import RAGService
+from utils.models import use_fake_models
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float) -> dict:
+    """
+    Poll /ready until the service reports ready.
+
+    Args:
+        client: Client for the service
+        timeout: Seconds to wait
+
+    Returns:
+        The readiness report
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        response = await client.get("/ready")
+        if response.status_code == 200:
+            return response.json()
+        if response.json().get("status") == "failed":
+            raise RuntimeError(f"Service failed to start: {response.json()['error']}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Service not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+async def stream_in_process(app, question: str) -> tuple[int, Optional[float]]:
+    """
+    Call /query/stream on an ASGI app directly, timing its first event.
+
+    httpx's ASGITransport returns a response only once the app has sent all
+    of it, so in-process streams are read here as the app sends them.
+
+    Args:
+        app: ASGI application
+        question: Question to ask
+
+    Returns:
+        Tuple of (status code, seconds until the first non-empty body chunk)
+    """
+    body = json.dumps({"question": question}).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "path": "/query/stream",
+        "raw_path": b"/query/stream",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    sent = False
+    finished = asyncio.Event()
+    status = 0
+    first = None
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if first is None and message.get("body"):
+                first = time.perf_counter() - start
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return status, first
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    questions: list[str],
+    total: int,
+    concurrency: int,
+    stream: bool = False,
+    app=None,
+) -> dict:
+    """
+    Send requests at a fixed concurrency and summarize the responses.
+
+    Args:
+        client: Client for the service
+        questions: Questions, cycled to reach the total
+        total: Number of requests
+        concurrency: Requests in flight
+        stream: Use /query/stream, also timing the first event
+        app: In-process ASGI app; streams are read from it directly so the
+            first event is timed when it is sent
+
+    Returns:
+        Summary with status counts, throughput and latency percentiles of the
+        successful requests
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Counter = Counter()
+    latencies, first_event = [], []
+
+    async def one(question: str):
+        async with semaphore:
+            start = time.perf_counter()
+            first = None
+            try:
+                if stream and app is not None:
+                    status, first = await stream_in_process(app, question)
+                elif stream:
+                    async with client.stream(
+                        "POST", "/query/stream", json={"question": question}
+                    ) as response:
+                        async for line in response.aiter_lines():
+                            if first is None and line:
+                                first = time.perf_counter() - start
+                        status = response.status_code
+                else:
+                    response = await client.post("/query", json={"question": question})
+                    status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            statuses[str(status)] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+                if first is not None:
+                    first_event.append(first)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(questions[i % len(questions)]) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "requests": total,
+        "concurrency": concurrency,
+        "stream": stream,
+        "statuses": dict(statuses),
+        "seconds": elapsed,
+        "ok_per_second": len(latencies) / elapsed,
+    }
+    if latencies:
+        summary["latency"] = latency_stats(latencies)
+    if first_event:
+        summary["first_event_latency"] = latency_stats(first_event)
+    return summary
+
+
+def in_process_service(work_dir: Path, args) -> RAGService:
+    """Build the service over the benchmark corpus with fake models."""
+    use_fake_models(
+        chat_latency=args.chat_latency, embedding_latency=args.embedding_latency
+    )
+    build_corpus(work_dir, 1)
+
+    def factory(settings: dict) -> Orchestrator:
+        orchestrator = Orchestrator(
+            specialists={
+                name: lambda mode, name=name: BenchmarkAgent(name, work_dir, mode=mode)
+                for name in DOMAINS
+            },
+            specialist_modes=dict.fromkeys(DOMAINS, settings["specialist_mode"]),
+            evaluation_worker=EvaluationWorker(sample_rate=0.0),
+            coalesce_queries=not settings["no_coalesce"],
+        )
+        orchestrator.initialize()
+        return orchestrator
+
+    return RAGService(
+        settings={
+            "max_concurrency": args.max_concurrency,
+            "queue_depth": args.queue_depth,
+            "request_timeout": args.request_timeout,
+            "no_coalesce": args.no_coalesce,
+            "log_level": "WARNING",
+        },
+        orchestrator_factory=factory,
+    )
+
+
+async def main_async(args) -> dict:
+    """Run the load test against a URL or an in-process service."""
+    with open(PROJECT_ROOT / "test_queries.json") as f:
+        questions = [q["query"] for q in json.load(f)["test_queries"]]
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            ready = await wait_ready(client, args.ready_timeout)
+            return {
+                "ready": ready,
+                "result": await run_load(
+                    client, questions, args.requests, args.concurrency, args.stream
+                ),
+            }
+
+    with tempfile.TemporaryDirectory(prefix="rag-load-") as tmp:
+        service = in_process_service(Path(tmp), args)
+        await service.start()
+        transport = httpx.ASGITransport(app=service)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://service", timeout=None
+            ) as client:
+                ready = await wait_ready(client, args.ready_timeout)
+                result = await run_load(
+                    client,
+                    questions,
+                    args.requests,
+                    args.concurrency,
+                    args.stream,
+                    app=service,
+                )
+        finally:
+            await service.stop()
+    return {"ready": ready, "result": result}
+
+
+def main():
+    """Run the load test and print the summary as JSON."""
+    parser = argparse.ArgumentParser(description="Multi-Agent RAG service load test")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running server")
+    target.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Serve the benchmark corpus in-process with fake models",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Requests in flight (default: 32)"
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="Use the streaming endpoint"
+    )
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    in_process = parser.add_argument_group("in-process service")
+    in_process.add_argument("--max-concurrency", type=int, default=8)
+    in_process.add_argument("--queue-depth", type=int, default=32)
+    in_process.add_argument("--request-timeout", type=float, default=60.0)
+    in_process.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="Run concurrent identical questions separately",
+    )
+    in_process.add_argument("--chat-latency", type=float, default=0.05)
+    in_process.add_argument("--embedding-latency", type=float, default=0.01)
+    parser.add_argument("--output", "-o", type=Path, help="Also write the summary here")
+    args = parser.parse_args()
+
+    # Tracing is disabled without Langfuse keys; keep its warnings out of the report
+    logging.getLogger("langfuse").setLevel(logging.ERROR)
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,25 @@ Allows users to ask questions across HR, Finance, and Tech domains.
 """
 
 import argparse
+import json
 import logging
 import sys
+from pathlib import Path
 
-from agents.orchestrator import Orchestrator
+import numpy as np
+
+from agents.base_rag_agent import AGENT_MODES, SEARCH_TYPES
+from agents.batch_runner import run_batch
+from agents.evaluation_worker import EvaluationWorker
+from agents.orchestrator import PROJECT_ROOT, SPECIALIST_AGENTS, Orchestrator
+from agents.router import DomainRouter
+from utils.ann_index import INDEX_TYPES, recall_report
 from utils.logger import setup_logger
+from utils.metrics import snapshot, to_prometheus
+from utils.query_cache import configure_query_cache, query_cache_stats
+from utils.rate_limits import configure_rate_limit
+from utils.semantic_cache import SemanticCache
+from utils.shared_index import SharedIndex
 from utils.spinner import Spinner
 
 
@@ -69,9 +83,27 @@ def handle_query(
     spinner = Spinner("Processing")
     try:
         spinner.start()
-        result = orchestrator.query(query)
-        spinner.stop()
-        print(f"Assistant: {result['answer']}\n")
+        answering = False
+        for event in orchestrator.stream(query):
+            if event["type"] == "route":
+                agents = ", ".join(agent.upper() for agent in event["agents"])
+                spinner.message = f"Consulting {agents}"
+                logger.info(f"Routed by {event['routed_by']} to {agents}")
+            elif event["type"] == "specialist_end":
+                logger.info(
+                    f"{event['agent'].upper()} finished in {event['elapsed']:.2f}s "
+                    f"({event['status']})"
+                )
+            elif event["type"] == "token":
+                if not answering:
+                    spinner.stop()
+                    print("Assistant: ", end="", flush=True)
+                    answering = True
+                print(event["content"], end="", flush=True)
+            elif event["type"] == "done" and not answering:
+                spinner.stop()
+                print(f"Assistant: {event['response']['answer']}", end="")
+        print("\n")
     except Exception as e:
         spinner.stop()
         print(f"\n❌ Error: {str(e)}\n")
@@ -98,6 +130,140 @@ def run_interactive_loop(orchestrator: Orchestrator, logger: logging.Logger):
             break
 
 
+def run_sync(domains: list[str], logger: logging.Logger):
+    """
+    Incrementally re-index the vector stores of the given domains.
+
+    Args:
+        domains: Domain names to sync ("hr", "finance", "tech")
+        logger: Logger instance
+    """
+    for domain in domains:
+        agent = SPECIALIST_AGENTS[domain]()
+        summary = agent.sync_vector_store()
+        logger.info(f"{domain.upper()} sync summary: {summary}")
+
+        if summary["rebuilt"]:
+            print(f"{domain.upper()}: rebuilt index ({summary['chunks']} chunks)")
+        else:
+            print(
+                f"{domain.upper()}: {summary['added']} added, {summary['updated']} updated, "
+                f"{summary['removed']} removed, {summary['unchanged']} unchanged"
+            )
+
+
+def run_route_eval(logger: logging.Logger):
+    """
+    Report fast-path router accuracy against the labeled test queries.
+
+    Args:
+        logger: Logger instance
+    """
+    with open(PROJECT_ROOT / "test_queries.json") as f:
+        test_queries = json.load(f)["test_queries"]
+
+    agents = {name: agent_cls() for name, agent_cls in SPECIALIST_AGENTS.items()}
+    router = DomainRouter().fit_from_agents(agents)
+    report = router.evaluate(test_queries)
+
+    for result in report["results"]:
+        mark = "✓" if result["correct"] else "✗"
+        routed_to = result["routed_to"] or "orchestrator"
+        print(
+            f"{mark} [{result['expected_category']} -> {routed_to}] {result['query']}"
+        )
+    print(
+        f"\nAccuracy: {report['accuracy']:.0%}, "
+        f"precision: {report['precision']:.0%} ({report['routed']} routed), "
+        f"single-domain coverage: {report['single_domain_coverage']:.0%}"
+    )
+    logger.info(f"Router evaluation: {report['routed']}/{report['total']} routed")
+
+
+def run_ann_report(index_types: list[str], logger: logging.Logger):
+    """
+    Compare approximate indexes with exact search on each domain's vectors.
+
+    The labeled test queries are the query set; recall@k is measured against
+    the flat index's results.
+
+    Args:
+        index_types: Index types to compare
+        logger: Logger instance
+    """
+    with open(PROJECT_ROOT / "test_queries.json") as f:
+        questions = [example["query"] for example in json.load(f)["test_queries"]]
+
+    for domain, agent_cls in SPECIALIST_AGENTS.items():
+        agent = agent_cls()
+        agent.sync_vector_store()
+        vector_store = agent._read_vector_store()
+        vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+        queries = np.asarray(
+            [agent.embeddings.embed_query(question) for question in questions]
+        )
+        rows = recall_report(
+            vectors,
+            queries,
+            index_types=index_types,
+            k=agent.retrieval_k,
+            metric=vector_store.index.metric_type,
+        )
+        logger.info(f"{domain.upper()} ANN report: {rows}")
+
+        print(f"\n{domain.upper()} ({len(vectors)} vectors)")
+        for row in rows:
+            setting = ", ".join(
+                f"{key}={row[key]}" for key in ("nprobe", "ef_search") if key in row
+            )
+            print(
+                f"  {row['index_type']:<9} {setting:<13} "
+                f"recall@{agent.retrieval_k}={row['recall_at_k']:.2f}  "
+                f"{row['mean_ms']:.3f}ms  {row['speedup']:.1f}x faster  "
+                f"{row['memory_ratio']:.2f}x memory"
+            )
+
+
+def run_batch_command(orchestrator: Orchestrator, args, logger: logging.Logger):
+    """
+    Run a file of queries through the orchestrator and print a summary.
+
+    Args:
+        orchestrator: The orchestrator instance
+        args: Parsed command-line arguments of the batch subcommand
+        logger: Logger instance
+    """
+    output = args.output or args.input.with_name(f"{args.input.stem}_results.jsonl")
+    summary = run_batch(
+        orchestrator,
+        args.input,
+        output,
+        concurrency=args.concurrency,
+        limit=args.limit,
+    )
+    logger.info(f"Batch summary: {summary}")
+    print(
+        f"{summary['completed']} completed, {summary['failed']} failed, "
+        f"{summary['skipped']} skipped (already done) in {summary['elapsed']:.1f}s "
+        f"({summary['throughput']:.2f} queries/s)"
+    )
+    print(f"Results written to {output}")
+
+
+def write_metrics(path: Path):
+    """
+    Write the per-stage latency metrics collected during the session.
+
+    Args:
+        path: Output file; a .prom or .txt suffix selects the Prometheus text
+            format, anything else a JSON snapshot
+    """
+    if path.suffix in (".prom", ".txt"):
+        path.write_text(to_prometheus(), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(snapshot(), indent=2) + "\n", encoding="utf-8")
+
+
 def main():
     """Run the CLI application."""
     parser = argparse.ArgumentParser(description="Multi-Agent RAG System CLI")
@@ -107,16 +273,204 @@ def main():
         action="store_true",
         help="Enable verbose logging output",
     )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Answer near-duplicate questions from a semantic cache",
+    )
+
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Load each specialist on its first query instead of at startup",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="append",
+        choices=list(SPECIALIST_AGENTS),
+        help="Specialist to load at startup in lazy mode (repeatable)",
+    )
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        help="Send confident single-domain questions straight to one specialist",
+    )
+    parser.add_argument(
+        "--specialist-mode",
+        choices=AGENT_MODES,
+        default="agent",
+        help="How specialists answer: ReAct agent, one grounded generation "
+        "('direct') or raw retrieved chunks for the orchestrator ('retrieval')",
+    )
+    parser.add_argument(
+        "--unified-index",
+        action="store_true",
+        help="Search one shared multi-domain index instead of one index per domain",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default="flat",
+        help="Specialist search index: exact ('flat') or approximate, built "
+        "from the flat index for large corpora (default: flat)",
+    )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        help="IVF lists searched per query with ivf_flat/ivf_pq indexes",
+    )
+    parser.add_argument(
+        "--ef-search",
+        type=int,
+        help="Candidate list size per query with hnsw indexes",
+    )
+    parser.add_argument(
+        "--search",
+        choices=SEARCH_TYPES,
+        default="vector",
+        help="Specialist retrieval: embedding search ('vector'), or fused with "
+        "BM25 keyword search ('hybrid'; keyword queries skip the embedding)",
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="Run concurrent identical questions separately instead of sharing one run",
+    )
+    parser.add_argument(
+        "--eval-sample-rate",
+        type=float,
+        default=1.0,
+        help="Fraction of responses scored by the LLM judge (default: 1.0)",
+    )
+    parser.add_argument(
+        "--query-cache-file",
+        type=Path,
+        help="SQLite file persisting query embeddings across runs",
+    )
+    parser.add_argument(
+        "--query-cache-ttl",
+        type=float,
+        help="Seconds a query embedding stays in the in-memory cache "
+        "(default: until evicted)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write per-stage latency metrics on exit (.prom for Prometheus "
+        "text format, otherwise JSON)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    sync_parser = subparsers.add_parser(
+        "sync", help="Incrementally re-index vector stores from changed documents"
+    )
+    sync_parser.add_argument(
+        "--domain",
+        dest="domains",
+        action="append",
+        choices=list(SPECIALIST_AGENTS),
+        help="Domain to sync (repeatable, defaults to all domains)",
+    )
+    subparsers.add_parser(
+        "route-eval", help="Report fast-path router accuracy on test_queries.json"
+    )
+    ann_parser = subparsers.add_parser(
+        "ann-report",
+        help="Compare approximate index recall and latency with exact search",
+    )
+    ann_parser.add_argument(
+        "--index",
+        dest="index_types",
+        action="append",
+        choices=INDEX_TYPES,
+        help="Index type to compare (repeatable, defaults to all types)",
+    )
+    batch_parser = subparsers.add_parser(
+        "batch", help="Run a JSON or JSONL file of queries and write JSONL results"
+    )
+    batch_parser.add_argument("input", type=Path, help="Queries file (.json or .jsonl)")
+    batch_parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Results file, resumed if it exists (default: <input>_results.jsonl)",
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of queries in flight (default: 4)",
+    )
+    batch_parser.add_argument("--limit", type=int, help="Only run the first N queries")
+    batch_parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Maximum OpenAI chat and embeddings requests per second across all agents",
+    )
     args = parser.parse_args()
 
     logger = setup_logging(args.verbose)
 
     try:
-        orchestrator = Orchestrator()
+        if args.command == "sync":
+            run_sync(args.domains or list(SPECIALIST_AGENTS), logger)
+            return
+        if args.command == "route-eval":
+            run_route_eval(logger)
+            return
+        if args.command == "ann-report":
+            run_ann_report(args.index_types or list(INDEX_TYPES), logger)
+            return
+
+        if args.command == "batch" and args.rate_limit:
+            configure_rate_limit("openai", args.rate_limit)
+
+        configure_query_cache(
+            ttl_seconds=args.query_cache_ttl, path=args.query_cache_file
+        )
+        semantic_cache = SemanticCache() if args.semantic_cache else None
+        orchestrator = Orchestrator(
+            semantic_cache=semantic_cache,
+            lazy=args.lazy,
+            warmup=args.warmup,
+            router=DomainRouter() if args.fast_path else None,
+            specialist_modes=dict.fromkeys(SPECIALIST_AGENTS, args.specialist_mode),
+            evaluation_worker=EvaluationWorker(sample_rate=args.eval_sample_rate),
+            shared_index=(
+                SharedIndex(PROJECT_ROOT / "vector_stores" / "unified_faiss")
+                if args.unified_index
+                else None
+            ),
+            index_type=args.index_type,
+            index_params={
+                key: value
+                for key, value in (
+                    ("nprobe", args.nprobe),
+                    ("ef_search", args.ef_search),
+                )
+                if value is not None
+            },
+            search_type=args.search,
+            coalesce_queries=not args.no_coalesce,
+        )
         orchestrator.initialize()
 
-        print_banner()
-        run_interactive_loop(orchestrator, logger)
+        if args.command == "batch":
+            run_batch_command(orchestrator, args, logger)
+        else:
+            print_banner()
+            run_interactive_loop(orchestrator, logger)
+
+        # Let queued evaluations finish so their scores reach Langfuse
+        orchestrator.close(timeout=30)
+
+        if args.metrics_file:
+            write_metrics(args.metrics_file)
+            logger.info(f"Stage metrics written to {args.metrics_file}")
+
+        if semantic_cache is not None:
+            logger.info(f"Semantic cache stats: {semantic_cache.stats()}")
+        logger.info(f"Query embedding cache stats: {query_cache_stats()}")
 
     except KeyboardInterrupt:
         print("\n\n👋 Goodbye!\n")
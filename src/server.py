@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+HTTP service for the multi-agent system, as a plain ASGI application.
+
+Every worker process builds one shared Orchestrator at startup and serves
+all requests from it:
+
+    uv run --extra server python src/server.py --workers 4 --max-concurrency 16
+
+or with any ASGI server, configured through RAG_* environment variables
+(see SETTINGS):
+
+    RAG_MAX_CONCURRENCY=16 uv run --extra server uvicorn server:app --app-dir src
+
+Endpoints:
+    POST /query          {"question": "..."} -> answer, route, sources, timings
+    POST /query/stream   same body -> server-sent events (see Orchestrator.stream)
+    GET  /health         liveness: the process is up
+    GET  /ready          readiness: 200 once every specialist has initialized
+    GET  /metrics        stage metrics in the Prometheus text format
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from agents.base_rag_agent import AGENT_MODES, SEARCH_TYPES
+from agents.evaluation_worker import EvaluationWorker
+from agents.orchestrator import PROJECT_ROOT, SPECIALIST_AGENTS, Orchestrator
+from utils.logger import setup_logger
+from utils.metrics import increment, observe, to_prometheus
+from utils.models import use_fake_models
+from utils.shared_index import SharedIndex
+
+# Setting name -> (environment variable, type, default)
+SETTINGS = {
+    "max_concurrency": ("RAG_MAX_CONCURRENCY", int, 8),
+    "queue_depth": ("RAG_QUEUE_DEPTH", int, 32),
+    "request_timeout": ("RAG_REQUEST_TIMEOUT", float, 60.0),
+    "specialist_mode": ("RAG_SPECIALIST_MODE", str, "agent"),
+    "search_type": ("RAG_SEARCH", str, "vector"),
+    "unified_index": ("RAG_UNIFIED_INDEX", bool, False),
+    "no_coalesce": ("RAG_NO_COALESCE", bool, False),
+    "eval_sample_rate": ("RAG_EVAL_SAMPLE_RATE", float, 1.0),
+    "fake_models": ("RAG_FAKE_MODELS", bool, False),
+    "fake_chat_latency": ("RAG_FAKE_CHAT_LATENCY", float, 0.05),
+    "fake_embedding_latency": ("RAG_FAKE_EMBEDDING_LATENCY", float, 0.01),
+    "log_level": ("RAG_LOG_LEVEL", str, "INFO"),
+}
+
+# Largest accepted request body
+MAX_BODY_BYTES = 64 * 1024
+
+
+def settings_from_env(overrides: Optional[dict] = None) -> dict:
+    """
+    Read the service settings from RAG_* environment variables.
+
+    Args:
+        overrides: Settings taking precedence over the environment
+
+    Returns:
+        Every setting in SETTINGS
+    """
+    settings = {}
+    for name, (variable, kind, default) in SETTINGS.items():
+        value = os.environ.get(variable)
+        if value is None:
+            settings[name] = default
+        elif kind is bool:
+            settings[name] = value.lower() in ("1", "true", "yes", "on")
+        else:
+            settings[name] = kind(value)
+    settings.update(overrides or {})
+    if settings["specialist_mode"] not in AGENT_MODES:
+        raise ValueError(f"Unknown specialist mode '{settings['specialist_mode']}'")
+    if settings["search_type"] not in SEARCH_TYPES:
+        raise ValueError(f"Unknown search type '{settings['search_type']}'")
+    return settings
+
+
+def build_orchestrator(settings: dict) -> Orchestrator:
+    """
+    Build and initialize the orchestrator a worker serves.
+
+    Args:
+        settings: Service settings (see SETTINGS)
+
+    Returns:
+        Initialized orchestrator
+    """
+    if settings["fake_models"]:
+        use_fake_models(
+            chat_latency=settings["fake_chat_latency"],
+            embedding_latency=settings["fake_embedding_latency"],
+        )
+    orchestrator = Orchestrator(
+        specialist_modes=dict.fromkeys(SPECIALIST_AGENTS, settings["specialist_mode"]),
+        evaluation_worker=EvaluationWorker(sample_rate=settings["eval_sample_rate"]),
+        shared_index=(
+            SharedIndex(PROJECT_ROOT / "vector_stores" / "unified_faiss")
+            if settings["unified_index"]
+            else None
+        ),
+        search_type=settings["search_type"],
+        coalesce_queries=not settings["no_coalesce"],
+    )
+    orchestrator.initialize()
+    return orchestrator
+
+
+class QueueFull(Exception):
+    """Raised when a request arrives with every slot and queue place taken."""
+
+
+class AdmissionControl:
+    """
+    Bounds the queries a worker runs at once and the queries waiting to run.
+
+    Up to max_concurrency queries run; up to queue_depth more wait for a
+    slot. Requests beyond that are rejected at once instead of queueing
+    without bound, so an overloaded worker sheds load with a fast 503.
+    """
+
+    def __init__(self, max_concurrency: int, queue_depth: int):
+        """
+        Initialize the admission control.
+
+        Args:
+            max_concurrency: Queries run at once
+            queue_depth: Queries waiting for a slot before new ones are rejected
+        """
+        self.max_concurrency = max_concurrency
+        self.queue_depth = queue_depth
+        self.running = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a query slot, waiting in the queue if none is free."""
+        if self._semaphore.locked() and self.waiting >= self.queue_depth:
+            raise QueueFull()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Return the current load and limits."""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+        }
+
+
+def response_payload(response: dict) -> dict:
+    """
+    Return the JSON-serializable part of an orchestrator response.
+
+    Args:
+        response: Response returned by Orchestrator.query()
+
+    Returns:
+        Dictionary with 'answer', 'routed_by', 'cached', 'elapsed', 'agents',
+        'sources' and 'specialist_calls'
+    """
+    calls = response["specialist_calls"]
+    return {
+        "answer": response["answer"],
+        "routed_by": response["routed_by"],
+        "cached": response["cached"],
+        "elapsed": response["elapsed"],
+        "agents": [call["agent"] for call in calls],
+        "sources": sorted({source for call in calls for source in call["sources"]}),
+        "specialist_calls": calls,
+    }
+
+
+class RAGService:
+    """
+    ASGI application serving one shared orchestrator per worker process.
+
+    The orchestrator is built in the background when the server starts, so
+    /health answers during startup while /ready reports 503 until every
+    specialist agent has finished initializing.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[dict] = None,
+        orchestrator_factory: Optional[Callable[[dict], Orchestrator]] = None,
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            settings: Service settings (read from the environment at startup
+                when omitted, so every worker of an ASGI server configures itself)
+            orchestrator_factory: Builds the initialized orchestrator from the
+                settings (defaults to build_orchestrator)
+        """
+        self.settings = settings
+        self.orchestrator_factory = orchestrator_factory or build_orchestrator
+        self.orchestrator: Optional[Orchestrator] = None
+        self.admission: Optional[AdmissionControl] = None
+        self.startup_error: Optional[str] = None
+        self.logger = logging.getLogger("agents.server")
+        self._startup_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the orchestrator is initialized and serving queries."""
+        return self.orchestrator is not None
+
+    async def start(self):
+        """Start building the orchestrator in the background."""
+        self.settings = settings_from_env(self.settings)
+        # Configured here, in every worker process, not in the launching one
+        for component in [*SPECIALIST_AGENTS, "orchestrator", "evaluator", "server"]:
+            setup_logger(
+                f"agents.{component}", level=self.settings["log_level"].upper()
+            )
+        self.admission = AdmissionControl(
+            self.settings["max_concurrency"], self.settings["queue_depth"]
+        )
+        self._startup_task = asyncio.create_task(self._build())
+
+    async def _build(self):
+        """Build the orchestrator in a worker thread and mark the service ready."""
+        start = time.perf_counter()
+        try:
+            self.orchestrator = await asyncio.to_thread(
+                self.orchestrator_factory, self.settings
+            )
+        except Exception as e:
+            self.logger.exception(f"Startup failed: {e}")
+            self.startup_error = str(e)
+            return
+        self.logger.info(f"Ready in {time.perf_counter() - start:.2f}s")
+
+    async def stop(self):
+        """Wait for startup to settle and shut the orchestrator down."""
+        if self._startup_task is not None:
+            await self._startup_task
+        if self.orchestrator is not None:
+            await asyncio.to_thread(self.orchestrator.close, 30)
+
+    async def __call__(self, scope, receive, send):
+        """ASGI entry point."""
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        start = time.perf_counter()
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        handlers = {
+            ("GET", "/health"): self._health,
+            ("GET", "/ready"): self._ready,
+            ("GET", "/metrics"): self._metrics,
+            ("POST", "/query"): self._query,
+            ("POST", "/query/stream"): self._stream,
+        }
+        handler = handlers.get(route)
+        if handler is None:
+            status = 404
+            await _send_json(send, status, {"error": "Not found"})
+        else:
+            status = await handler(receive, send)
+        # Unknown paths share one label so they cannot grow the metrics unbounded
+        endpoint = route[1] if handler is not None else "other"
+        increment("http_requests", endpoint=endpoint, status=str(status))
+        observe("http", endpoint, time.perf_counter() - start)
+
+    async def _lifespan(self, receive, send):
+        """Run startup and shutdown with the server."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.start()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _health(self, receive, send) -> int:
+        await _send_json(send, 200, {"status": "ok"})
+        return 200
+
+    async def _ready(self, receive, send) -> int:
+        if self.startup_error is not None:
+            status, body = 503, {"status": "failed", "error": self.startup_error}
+        elif not self.ready:
+            status, body = 503, {"status": "starting"}
+        else:
+            status = 200
+            body = {
+                "status": "ready",
+                "agents": sorted(self.orchestrator.agents),
+                "unavailable": self.orchestrator.unavailable_agents,
+                "startup": self.orchestrator.startup_report,
+                "load": self.admission.stats(),
+            }
+        await _send_json(send, status, body)
+        return status
+
+    async def _metrics(self, receive, send) -> int:
+        await _send(
+            send,
+            200,
+            to_prometheus().encode("utf-8"),
+            content_type="text/plain; version=0.0.4",
+        )
+        return 200
+
+    async def _read_question(self, receive, send) -> Optional[str]:
+        """Read the question from a JSON request body, answering 400 if invalid."""
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > MAX_BODY_BYTES:
+                await _send_json(send, 413, {"error": "Request body too large"})
+                return None
+            if not message.get("more_body"):
+                break
+        try:
+            question = json.loads(body)["question"]
+        except (ValueError, KeyError, TypeError):
+            question = None
+        if not isinstance(question, str) or not question.strip():
+            await _send_json(
+                send, 400, {"error": 'Expected a JSON body {"question": "..."}'}
+            )
+            return None
+        return question.strip()
+
+    async def _reject_if_not_ready(self, send) -> Optional[int]:
+        """Answer 503 while the orchestrator is not ready; return the status sent."""
+        if self.ready:
+            return None
+        await _send_json(
+            send,
+            503,
+            {"error": "Service is starting"},
+            headers=[(b"retry-after", b"5")],
+        )
+        return 503
+
+    async def _query(self, receive, send) -> int:
+        question = await self._read_question(receive, send)
+        if question is None:
+            return 400
+        status = await self._reject_if_not_ready(send)
+        if status is not None:
+            return status
+
+        try:
+            async with asyncio.timeout(self.settings["request_timeout"]):
+                async with self.admission.slot():
+                    response = await self.orchestrator.aquery(question)
+        except QueueFull:
+            status, body = 503, {"error": "Too many requests queued"}
+        except TimeoutError:
+            status, body = 504, {"error": "Request timed out"}
+        except Exception as e:
+            self.logger.exception(f"Query failed: {e}")
+            status, body = 500, {"error": str(e)}
+        else:
+            status, body = 200, response_payload(response)
+        headers = [(b"retry-after", b"1")] if status == 503 else []
+        await _send_json(send, status, body, headers=headers)
+        return status
+
+    async def _stream(self, receive, send) -> int:
+        question = await self._read_question(receive, send)
+        if question is None:
+            return 400
+        status = await self._reject_if_not_ready(send)
+        if status is not None:
+            return status
+
+        started = False
+        status = 200
+        try:
+            async with asyncio.timeout(self.settings["request_timeout"]):
+                async with self.admission.slot():
+                    await _start(send, 200, "text/event-stream")
+                    started = True
+                    async for event in self.orchestrator.astream(question):
+                        if event["type"] == "done":
+                            event = {
+                                "type": "done",
+                                "response": response_payload(event["response"]),
+                            }
+                        await _send_event(send, event)
+        except QueueFull:
+            await _send_json(
+                send,
+                503,
+                {"error": "Too many requests queued"},
+                headers=[(b"retry-after", b"1")],
+            )
+            return 503
+        except Exception as e:
+            timed_out = isinstance(e, TimeoutError)
+            if not timed_out:
+                self.logger.exception(f"Streaming query failed: {e}")
+            error = "Request timed out" if timed_out else str(e)
+            status = 504 if timed_out else 500
+            if not started:
+                await _send_json(send, status, {"error": error})
+                return status
+            # Headers are sent; report the failure as the last event
+            await _send_event(send, {"type": "error", "error": error})
+        await send({"type": "http.response.body", "body": b""})
+        return status
+
+
+async def _start(send, status: int, content_type: str, headers=()):
+    """Send the response status and headers."""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode()), *headers],
+        }
+    )
+
+
+async def _send(send, status: int, body: bytes, content_type: str, headers=()):
+    """Send a complete response."""
+    await _start(send, status, content_type, headers)
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, body: dict, headers=()):
+    """Send a complete JSON response."""
+    await _send(
+        send, status, json.dumps(body).encode("utf-8"), "application/json", headers
+    )
+
+
+async def _send_event(send, event: dict):
+    """Send one server-sent event, named by the event's 'type'."""
+    data = json.dumps(event)
+    await send(
+        {
+            "type": "http.response.body",
+            "body": f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8"),
+            "more_body": True,
+        }
+    )
+
+
+# Module-level app for ASGI servers ("server:app"); configured from RAG_* variables
+app = RAGService()
+
+
+def main():
+    """Serve the application with uvicorn."""
+    parser = argparse.ArgumentParser(description="Multi-Agent RAG HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, each with its own orchestrator (default: 1)",
+    )
+    for name, (variable, kind, default) in SETTINGS.items():
+        flag = "--" + name.replace("_", "-")
+        if kind is bool:
+            parser.add_argument(flag, action="store_true", help=f"Sets {variable}")
+        else:
+            parser.add_argument(
+                flag, type=kind, help=f"Sets {variable} (default: {default})"
+            )
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error("uvicorn is required: uv run --extra server python src/server.py")
+
+    # Workers are separate processes; pass the settings through the environment
+    for name, (variable, _, _) in SETTINGS.items():
+        value = getattr(args, name)
+        if value not in (None, False):
+            os.environ[variable] = str(value)
+    settings = settings_from_env()
+
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        log_level=settings["log_level"].lower(),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Approximate-nearest-neighbour FAISS indexes and recall-vs-latency reporting."""
+
+import math
+import time
+from typing import Optional
+
+import faiss
+import numpy as np
+
+# "flat" is exact search; the rest trade recall for speed and/or memory
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq", "sq8")
+
+DEFAULT_INDEX_PARAMS = {
+    # Indexes with fewer vectors than this stay flat (ANN does not pay off)
+    "min_vectors": 1000,
+    # Vectors sampled to train IVF centroids, PQ codebooks and SQ ranges
+    "train_size": 50_000,
+    # IVF lists (None: about 4 * sqrt(vectors), at least 39 vectors per list)
+    "nlist": None,
+    # IVF lists searched per query
+    "nprobe": 8,
+    # HNSW neighbours per node, and candidate list sizes at build and search time
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    # PQ sub-quantizers (None: one per 16 dimensions) and bits per code
+    "pq_m": None,
+    "pq_bits": 8,
+}
+
+# Parameters that shape a built index (the rest are applied at search time)
+BUILD_PARAMS = ("train_size", "nlist", "hnsw_m", "ef_construction", "pq_m", "pq_bits")
+
+# Search parameter values tried by the recall report
+DEFAULT_SWEEPS = {
+    "flat": [{}],
+    "ivf_flat": [{"nprobe": n} for n in (1, 4, 8, 16, 64)],
+    "ivf_pq": [{"nprobe": n} for n in (1, 4, 8, 16, 64)],
+    "hnsw": [{"ef_search": n} for n in (16, 32, 64, 128, 256)],
+    "sq8": [{}],
+}
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str,
+    params: Optional[dict] = None,
+    metric: int = faiss.METRIC_L2,
+) -> faiss.Index:
+    """
+    Build and fill a FAISS index of the given type, training it on a sample.
+
+    Vectors keep their positions, so the index can replace a flat index with
+    the same docstore mapping.
+
+    Args:
+        vectors: Array of shape (vectors, dimension)
+        index_type: One of INDEX_TYPES
+        params: Overrides of DEFAULT_INDEX_PARAMS
+        metric: FAISS metric of the index being replaced
+
+    Returns:
+        The filled index, with its search parameters applied; every type
+        can reconstruct vectors by position
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}"
+        )
+    params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dimension = vectors.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlat(dimension, metric)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, params["hnsw_m"], metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(
+            dimension, faiss.ScalarQuantizer.QT_8bit, metric
+        )
+    else:
+        nlist = params["nlist"] or max(1, min(int(4 * math.sqrt(count)), count // 39))
+        quantizer = faiss.IndexFlat(dimension, metric)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            pq_m = params["pq_m"] or _default_pq_m(dimension)
+            # PQ needs at least 2**bits training vectors per codebook
+            pq_bits = min(params["pq_bits"], max(1, int(math.log2(max(count, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_bits, metric)
+
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample_size = min(count, params["train_size"])
+        sample = vectors[np.sort(rng.choice(count, sample_size, replace=False))]
+        index.train(sample)
+    index.add(vectors)
+    if isinstance(index, faiss.IndexIVF):
+        # Lets re-ranking read vectors back by position
+        index.make_direct_map()
+    set_search_params(index, nprobe=params["nprobe"], ef_search=params["ef_search"])
+    return index
+
+
+def _default_pq_m(dimension: int) -> int:
+    """Return the number of PQ sub-quantizers closest to one per 16 dimensions."""
+    target = max(1, dimension // 16)
+    divisors = [m for m in range(1, dimension + 1) if dimension % m == 0]
+    return min(divisors, key=lambda m: abs(m - target))
+
+
+def set_search_params(
+    index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+):
+    """
+    Tune the recall/latency trade-off of an index at search time.
+
+    Parameters that do not apply to the index type are ignored.
+
+    Args:
+        index: FAISS index
+        nprobe: IVF lists searched per query
+        ef_search: HNSW candidate list size per query
+    """
+    if nprobe is not None and hasattr(index, "nprobe"):
+        index.nprobe = min(nprobe, index.nlist)
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Return the INDEX_TYPES name of a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "sq8"
+    return "flat"
+
+
+def recall_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    index_types: Optional[list[str]] = None,
+    params: Optional[dict] = None,
+    sweeps: Optional[dict[str, list[dict]]] = None,
+    k: int = 4,
+    metric: int = faiss.METRIC_L2,
+) -> list[dict]:
+    """
+    Measure recall@k and search latency of ANN indexes against exact search.
+
+    Args:
+        vectors: Indexed vectors, shape (vectors, dimension)
+        queries: Query vectors, shape (queries, dimension)
+        index_types: Index types to compare (defaults to every INDEX_TYPES entry)
+        params: Build parameter overrides (see DEFAULT_INDEX_PARAMS)
+        sweeps: Search parameters to try per index type (see DEFAULT_SWEEPS)
+        k: Number of neighbours compared
+        metric: FAISS metric
+
+    Returns:
+        One row per index type and search setting with 'recall_at_k',
+        latency percentiles, 'speedup' and 'bytes' relative to the flat index
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(vectors))
+
+    flat = build_index(vectors, "flat", metric=metric)
+    truth, flat_latencies = _timed_search(flat, queries, k)
+    flat_mean = float(np.mean(flat_latencies))
+    flat_bytes = _index_bytes(flat)
+
+    rows = []
+    for index_type in index_types or list(INDEX_TYPES):
+        start = time.perf_counter()
+        index = build_index(vectors, index_type, params, metric=metric)
+        build_seconds = time.perf_counter() - start
+        index_bytes = _index_bytes(index)
+
+        for setting in (sweeps or DEFAULT_SWEEPS).get(index_type, [{}]):
+            set_search_params(index, **setting)
+            found, latencies = _timed_search(index, queries, k)
+            recall = np.mean(
+                [
+                    len(set(row) & set(expected)) / k
+                    for row, expected in zip(found, truth)
+                ]
+            )
+            mean = float(np.mean(latencies))
+            rows.append(
+                {
+                    "index_type": index_type,
+                    **setting,
+                    "vectors": len(vectors),
+                    "recall_at_k": float(recall),
+                    "mean_ms": mean * 1000,
+                    "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+                    "speedup": flat_mean / mean if mean else 0.0,
+                    "bytes": index_bytes,
+                    "memory_ratio": index_bytes / flat_bytes,
+                    "build_seconds": build_seconds,
+                }
+            )
+    return rows
+
+
+def _timed_search(
+    index: faiss.Index, queries: np.ndarray, k: int
+) -> tuple[np.ndarray, list[float]]:
+    """Search queries one at a time, as the retrievers do, timing each search."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0])
+    return np.vstack(results), latencies
+
+
+def _index_bytes(index: faiss.Index) -> int:
+    """Return the serialized size of an index, a proxy for its memory use."""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,158 @@
+"""Token-budgeted packing of retrieved chunks into prompt context."""
+
+import functools
+import logging
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.documents import Document
+
+# Tokens of retrieved context per retrieval or grounded generation
+DEFAULT_CONTEXT_BUDGET = 1500
+# A chunk is cut to fit the remaining budget only if this much of it fits
+MIN_PARTIAL_TOKENS = 64
+# Characters per token assumed when no tokenizer is available
+APPROX_CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger("agents.context")
+
+
+class TokenCounter:
+    """Counts and truncates text in the tokens of a chat model."""
+
+    def __init__(self, model: str):
+        """
+        Initialize the counter.
+
+        Uses the model's tiktoken encoding, or a characters-per-token estimate
+        if tiktoken or its encoding files are not available offline.
+
+        Args:
+            model: OpenAI chat model name
+        """
+        self.model = model
+        self._encoding = None
+        try:
+            import tiktoken
+
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(
+                f"No tokenizer for {model} ({e.__class__.__name__}); "
+                f"estimating {APPROX_CHARS_PER_TOKEN} characters per token"
+            )
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        if self._encoding is None:
+            return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of text within max_tokens, cut at whitespace."""
+        if self._encoding is None:
+            prefix = text[: max_tokens * APPROX_CHARS_PER_TOKEN]
+        else:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            prefix = self._encoding.decode(tokens[:max_tokens])
+        if len(prefix) >= len(text):
+            return text
+        # Drop the partial word the cut ended in
+        cut = prefix.rstrip().rfind(" ")
+        return prefix[:cut] if cut > 0 else prefix
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """Return the shared token counter of a chat model."""
+    return TokenCounter(model)
+
+
+def source_id(doc: Document) -> str:
+    """
+    Return a compact citation ID for a chunk, e.g. 'benefits.md#3'.
+
+    Args:
+        doc: Retrieved chunk
+
+    Returns:
+        The chunk ID's file name and chunk number, or the source file name
+    """
+    if doc.id:
+        return Path(doc.id).name
+    return Path(doc.metadata.get("source", "unknown")).name
+
+
+def format_chunk(doc: Document, content: Optional[str] = None) -> str:
+    """Serialize one chunk as a citation ID header followed by its text."""
+    return f"[{source_id(doc)}]\n{doc.page_content if content is None else content}"
+
+
+def pack_context(
+    docs: list[Document],
+    model: str,
+    budget: Optional[int] = DEFAULT_CONTEXT_BUDGET,
+) -> tuple[str, dict]:
+    """
+    Serialize retrieved chunks for a prompt within a token budget.
+
+    Chunks are added in the order given (most relevant first) until the budget
+    is spent; the first chunk that does not fit is cut to the remaining budget
+    when at least MIN_PARTIAL_TOKENS of it fit (always for the most relevant
+    chunk), and later chunks are dropped.
+    Each chunk is labelled with a compact source ID instead of its metadata.
+
+    Args:
+        docs: Retrieved chunks, most relevant first
+        model: Chat model the context is for, whose tokenizer counts tokens
+        budget: Maximum context tokens (None for no limit)
+
+    Returns:
+        Tuple of (context text, report with 'chunks', 'packed_chunks',
+        'truncated', 'tokens', 'raw_tokens' and 'tokens_saved'; raw_tokens
+        counts the unbudgeted "Source: {metadata}" serialization)
+    """
+    counter = get_token_counter(model)
+    separator_tokens = counter.count("\n\n")
+    parts: list[str] = []
+    used = 0
+    truncated = 0
+    for doc in docs:
+        remaining = None if budget is None else budget - used
+        if parts and remaining is not None:
+            remaining -= separator_tokens
+        part = format_chunk(doc)
+        tokens = counter.count(part)
+        if remaining is not None and tokens > remaining:
+            header_tokens = counter.count(format_chunk(doc, ""))
+            # The most relevant chunk is always included, cut if it must be
+            if parts and remaining - header_tokens < MIN_PARTIAL_TOKENS:
+                break
+            part = format_chunk(
+                doc,
+                counter.truncate(doc.page_content, max(remaining - header_tokens, 1)),
+            )
+            tokens = counter.count(part)
+            truncated += 1
+        used += tokens + (separator_tokens if parts else 0)
+        parts.append(part)
+        if truncated:
+            break
+
+    raw_tokens = counter.count(
+        "\n\n".join(
+            f"Source: {doc.metadata}\nContent: {doc.page_content}" for doc in docs
+        )
+    )
+    report = {
+        "chunks": len(docs),
+        "packed_chunks": len(parts),
+        "truncated": truncated,
+        "tokens": used,
+        "raw_tokens": raw_tokens,
+        "tokens_saved": max(raw_tokens - used, 0),
+    }
+    return "\n\n".join(parts), report
@@ -0,0 +1,127 @@
+"""Parallel loading and splitting of markdown documents."""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+LOADERS = ("unstructured", "markdown")
+
+# Below this many files the process pool costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+def make_text_splitter(
+    chunk_size: int, chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    """Create the text splitter shared by all agents."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""],
+        add_start_index=True,  # Track chunk position in original document
+    )
+
+
+def load_file(path: Path, loader: str = "unstructured") -> list[Document]:
+    """
+    Load a single markdown file.
+
+    Args:
+        path: Markdown file to load
+        loader: "unstructured" to parse with UnstructuredMarkdownLoader, or
+            "markdown" to read the raw text without the unstructured dependency
+
+    Returns:
+        List of loaded documents
+    """
+    if loader == "markdown":
+        text = Path(path).read_text(encoding="utf-8")
+        return [Document(page_content=text, metadata={"source": str(path)})]
+    if loader == "unstructured":
+        # Imported lazily: unstructured is slow to import and only needed here
+        from langchain_community.document_loaders import UnstructuredMarkdownLoader
+
+        return UnstructuredMarkdownLoader(str(path)).load()
+    raise ValueError(f"Unknown loader '{loader}', expected one of {LOADERS}")
+
+
+def load_and_split_file(
+    path: Path, chunk_size: int, chunk_overlap: int, loader: str = "unstructured"
+) -> list[Document]:
+    """
+    Load a single markdown file and split it into chunks.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        path: Markdown file to load
+        chunk_size: Size of text chunks for splitting
+        chunk_overlap: Overlap between chunks
+        loader: Loader name (see load_file)
+
+    Returns:
+        List of document chunks
+    """
+    splitter = make_text_splitter(chunk_size, chunk_overlap)
+    return splitter.split_documents(load_file(path, loader))
+
+
+def iter_file_chunks(
+    paths: list[Path],
+    chunk_size: int,
+    chunk_overlap: int,
+    loader: str = "unstructured",
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[Path, list[Document]]]:
+    """
+    Load and split files, yielding each file's chunks as soon as they are ready.
+
+    Large file sets are parsed in a process pool with a bounded number of files
+    in flight, so memory stays flat regardless of corpus size. Results are
+    yielded in input order.
+
+    Args:
+        paths: Files to load
+        chunk_size: Size of text chunks for splitting
+        chunk_overlap: Overlap between chunks
+        loader: Loader name (see load_file)
+        max_workers: Worker processes (defaults to the CPU count; 1 disables the pool)
+
+    Yields:
+        Tuples of (file path, chunks of that file)
+    """
+    max_workers = max_workers or multiprocessing.cpu_count()
+    if max_workers <= 1 or len(paths) < PARALLEL_THRESHOLD:
+        for path in paths:
+            yield path, load_and_split_file(path, chunk_size, chunk_overlap, loader)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        in_flight = deque()
+        remaining = iter(paths)
+
+        def submit_next() -> bool:
+            path = next(remaining, None)
+            if path is None:
+                return False
+            future = executor.submit(
+                load_and_split_file, path, chunk_size, chunk_overlap, loader
+            )
+            in_flight.append((path, future))
+            return True
+
+        for _ in range(max_workers * 2):
+            if not submit_next():
+                break
+
+        while in_flight:
+            path, future = in_flight.popleft()
+            chunks = future.result()
+            submit_next()
+            yield path, chunks
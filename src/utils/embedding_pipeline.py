@@ -0,0 +1,219 @@
+"""Batched, concurrent embedding pipeline for FAISS index builds."""
+
+import json
+import logging
+import random
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+PROGRESS_FILENAME = "progress.json"
+
+
+class EmbeddingPipeline:
+    """
+    Streams (chunk, id) pairs through the embedding model in batches.
+
+    Up to `max_concurrency` batches are in flight at once. Completed batches are
+    written to the index immediately, failed requests are retried with
+    exponential backoff, and the partial index is checkpointed so an
+    interrupted build resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 64,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        checkpoint_path: Optional[Path] = None,
+        checkpoint_every: int = 10,
+        build_settings: Optional[dict] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the embedding pipeline.
+
+        Args:
+            embeddings: Embedding model used for the chunks
+            batch_size: Number of chunks per embeddings request
+            max_concurrency: Maximum number of batches embedded concurrently
+            max_retries: Retries per batch before the build fails
+            backoff_seconds: Base delay for exponential backoff between retries
+            checkpoint_path: Directory for the partial index (disables resume if None)
+            checkpoint_every: Number of completed batches between checkpoints
+            build_settings: Settings a checkpoint must match to be resumed
+            logger: Logger for progress messages
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+        self.build_settings = build_settings or {}
+        self.logger = logger or logging.getLogger("agents.embeddings")
+
+    def build(
+        self,
+        pairs: Iterable[tuple[Document, str]],
+        vector_store: Optional[FAISS] = None,
+    ) -> Optional[FAISS]:
+        """
+        Embed chunks and add them to a vector store.
+
+        Args:
+            pairs: Iterable of (chunk, chunk ID) pairs, consumed lazily
+            vector_store: Existing store to add to (a new one is created if None)
+
+        Returns:
+            The vector store, or None if there were no chunks and no store was given
+        """
+        if vector_store is None:
+            vector_store = self._load_checkpoint()
+        done_ids = (
+            set(vector_store.index_to_docstore_id.values()) if vector_store else set()
+        )
+        if done_ids:
+            self.logger.info(
+                f"Resuming build from checkpoint with {len(done_ids)} chunks"
+            )
+
+        pending = (pair for pair in pairs if pair[1] not in done_ids)
+        batches = self._batches(pending)
+
+        start = time.perf_counter()
+        embedded = completed = 0
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="embed"
+        ) as executor:
+            in_flight = {}
+            try:
+                for batch in islice(batches, self.max_concurrency):
+                    in_flight[executor.submit(self._embed_batch, batch)] = batch
+
+                while in_flight:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        batch = in_flight.pop(future)
+                        vectors = future.result()
+                        vector_store = self._add_batch(vector_store, batch, vectors)
+
+                        embedded += len(batch)
+                        completed += 1
+                        rate = embedded / max(time.perf_counter() - start, 1e-9)
+                        self.logger.debug(
+                            f"Embedded {embedded} chunks ({rate:.1f} chunks/s)"
+                        )
+                        if completed % self.checkpoint_every == 0:
+                            self._save_checkpoint(vector_store)
+
+                        next_batch = next(batches, None)
+                        if next_batch is not None:
+                            future = executor.submit(self._embed_batch, next_batch)
+                            in_flight[future] = next_batch
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                if vector_store is not None:
+                    self._save_checkpoint(vector_store)
+                raise
+
+        self.logger.info(
+            f"Embedded {embedded} chunks in {completed} batches "
+            f"({time.perf_counter() - start:.2f}s)"
+        )
+        return vector_store
+
+    def _clear_checkpoint(self):
+        """Remove a checkpoint that cannot be resumed."""
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            shutil.rmtree(self.checkpoint_path)
+
+    def _batches(
+        self, pairs: Iterator[tuple[Document, str]]
+    ) -> Iterator[list[tuple[Document, str]]]:
+        """Group pairs into lists of at most batch_size."""
+        while batch := list(islice(pairs, self.batch_size)):
+            yield batch
+
+    def _embed_batch(self, batch: list[tuple[Document, str]]) -> list[list[float]]:
+        """Embed one batch, retrying with exponential backoff and jitter."""
+        texts = [chunk.page_content for chunk, _ in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2**attempt * (0.5 + random.random())
+                self.logger.warning(
+                    f"Embedding batch failed ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _add_batch(
+        self,
+        vector_store: Optional[FAISS],
+        batch: list[tuple[Document, str]],
+        vectors: list[list[float]],
+    ) -> FAISS:
+        """Write an embedded batch to the vector store, creating it if needed."""
+        text_embeddings = list(zip((chunk.page_content for chunk, _ in batch), vectors))
+        metadatas = [chunk.metadata for chunk, _ in batch]
+        ids = [chunk_id for _, chunk_id in batch]
+
+        if vector_store is None:
+            return FAISS.from_embeddings(
+                text_embeddings, self.embeddings, metadatas=metadatas, ids=ids
+            )
+        vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return vector_store
+
+    def _save_checkpoint(self, vector_store: FAISS):
+        """Persist the partial index together with the build settings."""
+        if self.checkpoint_path is None:
+            return
+        vector_store.save_local(str(self.checkpoint_path))
+        (self.checkpoint_path / PROGRESS_FILENAME).write_text(
+            json.dumps(
+                {
+                    "settings": self.build_settings,
+                    "chunks": len(vector_store.index_to_docstore_id),
+                }
+            )
+        )
+        self.logger.debug(f"Checkpoint saved to {self.checkpoint_path}")
+
+    def _load_checkpoint(self) -> Optional[FAISS]:
+        """Load a partial index left by an interrupted build with matching settings."""
+        if self.checkpoint_path is None:
+            return None
+        progress_path = self.checkpoint_path / PROGRESS_FILENAME
+        if not progress_path.exists():
+            return None
+
+        try:
+            progress = json.loads(progress_path.read_text())
+            if progress.get("settings") != self.build_settings:
+                self.logger.info("Discarding checkpoint built with different settings")
+                self._clear_checkpoint()
+                return None
+            return FAISS.load_local(
+                str(self.checkpoint_path),
+                self.embeddings,
+                allow_dangerous_deserialization=True,
+            )
+        except Exception as e:
+            self.logger.warning(f"Discarding unreadable checkpoint: {e}")
+            self._clear_checkpoint()
+            return None
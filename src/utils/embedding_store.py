@@ -0,0 +1,170 @@
+"""Persistent embedding cache keyed by model and chunk content hash."""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite-backed store of float32 embedding vectors."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize the embedding store.
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, "
+                "text_hash TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection; connections are not shared across threads."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Look up stored embeddings.
+
+        Args:
+            model: Embedding model name
+            hashes: Content hashes to look up
+
+        Returns:
+            Mapping of content hash to embedding for every hash found
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with closing(self._connect()) as conn:
+            for i in range(0, len(unique), _QUERY_BATCH_SIZE):
+                batch = unique[i : i + _QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, list[float]]):
+        """
+        Store embeddings.
+
+        Args:
+            model: Embedding model name
+            vectors: Mapping of content hash to embedding
+        """
+        rows = [
+            (model, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+            for text_hash, vector in vectors.items()
+        ]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that reads document vectors from an EmbeddingStore
+    before calling the underlying model, so unchanged chunks are never re-embedded.
+    """
+
+    def __init__(self, underlying: Embeddings, model: str, store: EmbeddingStore):
+        """
+        Initialize the cached embeddings.
+
+        Args:
+            underlying: Embedding model that computes missing vectors
+            model: Embedding model name, used as the cache namespace
+            store: Persistent store for document vectors
+        """
+        self.underlying = underlying
+        self.model = model
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents, reusing stored vectors for unchanged texts."""
+        hashes = [content_hash(text) for text in texts]
+        cached = self.store.get_many(self.model, hashes)
+        missing = self._missing_texts(texts, hashes, cached)
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self.store.put_many(self.model, computed)
+            cached.update(computed)
+
+        return self._assemble(hashes, cached, len(missing))
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Asynchronously embed documents, reusing stored vectors for unchanged texts."""
+        hashes = [content_hash(text) for text in texts]
+        cached = await asyncio.to_thread(self.store.get_many, self.model, hashes)
+        missing = self._missing_texts(texts, hashes, cached)
+
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            await asyncio.to_thread(self.store.put_many, self.model, computed)
+            cached.update(computed)
+
+        return self._assemble(hashes, cached, len(missing))
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query with the underlying model."""
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Asynchronously embed a query with the underlying model."""
+        return await self.underlying.aembed_query(text)
+
+    @staticmethod
+    def _missing_texts(
+        texts: list[str], hashes: list[str], cached: dict[str, list[float]]
+    ) -> dict[str, str]:
+        """Return the unique texts, keyed by hash, that have no stored vector."""
+        return {
+            text_hash: text
+            for text, text_hash in zip(texts, hashes)
+            if text_hash not in cached
+        }
+
+    def _assemble(
+        self, hashes: list[str], vectors: dict[str, list[float]], embedded: int
+    ) -> list[list[float]]:
+        """Order vectors to match the input texts and update hit counters."""
+        self.misses += embedded
+        self.hits += len(hashes) - embedded
+        return [vectors[text_hash] for text_hash in hashes]
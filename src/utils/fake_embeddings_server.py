@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Local fake OpenAI embeddings server for testing index builds.
+
+Serves deterministic, hash-seeded vectors from POST /v1/embeddings with
+optional simulated latency and failure rate. Point the system at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake \\
+        uv run python src/multi_agent_system.py sync
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(value, dimensions: int) -> np.ndarray:
+    """
+    Return a deterministic unit vector for a text or token list.
+
+    Args:
+        value: Input text or list of token IDs
+        dimensions: Vector dimensionality
+
+    Returns:
+        Float32 vector of the requested dimensionality
+    """
+    digest = hashlib.sha256(json.dumps(value).encode("utf-8")).digest()
+    rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+    vector = rng.standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def make_handler(dimensions: int, latency: float, failure_rate: float):
+    """Build a request handler class with the given simulation settings."""
+
+    class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+        """Handle OpenAI-compatible embeddings requests."""
+
+        def do_POST(self):
+            """Return embeddings for every input in the request body."""
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                self._send(429, {"error": {"message": "Simulated rate limit"}})
+                return
+
+            inputs = body["input"]
+            if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            dims = body.get("dimensions", dimensions)
+
+            data = []
+            for i, value in enumerate(inputs):
+                vector = fake_embedding(value, dims)
+                if body.get("encoding_format") == "base64":
+                    embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+                else:
+                    embedding = vector.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+            self._send(
+                200,
+                {
+                    "object": "list",
+                    "data": data,
+                    "model": body.get("model", "fake"),
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                },
+            )
+
+        def _send(self, status: int, payload: dict):
+            """Write a JSON response."""
+            encoded = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            """Silence per-request logging."""
+
+    return FakeEmbeddingsHandler
+
+
+def main():
+    """Run the fake embeddings server."""
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds of delay per request"
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with HTTP 429",
+    )
+    args = parser.parse_args()
+
+    handler = make_handler(args.dimensions, args.latency, args.failure_rate)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Fake embeddings server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Deterministic local stand-ins for the OpenAI chat and embedding models."""
+
+import hashlib
+import re
+import time
+import uuid
+from typing import Any, Iterator, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hash-seeded unit vectors with optional simulated latency.
+
+    Identical texts always get identical vectors, and texts sharing words get
+    similar ones, so retrieval and routing behave plausibly without a model.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: float = 0.0):
+        """
+        Initialize the fake embeddings.
+
+        Args:
+            dimensions: Vector dimensionality
+            latency: Seconds of delay per embeddings request
+        """
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts."""
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query."""
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    def _embed(self, text: str) -> list[float]:
+        """Sum hash-seeded word vectors into a normalized text vector."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.sha256(word.encode("utf-8")).digest()
+            rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+            vector += rng.standard_normal(self.dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Scripted chat model that follows the tool-calling flow of the real agents.
+
+    With tools bound, the first turn after a user message calls the tools whose
+    descriptions share the most words with the message (every non-clarification
+    tool when nothing matches); the next turn answers from the tool results.
+    Without tools it answers from the prompt. Each call sleeps for the
+    configured latency, and streaming yields the answer word by word.
+    """
+
+    latency: float = 0.0
+    tool_specs: list[dict] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        """Return a copy of the model that calls the given tools."""
+        specs = [convert_to_openai_tool(tool)["function"] for tool in tools]
+        return self.model_copy(update={"tool_specs": specs})
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        message = self._respond(messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="", tool_calls=message.tool_calls, id=message.id
+                )
+            )
+            return
+        for word in re.findall(r"\S+\s*", message.content):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        """Build the scripted reply to a conversation."""
+        last_human = max(
+            (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)),
+            default=len(messages) - 1,
+        )
+        question = str(messages[last_human].content)
+        tool_results = [
+            str(m.content)
+            for m in messages[last_human + 1 :]
+            if isinstance(m, ToolMessage)
+        ]
+
+        if self.tool_specs and not tool_results:
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": spec["name"],
+                        "args": self._tool_args(spec, question),
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                    }
+                    for spec in self._choose_tools(question)
+                ],
+            )
+
+        context = " ".join(tool_results) or str(messages[0].content)
+        excerpt = " ".join(context.split()[:40])
+        return AIMessage(content=f"Based on the available information: {excerpt}")
+
+    def _choose_tools(self, question: str) -> list[dict]:
+        """Pick the bound tools most related to the question."""
+        candidates = [
+            spec for spec in self.tool_specs if spec["name"] != "request_clarification"
+        ] or self.tool_specs
+        words = set(re.findall(r"\w{4,}", question.lower()))
+        overlaps = {
+            spec["name"]: len(
+                words & set(re.findall(r"\w{4,}", spec.get("description", "").lower()))
+            )
+            for spec in candidates
+        }
+        best = max(overlaps.values(), default=0)
+        if best == 0:
+            return candidates
+        return [spec for spec in candidates if overlaps[spec["name"]] == best]
+
+    @staticmethod
+    def _tool_args(spec: dict, question: str) -> dict:
+        """Fill every string parameter of a tool with the question."""
+        properties = spec.get("parameters", {}).get("properties", {})
+        return {name: question for name in properties} or {"query": question}
@@ -0,0 +1,225 @@
+"""BM25 inverted index stored in a vector store's SQLite docstore, and rank fusion."""
+
+import math
+import re
+import sqlite3
+from typing import Callable, Iterable, Optional
+
+# Words, numbers and codes such as "w-2", "401k" or "hr-104" (lowercased)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[-./]")
+
+STOPWORDS = frozenset(
+    "a about am an and any are as at be been but by can could do does did for "
+    "from get got had has have how i if in into is it its me my of on or our "
+    "should so than that the their them then there these they this to us was "
+    "we were what when where which who why will with would you your".split()
+)
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal-rank fusion constant; larger values flatten the rank weights
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into index terms.
+
+    Compound tokens such as "W-2" are kept whole and also indexed joined
+    ("w2") and split into their parts of two or more characters, so "W2",
+    "W-2" and "form W-2" match each other.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Terms in order of appearance, stopwords removed
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        parts = _SEPARATORS.split(token)
+        if len(parts) > 1:
+            terms.append("".join(parts))
+            terms.extend(part for part in parts if len(part) > 1)
+    return terms
+
+
+def keyword_terms(query: str, max_terms: int = 3) -> Optional[list[str]]:
+    """
+    Return the terms of a keyword query such as "VPN" or "W-2 deadline".
+
+    A keyword query is a few terms with no stopwords or question words; it
+    can be answered from the lexical index alone.
+
+    Args:
+        query: Search query
+        max_terms: Maximum number of terms of a keyword query
+
+    Returns:
+        The query's tokens, or None if it reads as a natural-language question
+    """
+    tokens = _TOKEN_PATTERN.findall(query.lower())
+    if not tokens or len(tokens) > max_terms:
+        return None
+    if any(token in STOPWORDS for token in tokens):
+        return None
+    return tokens
+
+
+def create_tables(conn: sqlite3.Connection):
+    """Create the postings table in a docstore being written."""
+    conn.execute(
+        "CREATE TABLE postings ("
+        "term TEXT NOT NULL, "
+        "chunk_id TEXT NOT NULL, "
+        "tf INTEGER NOT NULL, "
+        "length INTEGER NOT NULL)"
+    )
+
+
+def index_chunks(conn: sqlite3.Connection, chunks: Iterable[tuple[str, str]]):
+    """
+    Add the postings of chunks to a docstore being written.
+
+    Corpus statistics are recorded in the docstore's meta table, so opening
+    the index does not scan the postings.
+
+    Args:
+        conn: Connection to the docstore file being written
+        chunks: (chunk ID, text) pairs
+    """
+    totals = {"chunks": 0, "length": 0}
+
+    def rows():
+        for chunk_id, text in chunks:
+            terms = tokenize(text)
+            totals["chunks"] += 1
+            totals["length"] += len(terms)
+            counts: dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                yield term, chunk_id, tf, len(terms)
+
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", rows())
+    conn.execute("CREATE INDEX postings_term ON postings (term)")
+    conn.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [(f"lexical_{key}", str(value)) for key, value in totals.items()],
+    )
+
+
+class LexicalIndex:
+    """BM25 search over the postings of a saved docstore."""
+
+    def __init__(self, query: Callable[..., list[tuple]]):
+        """
+        Initialize the index.
+
+        Args:
+            query: Function running a read query on the docstore, as
+                SqliteDocstore._query
+        """
+        self._query = query
+        stats = dict(query("SELECT key, value FROM meta WHERE key LIKE 'lexical_%'"))
+        self.chunk_count = int(stats.get("lexical_chunks", 0))
+        total_length = int(stats.get("lexical_length", 0))
+        self.average_length = (
+            total_length / self.chunk_count if self.chunk_count else 0.0
+        )
+
+    def search(
+        self, query: str, k: int = 4, id_prefix: Optional[str] = None
+    ) -> list[tuple[str, float, float]]:
+        """
+        Return the k chunks scoring highest for a query under BM25.
+
+        Term statistics (document frequencies, chunk count and average
+        length) are those of the whole index, also when results are
+        restricted to an ID prefix.
+
+        Args:
+            query: Search query
+            k: Number of chunks to return
+            id_prefix: Only return chunks whose ID starts with this prefix
+
+        Returns:
+            (chunk ID, score, coverage) triples, best first; coverage is the
+            fraction of the query's terms found in the chunk
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.chunk_count:
+            return []
+        # Coverage counts the query's own tokens, not their joined/split forms
+        required = {
+            token
+            for token in _TOKEN_PATTERN.findall(query.lower())
+            if token not in STOPWORDS
+        }
+
+        placeholders = ",".join("?" * len(terms))
+        sql = (
+            "SELECT term, chunk_id, tf, length FROM postings "
+            f"WHERE term IN ({placeholders})"
+        )
+        params: tuple = tuple(terms)
+        if id_prefix is not None:
+            sql += " AND substr(chunk_id, 1, ?) = ?"
+            params += (len(id_prefix), id_prefix)
+        rows = self._query(sql, params)
+
+        if id_prefix is None:
+            document_frequency: dict[str, int] = {}
+            for term, *_ in rows:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        else:
+            # Counted over the whole index, the population of chunk_count
+            document_frequency = dict(
+                self._query(
+                    "SELECT term, COUNT(*) FROM postings "
+                    f"WHERE term IN ({placeholders}) GROUP BY term",
+                    tuple(terms),
+                )
+            )
+
+        scores: dict[str, float] = {}
+        matched: dict[str, set[str]] = {}
+        for term, chunk_id, tf, length in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (self.chunk_count - df + 0.5) / (df + 0.5))
+            norm = 1 - BM25_B + BM25_B * length / (self.average_length or 1)
+            weight = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight
+            if term in required:
+                matched.setdefault(chunk_id, set()).add(term)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            (chunk_id, score, len(matched.get(chunk_id, ())) / len(required))
+            for chunk_id, score in ranked
+        ]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], k: int = RRF_K
+) -> list[tuple[str, float]]:
+    """
+    Merge ranked lists of IDs by summing 1 / (k + rank) across lists.
+
+    Args:
+        rankings: Ranked lists of IDs, best first
+        k: Fusion constant
+
+    Returns:
+        (ID, fused score) pairs, best first
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,324 @@
+"""
+Process-wide latency histograms and counters for the query pipeline stages.
+
+Every stage duration is recorded in a histogram keyed by stage and agent:
+
+- "llm": chat model calls (agent: "orchestrator", "hr", "finance", "tech", "evaluator")
+- "embedding": embeddings API calls, excluding embedding cache hits
+- "search": FAISS vector searches of a specialist's index
+- "lexical": BM25 keyword searches of a specialist's index (hybrid search only)
+- "rerank": MMR selection and overlap merging of a specialist's retrieved chunks
+- "specialist": specialist calls made by the orchestrator, including queueing
+- "evaluation": judge batches, including the Langfuse flush
+- "query": orchestrator queries end to end (agent: how the query was routed)
+- "http": HTTP service requests (agent: the request path)
+
+Metrics can be exported in the Prometheus text format or as a JSON snapshot
+with recent-sample percentiles.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+from uuid import UUID
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Recent samples kept per histogram for the snapshot's percentiles
+SAMPLE_WINDOW = 2048
+
+METRIC_PREFIX = "rag"
+
+
+class Histogram:
+    """Cumulative bucketed histogram plus a window of recent samples."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets: Increasing bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def observe(self, value: float):
+        """Record one duration in seconds."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def summary(self) -> dict:
+        """Return count, total and recent-sample percentiles in milliseconds."""
+        summary = {"count": self.count, "sum_seconds": self.sum}
+        if self.samples:
+            values = np.asarray(self.samples) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary.update(
+                {
+                    "mean_ms": self.sum / self.count * 1000,
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "p99_ms": float(p99),
+                    "max_ms": float(values.max()),
+                }
+            )
+        return summary
+
+
+class MetricsRegistry:
+    """Thread-safe store of stage histograms and labeled counters."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, agent: str, seconds: float):
+        """
+        Record the duration of one stage run.
+
+        Args:
+            stage: Pipeline stage (see the module docstring)
+            agent: Agent the stage ran for
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            histogram = self._histograms.get((stage, agent))
+            if histogram is None:
+                histogram = self._histograms[(stage, agent)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        """
+        Increase a counter.
+
+        Args:
+            name: Counter name without prefix or _total suffix (e.g. "errors")
+            amount: Amount to add
+            **labels: Counter labels (e.g. stage="llm", agent="hr")
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, stage: str, agent: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one run of a stage.
+
+        Failed runs are counted in the "errors" counter instead of the histogram.
+
+        Args:
+            stage: Pipeline stage (see the module docstring)
+            agent: Agent the stage runs for
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment("errors", stage=stage, agent=agent)
+            raise
+        self.observe(stage, agent, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Return every metric as a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with 'stages' (stage -> agent -> histogram summary) and
+            'counters' (name -> list of label dictionaries with a 'value')
+        """
+        with self._lock:
+            stages: dict[str, dict] = {}
+            for (stage, agent), histogram in sorted(self._histograms.items()):
+                stages.setdefault(stage, {})[agent] = histogram.summary()
+
+            counters: dict[str, list] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({**dict(labels), "value": value})
+
+        return {"stages": stages, "counters": counters}
+
+    def to_prometheus(self, prefix: str = METRIC_PREFIX) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Exposition text ending with a newline
+        """
+        name = f"{prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of query pipeline stages.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for (stage, agent), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{_escape(stage)}",agent="{_escape(agent)}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+            counters: dict[str, list] = {}
+            for (counter, labels), value in sorted(self._counters.items()):
+                counters.setdefault(counter, []).append((labels, value))
+
+        for counter, series in counters.items():
+            counter_name = f"{prefix}_{counter}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            for labels, value in series:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{counter_name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Discard every recorded metric."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+def observe(stage: str, agent: str, seconds: float):
+    """Record a stage duration in the process-wide registry."""
+    _registry.observe(stage, agent, seconds)
+
+
+def increment(name: str, amount: float = 1, **labels: str):
+    """Increase a counter in the process-wide registry."""
+    _registry.increment(name, amount, **labels)
+
+
+def timed(stage: str, agent: str):
+    """Time the enclosed block as a stage run in the process-wide registry."""
+    return _registry.timed(stage, agent)
+
+
+def snapshot() -> dict:
+    """Return the process-wide metrics as a JSON-serializable dictionary."""
+    return _registry.snapshot()
+
+
+def to_prometheus(prefix: str = METRIC_PREFIX) -> str:
+    """Render the process-wide metrics in the Prometheus text format."""
+    return _registry.to_prometheus(prefix)
+
+
+def reset_metrics():
+    """Discard every metric in the process-wide registry."""
+    _registry.reset()
+
+
+class StageTimingCallback(BaseCallbackHandler):
+    """
+    Callback handler recording chat model call durations as a pipeline stage.
+
+    Attach it to a model with callbacks=[...] at construction so every call is
+    timed, whichever agent graph or config the call comes from.
+    """
+
+    # Record timings where they happen instead of in a thread pool
+    run_inline = True
+
+    def __init__(self, agent: str, stage: str = "llm"):
+        """
+        Initialize the handler.
+
+        Args:
+            agent: Agent the model belongs to
+            stage: Pipeline stage to record
+        """
+        self.agent = agent
+        self.stage = stage
+        self._starts: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            observe(self.stage, self.agent, time.perf_counter() - start)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._starts.pop(run_id, None)
+        increment("errors", stage=self.stage, agent=self.agent)
+
+
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper recording every request as an "embedding" stage run."""
+
+    def __init__(self, underlying: Embeddings, agent: str):
+        """
+        Initialize the timed embeddings.
+
+        Args:
+            underlying: Embedding model to time
+            agent: Agent the embedding requests are made for
+        """
+        self.underlying = underlying
+        self.agent = agent
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts."""
+        with timed("embedding", self.agent):
+            return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Asynchronously embed a batch of texts."""
+        with timed("embedding", self.agent):
+            return await self.underlying.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query."""
+        with timed("embedding", self.agent):
+            return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Asynchronously embed a single query."""
+        with timed("embedding", self.agent):
+            return await self.underlying.aembed_query(text)
@@ -0,0 +1,86 @@
+"""Factories for the chat and embedding models used across the system."""
+
+from typing import Any, Optional
+
+from langchain.chat_models import init_chat_model
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import OpenAIEmbeddings
+
+from utils.fake_models import FakeChatModel, FakeEmbeddings
+from utils.rate_limits import RateLimitedEmbeddings, get_rate_limiter
+
+# Settings of the local fake models, or None to use OpenAI
+_fake_settings: Optional[dict] = None
+
+
+def use_fake_models(
+    chat_latency: float = 0.0,
+    embedding_latency: float = 0.0,
+    dimensions: int = 256,
+):
+    """
+    Make every model created from now on a deterministic local fake.
+
+    Args:
+        chat_latency: Simulated seconds per chat model call
+        embedding_latency: Simulated seconds per embeddings request
+        dimensions: Fake embedding dimensionality
+    """
+    global _fake_settings
+    _fake_settings = {
+        "chat_latency": chat_latency,
+        "embedding_latency": embedding_latency,
+        "dimensions": dimensions,
+    }
+
+
+def use_openai_models():
+    """Go back to creating OpenAI models."""
+    global _fake_settings
+    _fake_settings = None
+
+
+def create_chat_model(model: str, **kwargs: Any) -> BaseChatModel:
+    """
+    Create a chat model, honoring provider rate limits and fake-model mode.
+
+    Args:
+        model: OpenAI model name
+        **kwargs: Extra model parameters (e.g. temperature, callbacks)
+
+    Returns:
+        Chat model
+    """
+    if _fake_settings is not None:
+        return FakeChatModel(
+            latency=_fake_settings["chat_latency"], callbacks=kwargs.get("callbacks")
+        )
+    return init_chat_model(
+        model,
+        model_provider="openai",
+        rate_limiter=get_rate_limiter("openai"),
+        **kwargs,
+    )
+
+
+def create_embeddings(model: str) -> Embeddings:
+    """
+    Create an embedding model, honoring provider rate limits and fake-model mode.
+
+    Args:
+        model: OpenAI embedding model name
+
+    Returns:
+        Embedding model
+    """
+    if _fake_settings is not None:
+        return FakeEmbeddings(
+            dimensions=_fake_settings["dimensions"],
+            latency=_fake_settings["embedding_latency"],
+        )
+    embeddings = OpenAIEmbeddings(model=model)
+    rate_limiter = get_rate_limiter("openai")
+    if rate_limiter is not None:
+        return RateLimitedEmbeddings(embeddings, rate_limiter)
+    return embeddings
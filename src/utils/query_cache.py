@@ -0,0 +1,311 @@
+"""Process-wide cache of query embeddings shared by every agent using a model."""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from utils.embedding_store import EmbeddingStore, content_hash
+
+_settings: dict = {"max_size": 1024, "ttl_seconds": None, "path": None}
+_caches: dict[str, "QueryEmbeddingCache"] = {}
+_lock = threading.Lock()
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings with an optional TTL and on-disk tier.
+
+    Queries are keyed by their text with whitespace collapsed. Case is kept,
+    since the embedding model tells "US" from "us".
+    Concurrent requests for the same query share one embeddings call, so a
+    question fanned out to several specialists at once is embedded only once.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_size: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        store: Optional[EmbeddingStore] = None,
+    ):
+        """
+        Initialize the query embedding cache.
+
+        Args:
+            model: Embedding model name, used as the on-disk namespace
+            max_size: Maximum number of query embeddings kept in memory
+            ttl_seconds: Seconds an in-memory entry stays valid (None keeps it
+                until evicted)
+            store: Optional persistent store backing the in-memory tier
+        """
+        self.model = model
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict[str, tuple[list[float], float]] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        """Return the cache key of a query."""
+        return content_hash(" ".join(text.split()))
+
+    def get_or_embed(
+        self, text: str, embed: Callable[[str], list[float]]
+    ) -> list[float]:
+        """
+        Return the cached embedding of a query, embedding it on a miss.
+
+        Args:
+            text: Query text
+            embed: Function embedding the query on a miss
+
+        Returns:
+            Query embedding
+        """
+        key = self._key(text)
+        vector, future, owner = self._claim(key)
+        if vector is not None:
+            return vector
+        if not owner:
+            return future.result()
+
+        try:
+            vector = self._read(key)
+            if vector is None:
+                vector = embed(text)
+                self._write(key, vector)
+        except BaseException as e:
+            self._release(key, future, error=e)
+            raise
+        self._release(key, future, vector=vector)
+        return vector
+
+    async def aget_or_embed(
+        self, text: str, aembed: Callable[[str], Awaitable[list[float]]]
+    ) -> list[float]:
+        """
+        Asynchronously return the cached embedding of a query, embedding it on a miss.
+
+        Args:
+            text: Query text
+            aembed: Coroutine function embedding the query on a miss
+
+        Returns:
+            Query embedding
+        """
+        key = self._key(text)
+        vector, future, owner = self._claim(key)
+        if vector is not None:
+            return vector
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            vector = await asyncio.to_thread(self._read, key)
+            if vector is None:
+                vector = await aembed(text)
+                await asyncio.to_thread(self._write, key, vector)
+        except BaseException as e:
+            self._release(key, future, error=e)
+            raise
+        self._release(key, future, vector=vector)
+        return vector
+
+    def stats(self) -> dict:
+        """Return cache counters and current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "disk_hits": self.disk_hits,
+            }
+
+    def clear(self):
+        """Drop every in-memory entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def _claim(self, key: str) -> tuple[Optional[list[float]], Optional[Future], bool]:
+        """
+        Look a key up in memory, or join or start its in-flight embedding.
+
+        Returns:
+            Tuple of (cached vector or None, in-flight future, whether the
+            caller owns the future and must compute the vector)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if (
+                    self.ttl_seconds is None
+                    or time.monotonic() - stored_at <= self.ttl_seconds
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector, None, False
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            return None, future, True
+
+    def _release(
+        self,
+        key: str,
+        future: Future,
+        vector: Optional[list[float]] = None,
+        error: Optional[BaseException] = None,
+    ):
+        """Store a computed vector (unless it failed) and wake up waiting callers."""
+        with self._lock:
+            del self._in_flight[key]
+            if error is None:
+                self._entries[key] = (vector, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        if error is None:
+            future.set_result(vector)
+        else:
+            future.set_exception(error)
+
+    def _read(self, key: str) -> Optional[list[float]]:
+        """Read a vector from the on-disk tier."""
+        if self.store is None:
+            return None
+        vector = self.store.get_many(self._namespace(), [key]).get(key)
+        if vector is not None:
+            with self._lock:
+                self.disk_hits += 1
+        return vector
+
+    def _write(self, key: str, vector: list[float]):
+        """Write a vector to the on-disk tier."""
+        if self.store is not None:
+            self.store.put_many(self._namespace(), {key: vector})
+
+    def _namespace(self) -> str:
+        """Return the store namespace, kept apart from document embeddings."""
+        return f"{self.model}:query"
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings wrapper answering embed_query from a QueryEmbeddingCache."""
+
+    def __init__(self, underlying: Embeddings, cache: QueryEmbeddingCache):
+        """
+        Initialize the wrapper.
+
+        Args:
+            underlying: Embedding model that embeds cache misses and documents
+            cache: Query embedding cache to read and fill
+        """
+        self.underlying = underlying
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents with the underlying model."""
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Asynchronously embed documents with the underlying model."""
+        return await self.underlying.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, reusing a cached embedding of the same text."""
+        return self.cache.get_or_embed(text, self.underlying.embed_query)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Asynchronously embed a query, reusing a cached embedding of the same text."""
+        return await self.cache.aget_or_embed(text, self.underlying.aembed_query)
+
+
+def configure_query_cache(
+    max_size: int = 1024,
+    ttl_seconds: Optional[float] = None,
+    path: Optional[Path] = None,
+):
+    """
+    Configure the query embedding caches created from now on.
+
+    Args:
+        max_size: Maximum query embeddings kept in memory per model (0 disables
+            the cache)
+        ttl_seconds: Seconds an in-memory entry stays valid (None keeps it
+            until evicted)
+        path: SQLite file persisting query embeddings across runs (None keeps
+            them in memory only)
+    """
+    with _lock:
+        _settings.update(max_size=max_size, ttl_seconds=ttl_seconds, path=path)
+        _caches.clear()
+
+
+def get_query_cache(model: str) -> Optional[QueryEmbeddingCache]:
+    """
+    Return the query embedding cache shared by every user of a model.
+
+    Args:
+        model: Embedding model name
+
+    Returns:
+        The model's cache, or None if query caching is disabled
+    """
+    with _lock:
+        if not _settings["max_size"]:
+            return None
+        cache = _caches.get(model)
+        if cache is None:
+            path = _settings["path"]
+            cache = _caches[model] = QueryEmbeddingCache(
+                model,
+                max_size=_settings["max_size"],
+                ttl_seconds=_settings["ttl_seconds"],
+                store=EmbeddingStore(path) if path is not None else None,
+            )
+        return cache
+
+
+def with_query_cache(embeddings: Embeddings, model: str) -> Embeddings:
+    """
+    Wrap an embedding model so its queries go through the model's shared cache.
+
+    Args:
+        embeddings: Embedding model for the given model name
+        model: Embedding model name
+
+    Returns:
+        The wrapped model, or the model itself if query caching is disabled
+    """
+    cache = get_query_cache(model)
+    if cache is None:
+        return embeddings
+    return QueryCachedEmbeddings(embeddings, cache)
+
+
+def query_cache_stats() -> dict[str, dict]:
+    """Return the stats of every query embedding cache, keyed by model."""
+    with _lock:
+        caches = dict(_caches)
+    return {model: cache.stats() for model, cache in caches.items()}
@@ -0,0 +1,87 @@
+"""Process-wide request rate limits for LLM providers."""
+
+import threading
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+_rate_limiters: dict[str, InMemoryRateLimiter] = {}
+_lock = threading.Lock()
+
+
+def configure_rate_limit(
+    provider: str, requests_per_second: float, max_burst: Optional[int] = None
+) -> InMemoryRateLimiter:
+    """
+    Limit the request rate of every chat and embedding model created for a
+    provider from now on.
+
+    All models of the provider share one token bucket, so the limit holds across
+    the orchestrator, specialists, evaluator, router and semantic cache together.
+
+    Args:
+        provider: Model provider name (e.g. "openai")
+        requests_per_second: Sustained request rate allowed
+        max_burst: Requests allowed in a burst (defaults to one second's worth)
+
+    Returns:
+        The provider's rate limiter
+    """
+    limiter = InMemoryRateLimiter(
+        requests_per_second=requests_per_second,
+        check_every_n_seconds=min(0.1, 1 / requests_per_second),
+        max_bucket_size=max_burst or max(1, int(requests_per_second)),
+    )
+    with _lock:
+        _rate_limiters[provider] = limiter
+    return limiter
+
+
+def get_rate_limiter(provider: str) -> Optional[InMemoryRateLimiter]:
+    """
+    Return the rate limiter configured for a provider.
+
+    Args:
+        provider: Model provider name (e.g. "openai")
+
+    Returns:
+        The provider's rate limiter, or None if it is not rate limited
+    """
+    with _lock:
+        return _rate_limiters.get(provider)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """Embeddings wrapper taking a rate limiter token before every request."""
+
+    def __init__(self, underlying: Embeddings, rate_limiter: InMemoryRateLimiter):
+        """
+        Initialize the wrapper.
+
+        Args:
+            underlying: Embedding model to throttle
+            rate_limiter: Limiter shared with the provider's other models
+        """
+        self.underlying = underlying
+        self.rate_limiter = rate_limiter
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts (one request)."""
+        self.rate_limiter.acquire()
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Asynchronously embed a batch of texts (one request)."""
+        await self.rate_limiter.aacquire()
+        return await self.underlying.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query."""
+        self.rate_limiter.acquire()
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Asynchronously embed a single query."""
+        await self.rate_limiter.aacquire()
+        return await self.underlying.aembed_query(text)
@@ -0,0 +1,155 @@
+"""Second retrieval stage: overlap merging and maximal-marginal-relevance selection."""
+
+from typing import Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Candidates fetched per query before merging and diversification
+DEFAULT_FETCH_K = 20
+# MMR weight of query relevance against novelty (1.0: relevance only)
+DEFAULT_MMR_LAMBDA = 0.5
+
+
+def merge_overlapping(docs: list[Document]) -> list[Document]:
+    """
+    Merge chunks of the same file whose text ranges overlap or touch.
+
+    Chunks are placed by their 'source' and 'start_index' metadata (set by the
+    text splitter); chunks without them are kept as they are. A merged chunk
+    takes the rank and ID of its best-ranked part and spans the text of all
+    of its parts once.
+
+    Args:
+        docs: Candidate chunks, best first
+
+    Returns:
+        Merged chunks, best first
+    """
+    groups: dict[str, list[int]] = {}
+    for i, doc in enumerate(docs):
+        if doc.metadata.get("start_index") is not None and "source" in doc.metadata:
+            groups.setdefault(doc.metadata["source"], []).append(i)
+
+    # Merged chunks by the position of their best-ranked part
+    merged: dict[int, Document] = {}
+    absorbed: set[int] = set()
+    for members in groups.values():
+        members.sort(key=lambda i: docs[i].metadata["start_index"])
+        run = [members[0]]
+        for i in members[1:]:
+            end = max(
+                docs[j].metadata["start_index"] + len(docs[j].page_content) for j in run
+            )
+            if docs[i].metadata["start_index"] <= end:
+                run.append(i)
+            else:
+                _merge_run(docs, run, merged, absorbed)
+                run = [i]
+        _merge_run(docs, run, merged, absorbed)
+
+    return [merged.get(i, doc) for i, doc in enumerate(docs) if i not in absorbed]
+
+
+def _merge_run(
+    docs: list[Document],
+    run: list[int],
+    merged: dict[int, Document],
+    absorbed: set[int],
+):
+    """Join a run of overlapping chunks (in text order) into its best-ranked one."""
+    if len(run) == 1:
+        return
+    first = docs[run[0]]
+    start = first.metadata["start_index"]
+    text = first.page_content
+    for i in run[1:]:
+        doc = docs[i]
+        # Characters of this chunk already covered by the text so far
+        covered = start + len(text) - doc.metadata["start_index"]
+        text += doc.page_content[covered:]
+
+    best = min(run)
+    merged[best] = Document(
+        id=docs[best].id,
+        page_content=text,
+        metadata={**docs[best].metadata, "start_index": start},
+    )
+    absorbed.update(i for i in run if i != best)
+
+
+def mmr(
+    query_vector: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+) -> list[int]:
+    """
+    Select k vectors by maximal marginal relevance.
+
+    Each step picks the candidate maximizing lambda * similarity to the query
+    minus (1 - lambda) * its highest similarity to those already picked, by
+    cosine similarity.
+
+    Args:
+        query_vector: Query embedding, shape (dimension,)
+        vectors: Candidate embeddings, shape (candidates, dimension)
+        k: Number of candidates to select
+        lambda_mult: Weight of relevance against novelty, between 0 and 1
+
+    Returns:
+        Positions of the selected candidates, in selection order
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    if not len(vectors):
+        return []
+    relevance = vectors @ _normalize(np.asarray(query_vector, dtype=np.float32))
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of each candidate to the selected ones
+    redundancy = similarity[selected[0]].copy()
+    while len(selected) < min(k, len(vectors)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (along the last axis) to unit length."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def rerank(
+    docs: list[Document],
+    k: int,
+    query_vector: Optional[np.ndarray] = None,
+    vectors: Optional[np.ndarray] = None,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+) -> list[Document]:
+    """
+    Reduce over-fetched candidates to k diversified chunks without repeated text.
+
+    MMR picks k candidates when the query and candidate vectors are given
+    (otherwise the k best-ranked are kept); picked chunks of the same file
+    that overlap are then merged, so their shared text is sent once. Only
+    picked chunks are merged, so the result never holds more text than them.
+
+    Args:
+        docs: Candidate chunks, best first
+        k: Number of chunks to return
+        query_vector: Query embedding
+        vectors: Stored embeddings of the candidates, in the same order
+        lambda_mult: MMR weight of relevance against novelty
+
+    Returns:
+        Up to k chunks
+    """
+    if query_vector is None or vectors is None or len(docs) <= k:
+        return merge_overlapping(docs[:k])
+    selected = mmr(np.asarray(query_vector), vectors, k, lambda_mult)
+    return merge_overlapping([docs[i] for i in selected])
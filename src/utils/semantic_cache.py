@@ -0,0 +1,410 @@
+"""Semantic answer cache keyed by question embeddings."""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.metrics import TimedEmbeddings
+from utils.models import create_embeddings
+from utils.query_cache import with_query_cache
+
+
+def corpus_fingerprint(docs_path: Path) -> str:
+    """
+    Compute a cheap fingerprint of a document corpus from file metadata.
+
+    Args:
+        docs_path: Directory containing the domain's markdown documents
+
+    Returns:
+        Hex digest that changes when a file is added, removed or modified
+    """
+    digest = hashlib.sha1()
+    for path in sorted(Path(docs_path).glob("**/*.md")):
+        stat = path.stat()
+        digest.update(
+            f"{path.relative_to(docs_path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+class SemanticCache:
+    """
+    Answer cache that matches near-duplicate questions by embedding similarity.
+
+    Entries expire after a TTL, are evicted least-recently-used once the cache
+    is full, and are invalidated when the corpus of a domain that contributed
+    to the answer changes on disk.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1000,
+        fingerprint_check_interval: float = 5.0,
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            embeddings: Embedding model used to embed questions
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            ttl_seconds: Seconds an entry stays valid
+            max_entries: Maximum number of cached answers before LRU eviction
+            fingerprint_check_interval: Minimum seconds between corpus change checks
+        """
+        if embeddings is None:
+            # Share query embeddings with the router and specialists' retrievers
+            model = "text-embedding-3-large"
+            embeddings = with_query_cache(
+                TimedEmbeddings(create_embeddings(model), agent="semantic_cache"),
+                model,
+            )
+        else:
+            embeddings = TimedEmbeddings(embeddings, agent="semantic_cache")
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.fingerprint_check_interval = fingerprint_check_interval
+        self.logger = logging.getLogger("agents.orchestrator")
+
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        # Entry embeddings, one row per slot, allocated on the first store
+        self._matrix: Optional[np.ndarray] = None
+        # Entry ID held in each slot (-1 for free slots)
+        self._slot_ids = np.full(max_entries, -1, dtype=np.int64)
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        # Slots below this have been used; only they are scored
+        self._slots_used = 0
+        self._recent_embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._corpus_paths: dict[str, Path] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._last_fingerprint_check = 0.0
+        self._checking_corpora = False
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_latency = 0.0
+
+    def watch_corpora(self, corpus_paths: dict[str, Path]):
+        """
+        Register the document directories whose changes invalidate entries.
+
+        Args:
+            corpus_paths: Mapping of domain name to documents directory
+        """
+        fingerprints = {
+            domain: corpus_fingerprint(path) for domain, path in corpus_paths.items()
+        }
+        with self._lock:
+            self._corpus_paths.update(corpus_paths)
+            self._fingerprints.update(fingerprints)
+
+    def lookup(self, question: str) -> Optional[dict]:
+        """
+        Return a cached response for a semantically equivalent question.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Cached response dictionary, or None on a miss
+        """
+        start = time.perf_counter()
+        try:
+            embedding = self._remember(question, self.embeddings.embed_query(question))
+        except Exception as e:
+            self.logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+        corpora = self._due_corpora()
+        if corpora:
+            self._check_corpora(corpora)
+        return self._match(embedding, start)
+
+    async def alookup(self, question: str) -> Optional[dict]:
+        """
+        Asynchronously return a cached response for a semantically equivalent question.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Cached response dictionary, or None on a miss
+        """
+        start = time.perf_counter()
+        try:
+            embedding = self._remember(
+                question, await self.embeddings.aembed_query(question)
+            )
+        except Exception as e:
+            self.logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+        corpora = self._due_corpora()
+        if corpora:
+            # Globs and stats every corpus file, so kept off the event loop
+            await asyncio.to_thread(self._check_corpora, corpora)
+        return self._match(embedding, start)
+
+    def store(self, question: str, response: dict):
+        """
+        Cache a response if every specialist it relied on answered successfully.
+
+        Args:
+            question: The user's question
+            response: Response returned by Orchestrator.query
+        """
+        if not self._cacheable(response):
+            return
+        embedding = self._recalled(question)
+        if embedding is None:
+            try:
+                embedding = self._normalize(self.embeddings.embed_query(question))
+            except Exception as e:
+                self.logger.warning(f"Semantic cache store failed: {e}")
+                return
+        self._add(question, response, embedding)
+
+    async def astore(self, question: str, response: dict):
+        """
+        Asynchronously cache a response (see store()).
+
+        Reuses the embedding of the preceding alookup() of the question, or
+        embeds it without blocking the event loop.
+
+        Args:
+            question: The user's question
+            response: Response returned by Orchestrator.aquery
+        """
+        if not self._cacheable(response):
+            return
+        embedding = self._recalled(question)
+        if embedding is None:
+            try:
+                embedding = self._normalize(
+                    await self.embeddings.aembed_query(question)
+                )
+            except Exception as e:
+                self.logger.warning(f"Semantic cache store failed: {e}")
+                return
+        self._add(question, response, embedding)
+
+    @staticmethod
+    def _cacheable(response: dict) -> bool:
+        """Whether every specialist call behind a response succeeded."""
+        calls = response.get("specialist_calls", [])
+        return all(call["status"] == "ok" for call in calls)
+
+    def _recalled(self, question: str) -> Optional[np.ndarray]:
+        """Take the embedding remembered by the question's lookup, if any."""
+        with self._lock:
+            return self._recent_embeddings.pop(question, None)
+
+    def _add(self, question: str, response: dict, embedding: np.ndarray):
+        """Add an entry for a response, evicting the least recently used."""
+        calls = response.get("specialist_calls", [])
+        entry = {
+            "question": question,
+            "answer": response["answer"],
+            "specialist_calls": calls,
+            "domains": {call["agent"] for call in calls},
+            "latency": response.get("elapsed", 0.0),
+            "created_at": time.monotonic(),
+        }
+
+        with self._lock:
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            if self._matrix is None:
+                self._matrix = np.zeros(
+                    (self.max_entries, len(embedding)), dtype=np.float32
+                )
+            slot = self._free_slots.pop()
+            self._matrix[slot] = embedding
+            self._slot_ids[slot] = self._next_id
+            self._slots_used = max(self._slots_used, slot + 1)
+            entry["slot"] = slot
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+
+    def invalidate_domain(self, domain: str) -> int:
+        """
+        Drop every entry whose answer came from the given domain.
+
+        Args:
+            domain: Domain name (e.g. "hr")
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            return self._invalidate_domain(domain)
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._recent_embeddings.clear()
+            self._slot_ids.fill(-1)
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+            self._slots_used = 0
+
+    def stats(self) -> dict:
+        """
+        Return hit rate and saved-latency counters.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_latency_seconds": self.saved_latency,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _match(self, embedding: np.ndarray, start: float) -> Optional[dict]:
+        """Find the most similar live entry and record hit/miss counters."""
+        with self._lock:
+            self._expire()
+
+            best_id, best_score = None, -1.0
+            if self._entries:
+                used = self._slots_used
+                scores = self._matrix[:used] @ embedding
+                scores[self._slot_ids[:used] < 0] = -np.inf
+                best = int(np.argmax(scores))
+                best_id, best_score = int(self._slot_ids[best]), float(scores[best])
+
+            if best_id is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            elapsed = time.perf_counter() - start
+            self.hits += 1
+            self.saved_latency += max(entry["latency"] - elapsed, 0.0)
+
+        self.logger.info(
+            f"Semantic cache hit (similarity={best_score:.3f}) for: {entry['question']}"
+        )
+        return {
+            "answer": entry["answer"],
+            "messages": [],
+            "specialist_calls": entry["specialist_calls"],
+            "elapsed": elapsed,
+            "cached": True,
+            "routed_by": "cache",
+        }
+
+    def _remember(self, question: str, embedding: list[float]) -> np.ndarray:
+        """Normalize a question embedding and keep it for a following store()."""
+        normalized = self._normalize(embedding)
+        with self._lock:
+            self._recent_embeddings[question] = normalized
+            while len(self._recent_embeddings) > 128:
+                self._recent_embeddings.popitem(last=False)
+        return normalized
+
+    def _expire(self):
+        """Drop entries older than the TTL. Caller must hold the lock."""
+        now = time.monotonic()
+        expired = [
+            entry_id
+            for entry_id, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        """Drop an entry and free its slot. Caller must hold the lock."""
+        slot = self._entries.pop(entry_id)["slot"]
+        self._slot_ids[slot] = -1
+        self._free_slots.append(slot)
+
+    def _due_corpora(self) -> dict[str, Path]:
+        """
+        Claim the next corpus change check if it is due.
+
+        Returns:
+            Mapping of domain name to documents directory to check, empty if
+            the last check is too recent or still running
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._checking_corpora
+                or now - self._last_fingerprint_check < self.fingerprint_check_interval
+            ):
+                return {}
+            self._last_fingerprint_check = now
+            self._checking_corpora = bool(self._corpus_paths)
+            return dict(self._corpus_paths)
+
+    def _check_corpora(self, corpus_paths: dict[str, Path]):
+        """
+        Invalidate domains whose corpus changed, for a check claimed with _due_corpora().
+
+        Fingerprints are computed without holding the lock, so lookups and
+        stores are not held up by the file system.
+        """
+        try:
+            fingerprints = {
+                domain: corpus_fingerprint(path)
+                for domain, path in corpus_paths.items()
+            }
+            changed = {}
+            with self._lock:
+                for domain, fingerprint in fingerprints.items():
+                    if fingerprint != self._fingerprints.get(domain):
+                        self._fingerprints[domain] = fingerprint
+                        changed[domain] = self._invalidate_domain(domain)
+        finally:
+            with self._lock:
+                self._checking_corpora = False
+
+        for domain, removed in changed.items():
+            self.logger.info(
+                f"{domain.upper()} corpus changed, invalidated {removed} cached answers"
+            )
+
+    def _invalidate_domain(self, domain: str) -> int:
+        """Drop entries that depend on a domain. Caller must hold the lock."""
+        stale = [
+            entry_id
+            for entry_id, entry in self._entries.items()
+            if domain in entry["domains"]
+        ]
+        for entry_id in stale:
+            self._remove(entry_id)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,265 @@
+"""Single FAISS index holding the chunks of every domain, tagged by domain."""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from utils.metrics import TimedEmbeddings
+from utils.models import create_embeddings
+from utils.query_cache import with_query_cache
+from utils.vector_store_io import (
+    lexical_search,
+    load_store,
+    save_store,
+    stored_vectors,
+)
+
+DOMAINS_FILENAME = "domains.json"
+
+
+class _Snapshot:
+    """Immutable view of the index that searches read without locking."""
+
+    def __init__(self, vector_store: Optional[FAISS], domains: dict[str, dict]):
+        self.vector_store = vector_store
+        self.positions: dict[str, np.ndarray] = {}
+        self.search_params: dict[str, faiss.SearchParameters] = {}
+        if vector_store is None:
+            return
+
+        id_to_position = {
+            doc_id: position
+            for position, doc_id in vector_store.index_to_docstore_id.items()
+        }
+        for domain, entry in domains.items():
+            positions = np.array(
+                [id_to_position[doc_id] for doc_id in entry["ids"]], dtype=np.int64
+            )
+            self.positions[domain] = positions
+            self.search_params[domain] = faiss.SearchParameters(
+                sel=faiss.IDSelectorBatch(positions)
+            )
+
+
+class SharedIndex:
+    """
+    One vector index shared by every specialist instead of one index per domain.
+
+    Each domain's chunks are copied from the specialist's own index (its
+    vectors are reused, never re-embedded) and tagged with a 'domain'
+    metadata field. Specialists search it restricted to their domain with a
+    FAISS ID selector; the orchestrator can search every domain at once. A
+    domain is re-copied only when its source manifest changes.
+
+    The index is memory-mapped read-only. Updates read a private copy from
+    disk, save it and swap it in, so searches never wait on a lock.
+    """
+
+    def __init__(self, path: Path, embedding_model: str = "text-embedding-3-large"):
+        """
+        Initialize the shared index.
+
+        Args:
+            path: Directory to save/load the shared index
+            embedding_model: Embedding model of every domain index (queries for
+                cross-domain searches are embedded with it)
+        """
+        self.path = Path(path)
+        self.embedding_model = embedding_model
+        self.embeddings = with_query_cache(
+            TimedEmbeddings(create_embeddings(embedding_model), agent="shared_index"),
+            embedding_model,
+        )
+        self.logger = logging.getLogger("agents.orchestrator")
+
+        self._domains: dict[str, dict] = {}
+        self._snapshot = _Snapshot(None, {})
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def domains(self) -> list[str]:
+        """Return the domains held in the index."""
+        return sorted(self._snapshot.positions)
+
+    def ensure_loaded(self):
+        """Load the index from disk on first use; safe to call from several threads."""
+        with self._lock:
+            if self._loaded:
+                return
+            domains_path = self.path / DOMAINS_FILENAME
+            if domains_path.exists():
+                vector_store = load_store(self.path, self.embeddings, mmap=True)
+                self._domains = json.loads(domains_path.read_text())
+                self._snapshot = _Snapshot(vector_store, self._domains)
+                self.logger.debug(f"Shared index loaded from {self.path}")
+            self._loaded = True
+
+    def sync_domain(self, domain: str, agent) -> bool:
+        """
+        Copy a specialist's index into the shared index if its sources changed.
+
+        Args:
+            domain: Domain name ("hr", "finance", "tech")
+            agent: BaseRAGAgent whose own index is up to date
+
+        Returns:
+            True if the domain's chunks were (re)copied
+        """
+        self.ensure_loaded()
+        fingerprint = agent.index_fingerprint()
+        if self._domains.get(domain, {}).get("fingerprint") == fingerprint:
+            return False
+
+        source = agent.vector_store or agent._read_vector_store()
+        if source is None:
+            raise ValueError(f"{domain.upper()} has no vector store to share")
+        vectors = source.index.reconstruct_n(0, source.index.ntotal)
+        doc_ids = [doc_id for _, doc_id in sorted(source.index_to_docstore_id.items())]
+        docs = [source.docstore.search(doc_id) for doc_id in doc_ids]
+        ids = [f"{domain}/{doc_id}" for doc_id in doc_ids]
+
+        with self._lock:
+            vector_store = (
+                load_store(self.path, self.embeddings)
+                if self._snapshot.vector_store is not None
+                else None
+            )
+            stale = self._domains.get(domain, {}).get("ids", [])
+            if vector_store is not None and stale:
+                vector_store.delete(stale)
+
+            text_embeddings = [
+                (doc.page_content, vector) for doc, vector in zip(docs, vectors)
+            ]
+            metadatas = [{**doc.metadata, "domain": domain} for doc in docs]
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(
+                    text_embeddings, self.embeddings, metadatas=metadatas, ids=ids
+                )
+            elif ids:
+                vector_store.add_embeddings(
+                    text_embeddings, metadatas=metadatas, ids=ids
+                )
+
+            domains = {
+                **self._domains,
+                domain: {"fingerprint": fingerprint, "ids": ids},
+            }
+            self._save(vector_store, domains)
+            self._domains = domains
+            self._snapshot = _Snapshot(
+                load_store(self.path, self.embeddings, mmap=True), domains
+            )
+
+        self.logger.info(f"Shared index: copied {len(ids)} {domain.upper()} chunks")
+        return True
+
+    def search(
+        self, vector: list[float], k: int = 4, domain: Optional[str] = None
+    ) -> list[tuple[Document, float]]:
+        """
+        Return the k chunks nearest to a query vector.
+
+        Args:
+            vector: Query embedding
+            k: Number of chunks to return
+            domain: Only search this domain's chunks (None searches every domain)
+
+        Returns:
+            (chunk, distance) pairs, nearest first
+        """
+        snapshot = self._snapshot
+        vector_store = snapshot.vector_store
+        if vector_store is None:
+            return []
+        if domain is None:
+            return vector_store.similarity_search_with_score_by_vector(vector, k=k)
+
+        positions = snapshot.positions.get(domain)
+        if positions is None or not len(positions):
+            return []
+        distances, indices = vector_store.index.search(
+            np.asarray([vector], dtype=np.float32),
+            min(k, len(positions)),
+            params=snapshot.search_params[domain],
+        )
+        return [
+            (
+                vector_store.docstore.search(vector_store.index_to_docstore_id[i]),
+                float(distance),
+            )
+            for distance, i in zip(distances[0], indices[0])
+            if i != -1
+        ]
+
+    def lexical_search(
+        self, query: str, k: int = 4, domain: Optional[str] = None
+    ) -> list[tuple[Document, float, float]]:
+        """
+        Return the k chunks best matching a query under BM25.
+
+        Args:
+            query: Search query
+            k: Number of chunks to return
+            domain: Only search this domain's chunks (None searches every domain)
+
+        Returns:
+            (chunk, score, coverage) triples, best first
+        """
+        vector_store = self._snapshot.vector_store
+        if vector_store is None:
+            return []
+        return lexical_search(
+            vector_store,
+            query,
+            k=k,
+            id_prefix=f"{domain}/" if domain is not None else None,
+        )
+
+    def vectors(self, ids: list[str]) -> Optional[np.ndarray]:
+        """Return the stored vectors of chunks (see stored_vectors())."""
+        vector_store = self._snapshot.vector_store
+        if vector_store is None:
+            return None
+        return stored_vectors(vector_store, ids)
+
+    def search_text(
+        self, query: str, k: int = 4, domain: Optional[str] = None
+    ) -> list[tuple[Document, float]]:
+        """Embed a query and return the k nearest chunks (see search())."""
+        return self.search(self.embeddings.embed_query(query), k=k, domain=domain)
+
+    def domain_chunks(self, domain: str) -> tuple[np.ndarray, list[Document]]:
+        """
+        Return the vectors and chunks of one domain.
+
+        Args:
+            domain: Domain name
+
+        Returns:
+            Tuple of (array of shape (chunks, dimension), chunks in the same order)
+        """
+        snapshot = self._snapshot
+        vector_store = snapshot.vector_store
+        positions = snapshot.positions.get(domain)
+        if vector_store is None or positions is None:
+            return np.empty((0, 0), dtype=np.float32), []
+        vectors = vector_store.index.reconstruct_batch(positions)
+        docs = [
+            vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+            for position in positions
+        ]
+        return vectors, docs
+
+    def _save(self, vector_store: FAISS, domains: dict[str, dict]):
+        """Save the index and its domain table."""
+        save_store(vector_store, self.path)
+        (self.path / DOMAINS_FILENAME).write_text(json.dumps(domains, sort_keys=True))
@@ -0,0 +1,175 @@
+"""In-flight deduplication of identical concurrent queries."""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+from utils.metrics import increment
+
+
+def question_key(question: str) -> str:
+    """Return a question's text with whitespace collapsed and case folded."""
+    return " ".join(question.split()).casefold()
+
+
+class SingleFlight:
+    """
+    Shares one execution among concurrent calls for the same question.
+
+    The first caller of a question runs it; callers arriving while it is in
+    flight wait for it and receive its result (or exception) instead of
+    running their own. Nothing is kept once a call finishes, so a question
+    asked again later runs again. Sync and async callers of the same question
+    share one execution. An async run is cancelled once every caller waiting
+    on it has been cancelled, so timeouts still bound the work done.
+    """
+
+    def __init__(self, agent: str):
+        """
+        Initialize the in-flight table.
+
+        Args:
+            agent: Agent label of the 'coalesced_queries' counter
+        """
+        self.agent = agent
+        self.leaders = 0
+        self.coalesced = 0
+        self._in_flight: dict[str, Future] = {}
+        # Callers waiting on each in-flight run, including its owner
+        self._waiters: dict[str, int] = {}
+        # Shared async runs by key, referenced until done as the event loop does not
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def run(self, question: str, call: Callable[[], Any]) -> Any:
+        """
+        Run call() for a question, or wait for the run already in flight.
+
+        Args:
+            question: Question text, normalized with question_key()
+            call: Function answering the question
+
+        Returns:
+            The result of the shared run
+        """
+        key = question_key(question)
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            self._release(key, future, error=e)
+            raise
+        self._release(key, future, result=result)
+        return result
+
+    async def arun(self, question: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronously run call() for a question, or wait for the run in flight.
+
+        The shared run is a task of its own: cancelling the caller that
+        started it (e.g. on a request timeout) does not cancel it for the
+        other callers waiting on it. Cancelling the last one cancels it.
+
+        Args:
+            question: Question text, normalized with question_key()
+            call: Coroutine function answering the question
+
+        Returns:
+            The result of the shared run
+        """
+        key = question_key(question)
+        future, owner = self._claim(key)
+        if owner:
+            task = asyncio.ensure_future(call())
+            with self._lock:
+                self._tasks[key] = task
+            task.add_done_callback(lambda task: self._settle(key, future, task))
+        waiter = asyncio.wrap_future(future)
+        try:
+            # Shielded so a cancelled caller leaves the shared run to the others
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # Nobody awaits the outcome anymore, retrieve it to keep it unlogged
+            waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._leave(key, future)
+            raise
+
+    def stats(self) -> dict:
+        """Return counters of shared runs and of callers that joined one."""
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """
+        Join the in-flight run of a key, or start one.
+
+        Returns:
+            Tuple of (the run's future, whether the caller owns the run)
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                self._waiters[key] += 1
+                owner = False
+            else:
+                future = self._in_flight[key] = Future()
+                # Running futures cannot be cancelled by one of their waiters
+                future.set_running_or_notify_cancel()
+                self._waiters[key] = 1
+                self.leaders += 1
+                owner = True
+        if not owner:
+            increment("coalesced_queries", agent=self.agent)
+        return future, owner
+
+    def _leave(self, key: str, future: Future):
+        """Drop a cancelled caller, cancelling the run if nobody else waits on it."""
+        task = None
+        with self._lock:
+            if self._in_flight.get(key) is not future:
+                return
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                # New callers start a fresh run instead of joining this one
+                del self._in_flight[key], self._waiters[key]
+                task = self._tasks.get(key)
+        if task is not None:
+            task.cancel()
+
+    def _settle(self, key: str, future: Future, task: asyncio.Task):
+        """Release a key with the outcome of its finished async run."""
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if task.cancelled():
+            self._release(key, future, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._release(key, future, error=task.exception())
+        else:
+            self._release(key, future, result=task.result())
+
+    def _release(
+        self,
+        key: str,
+        future: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ):
+        """End a key's run and wake up the callers waiting on it."""
+        with self._lock:
+            # Already removed if every caller left before the run ended
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key], self._waiters[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
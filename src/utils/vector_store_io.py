@@ -0,0 +1,419 @@
+"""On-disk vector store format: a FAISS index plus an SQLite docstore, openable with mmap."""
+
+import json
+import os
+from contextlib import closing
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from utils import lexical_index
+from utils.lexical_index import LexicalIndex
+
+DOCSTORE_FILENAME = "docstore.sqlite"
+# Docstore layout version; older docstores are rewritten on load
+DOCSTORE_FORMAT = "2"
+
+# Bytes of the docstore SQLite reads through mmap (shared across processes)
+_MMAP_SIZE = 1 << 30
+# Open attempts when a concurrent save swaps the files in between
+_OPEN_ATTEMPTS = 3
+
+
+class SqliteDocstore(Docstore):
+    """
+    Read-only docstore over a saved chunks table.
+
+    The database is opened immutable with mmap enabled, so processes serving
+    the same store share its pages and nothing is read until a chunk is. The
+    connection is opened once, so the docstore keeps reading the file version
+    it was opened with after a save replaces it.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the docstore.
+
+        Args:
+            path: Docstore SQLite file written by save_store()
+        """
+        self.path = Path(path)
+        self._conn = sqlite3.connect(
+            f"{self.path.resolve().as_uri()}?mode=ro&immutable=1",
+            uri=True,
+            check_same_thread=False,
+        )
+        self._conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+        self._lock = threading.Lock()
+        self._lexical_index: Optional[LexicalIndex] = None
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Run a read query; the shared connection serves one thread at a time."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Return the chunk with the given ID.
+
+        Args:
+            search: Chunk ID
+
+        Returns:
+            The chunk, or a not-found message as InMemoryDocstore returns
+        """
+        rows = self._query(
+            "SELECT content, metadata FROM chunks WHERE id = ?", (search,)
+        )
+        if not rows:
+            return f"ID {search} not found."
+        content, metadata = rows[0]
+        return Document(id=search, page_content=content, metadata=json.loads(metadata))
+
+    def count(self) -> int:
+        """Return the number of chunks."""
+        return self._query("SELECT COUNT(*) FROM chunks")[0][0]
+
+    def chunk_id(self, position: int) -> Optional[str]:
+        """Return the ID of the chunk at an index position, or None."""
+        rows = self._query("SELECT id FROM chunks WHERE position = ?", (int(position),))
+        return rows[0][0] if rows else None
+
+    def positions(self, ids: list[str]) -> dict[str, int]:
+        """Return the index position of each of the given chunk IDs that exists."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        return dict(
+            self._query(
+                f"SELECT id, position FROM chunks WHERE id IN ({placeholders})",
+                tuple(ids),
+            )
+        )
+
+    def chunk_ids(self) -> Iterator[tuple[int, str]]:
+        """Yield (index position, chunk ID) pairs in position order."""
+        yield from self._query("SELECT position, id FROM chunks ORDER BY position")
+
+    def documents(self) -> Iterator[tuple[int, Document]]:
+        """Yield (index position, chunk) pairs in position order."""
+        rows = self._query(
+            "SELECT position, id, content, metadata FROM chunks ORDER BY position"
+        )
+        for position, chunk_id, content, metadata in rows:
+            yield position, Document(
+                id=chunk_id, page_content=content, metadata=json.loads(metadata)
+            )
+
+    def index_signature(self, index_name: str) -> Optional[str]:
+        """Return the signature of the index file saved with the docstore, if any."""
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (index_name,))
+        return rows[0][0] if rows else None
+
+    def format(self) -> Optional[str]:
+        """Return the docstore layout version (None before versioning)."""
+        rows = self._query("SELECT value FROM meta WHERE key = 'format'")
+        return rows[0][0] if rows else None
+
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        """Return the BM25 index over the docstore's chunks."""
+        if self._lexical_index is None:
+            self._lexical_index = LexicalIndex(self._query)
+        return self._lexical_index
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def add(self, texts: dict[str, Document]):
+        """Reject writes; saved stores change by being saved again."""
+        raise NotImplementedError("Memory-mapped vector stores are read-only")
+
+    def delete(self, ids: list):
+        """Reject writes; saved stores change by being saved again."""
+        raise NotImplementedError("Memory-mapped vector stores are read-only")
+
+
+class PositionIds(Mapping):
+    """Index position to chunk ID mapping read lazily from a SqliteDocstore."""
+
+    def __init__(self, docstore: SqliteDocstore):
+        """
+        Initialize the mapping.
+
+        Args:
+            docstore: Docstore holding the positions
+        """
+        self.docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        chunk_id = self.docstore.chunk_id(position)
+        if chunk_id is None:
+            raise KeyError(position)
+        return chunk_id
+
+    def __iter__(self) -> Iterator[int]:
+        return (position for position, _ in self.docstore.chunk_ids())
+
+    def __len__(self) -> int:
+        return self.docstore.count()
+
+    def items(self):
+        """Return (position, chunk ID) pairs with a single query."""
+        return list(self.docstore.chunk_ids())
+
+    def values(self):
+        """Return the chunk IDs in position order with a single query."""
+        return [chunk_id for _, chunk_id in self.docstore.chunk_ids()]
+
+
+def save_store(
+    vector_store: FAISS,
+    path: Path,
+    index_name: str = "index",
+    include_docstore: bool = True,
+):
+    """
+    Save a vector store as <index_name>.faiss plus docstore.sqlite.
+
+    Each file is written next to its target and renamed over it, so processes
+    that have the previous version memory-mapped keep reading it intact.
+
+    Args:
+        vector_store: Vector store to save
+        path: Directory to save to (created if missing)
+        index_name: Name of the FAISS index file
+        include_docstore: Also write the docstore (False for an extra index
+            over the same chunks, such as an approximate one)
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    index_path = path / f"{index_name}.faiss"
+    tmp_path = index_path.with_name(f"{index_path.name}.tmp")
+    faiss.write_index(vector_store.index, str(tmp_path))
+    if include_docstore:
+        # Renames keep the file signature, so readers can match the two files
+        _write_docstore(
+            vector_store,
+            path / DOCSTORE_FILENAME,
+            {index_name: _file_signature(tmp_path)},
+        )
+    os.replace(tmp_path, index_path)
+    # Superseded by docstore.sqlite
+    (path / f"{index_name}.pkl").unlink(missing_ok=True)
+
+
+def _file_signature(path: Path) -> str:
+    """Return a signature of a file that changes whenever it is rewritten."""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+
+
+def _write_docstore(vector_store: FAISS, path: Path, signatures: dict[str, str]):
+    """
+    Write the chunks of a vector store, in index order, to an SQLite file.
+
+    Args:
+        vector_store: Vector store whose chunks to write
+        path: Docstore file
+        signatures: Signature of each index file saved with the chunks
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(
+            "CREATE TABLE chunks ("
+            "position INTEGER PRIMARY KEY, "
+            "id TEXT NOT NULL UNIQUE, "
+            "content TEXT NOT NULL, "
+            "metadata TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("format", DOCSTORE_FORMAT), *signatures.items()],
+        )
+        lexical_index.create_tables(conn)
+
+        chunks = [
+            (position, chunk_id, vector_store.docstore.search(chunk_id))
+            for position, chunk_id in sorted(vector_store.index_to_docstore_id.items())
+        ]
+        conn.executemany(
+            "INSERT INTO chunks VALUES (?, ?, ?, ?)",
+            (
+                (
+                    position,
+                    chunk_id,
+                    doc.page_content,
+                    json.dumps(doc.metadata, ensure_ascii=False),
+                )
+                for position, chunk_id, doc in chunks
+            ),
+        )
+        lexical_index.index_chunks(
+            conn, ((chunk_id, doc.page_content) for _, chunk_id, doc in chunks)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def load_store(
+    path: Path,
+    embeddings: Embeddings,
+    index_name: str = "index",
+    mmap: bool = False,
+) -> Optional[FAISS]:
+    """
+    Load a vector store saved by save_store().
+
+    Stores saved with a pickled docstore (FAISS.save_local) or an older
+    docstore layout are converted on first load.
+
+    Args:
+        path: Directory the store was saved to
+        embeddings: Embedding model for queries
+        index_name: Name of the FAISS index file
+        mmap: Memory-map the index and docstore read-only instead of reading
+            them into memory; the store cannot be modified
+
+    Returns:
+        The vector store, or None if none is saved at the path
+    """
+    path = Path(path)
+    if not (path / f"{index_name}.faiss").exists():
+        return None
+
+    docstore_path = path / DOCSTORE_FILENAME
+    if not docstore_path.exists():
+        if not (path / f"{index_name}.pkl").exists():
+            return None
+        vector_store = FAISS.load_local(
+            str(path),
+            embeddings,
+            index_name=index_name,
+            allow_dangerous_deserialization=True,
+        )
+        save_store(vector_store, path, index_name=index_name)
+        if not mmap:
+            return vector_store
+    else:
+        with closing(SqliteDocstore(docstore_path)) as docstore:
+            outdated = docstore.format() != DOCSTORE_FORMAT
+        if outdated:
+            # The docstore belongs to the main index, also when opening an extra one
+            save_store(_open(path, embeddings, "index", mmap=False), path)
+
+    return _open(path, embeddings, index_name, mmap)
+
+
+def _open(path: Path, embeddings: Embeddings, index_name: str, mmap: bool) -> FAISS:
+    """Open a saved index with the docstore saved alongside it (see load_store())."""
+    index_path = path / f"{index_name}.faiss"
+    for attempt in range(_OPEN_ATTEMPTS):
+        signature = _file_signature(index_path)
+        if mmap:
+            index = faiss.read_index(
+                str(index_path), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            )
+        else:
+            index = faiss.read_index(str(index_path))
+        docstore = SqliteDocstore(path / DOCSTORE_FILENAME)
+        expected = docstore.index_signature(index_name)
+        if expected is None:
+            # Extra indexes saved without the docstore only have to match in size
+            consistent = docstore.count() == index.ntotal
+        else:
+            consistent = expected == signature
+        if consistent:
+            break
+        docstore.close()
+        # Opened between the docstore and index renames of a concurrent save
+        time.sleep(0.1 * (attempt + 1))
+    else:
+        raise RuntimeError(f"Vector store at {path} changed while being opened")
+
+    if mmap:
+        return FAISS(embeddings, index, docstore, PositionIds(docstore))
+    with closing(docstore):
+        documents = dict(docstore.documents())
+    return FAISS(
+        embeddings,
+        index,
+        InMemoryDocstore({doc.id: doc for doc in documents.values()}),
+        {position: doc.id for position, doc in documents.items()},
+    )
+
+
+def lexical_search(
+    vector_store: FAISS, query: str, k: int = 4, id_prefix: Optional[str] = None
+) -> list[tuple[Document, float, float]]:
+    """
+    Return the k chunks of a saved vector store best matching a query under BM25.
+
+    Args:
+        vector_store: Vector store opened with load_store(mmap=True)
+        query: Search query
+        k: Number of chunks to return
+        id_prefix: Only return chunks whose ID starts with this prefix
+
+    Returns:
+        (chunk, score, coverage) triples, best first (see LexicalIndex.search()),
+        or an empty list for a store without a lexical index
+    """
+    docstore = vector_store.docstore
+    if not isinstance(docstore, SqliteDocstore):
+        return []
+    return [
+        (docstore.search(chunk_id), score, coverage)
+        for chunk_id, score, coverage in docstore.lexical_index.search(
+            query, k=k, id_prefix=id_prefix
+        )
+    ]
+
+
+def stored_vectors(vector_store: FAISS, ids: list[str]) -> Optional[np.ndarray]:
+    """
+    Return the vectors a store holds for chunks, read back from its index.
+
+    Args:
+        vector_store: Vector store holding the chunks
+        ids: Chunk IDs
+
+    Returns:
+        Array of shape (len(ids), dimension), or None if a chunk is missing or
+        the index cannot reconstruct vectors (e.g. IVF without a direct map)
+    """
+    docstore = vector_store.docstore
+    if isinstance(docstore, SqliteDocstore):
+        positions = docstore.positions(ids)
+    else:
+        positions = {
+            chunk_id: position
+            for position, chunk_id in vector_store.index_to_docstore_id.items()
+        }
+    if any(chunk_id not in positions for chunk_id in ids):
+        return None
+    try:
+        return vector_store.index.reconstruct_batch(
+            np.array([positions[chunk_id] for chunk_id in ids], dtype=np.int64)
+        )
+    except RuntimeError:
+        return None